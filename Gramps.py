@@ -26,4 +26,7 @@ able to run gramps from the source directory without setting PYTHONPATH
 From this position, import gramps works great
 """
 import gramps.grampsapp as app
-app.main()
+
+# The worker processes of parallel filters import this script again.
+if __name__ == '__main__':
+    app.main()
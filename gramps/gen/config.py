@@ -163,6 +163,10 @@ register('database.backup-path', USER_HOME)
 register('database.backup-on-exit', True)
 register('database.autobackup', 0)
 register('database.path', os.path.join(HOME_DIR, 'grampsdb'))
+register('database.filter-workers', 0)
+register('database.import-workers', 0)
+# Memory of the objects cached by reports, in megabytes (0 for no limit)
+register('database.proxy-cache-memory', 128)
 
 register('export.proxy-order',
          [["privacy", 0],
@@ -218,6 +222,8 @@ register('interface.toolbar-on', True)
 register('interface.view', True)
 register('interface.surname-box-height', 150)
 register('interface.treemodel-cache-size', 1000)
+# Memory of the rows cached by each view, in megabytes (0 for no limit)
+register('interface.treemodel-cache-memory', 16)
 
 register('paths.recent-export-dir', '')
 register('paths.recent-file', '')
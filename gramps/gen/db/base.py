@@ -40,13 +40,15 @@ import logging
 # Gramps libraries
 #
 #-------------------------------------------------------------------------
-from ..db.dbconst import DBLOGNAME
+from ..db.dbconst import DBLOGNAME, KEY_TO_NAME_MAP
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 from ..lib.childreftype import ChildRefType
 from ..lib.childref import ChildRef
 from .txn import DbTxn
 from .exceptions import DbTransactionCancel, DbException
+from .pedigree import breadth_first, nearest_common, depth_first_paths
+from ..errors import HandleError
 
 _LOG = logging.getLogger(DBLOGNAME)
 
@@ -376,6 +378,28 @@ class DbReadBase:
         """
         raise NotImplementedError
 
+    def get_filtered_cursor(self, class_name, condition, args):
+        """
+        Return a reference to a cursor over the objects of the given class for
+        which a SQL condition holds, or None if the database does not support
+        SQL conditions.  Example use::
+
+            cursor = db.get_filtered_cursor('Person', 'gender = ?', [0])
+            if cursor is not None:
+                with cursor:
+                    for handle, person in cursor:
+                        # process person object pointed to by the handle
+
+        :param class_name: name of the primary object class, eg "Person".
+        :type class_name: str
+        :param condition: SQL condition on the columns of the table of the
+                          class, with "?" as the placeholder for arguments.
+        :type condition: str
+        :param args: arguments of the condition.
+        :type args: list
+        """
+        return None
+
     def get_citation_from_gramps_id(self, val):
         """
         Find a Citation in the database from the passed Gramps ID.
@@ -853,6 +877,27 @@ class DbReadBase:
         """
         raise NotImplementedError
 
+    def get_gramps_id_handles(self, obj_key):
+        """
+        Return a list of (Gramps ID, handle) pairs, one for each object of
+        the given type in the database, sorted by Gramps ID.
+
+        The default implementation reads every object; databases override it
+        to read the Gramps IDs only.
+
+        :param obj_key: object type, eg PERSON_KEY.
+        :type obj_key: int
+        """
+        name = KEY_TO_NAME_MAP[obj_key]
+        get_object = getattr(self, 'get_%s_from_handle' % name)
+        result = []
+        for handle in getattr(self, 'iter_%s_handles' % name)():
+            obj = get_object(handle)
+            if obj is not None:
+                result.append((obj.get_gramps_id(), handle))
+        result.sort()
+        return result
+
     def get_mediapath(self):
         """
         Return the default media path of the database.
@@ -997,6 +1042,322 @@ class DbReadBase:
         """
         raise NotImplementedError
 
+    def get_raw_data_many(self, obj_key, handles):
+        """
+        Return a dictionary of raw (serialized and pickled) objects of the
+        given type, keyed by handle. Handles that are not found are left out.
+
+        The default implementation reads the objects one at a time; databases
+        override it to read them in bulk.
+
+        :param obj_key: object type, eg PERSON_KEY.
+        :type obj_key: int
+        :param handles: handles of the objects to get.
+        :type handles: list
+        """
+        get_raw_data = getattr(self,
+                               'get_raw_%s_data' % KEY_TO_NAME_MAP[obj_key])
+        result = {}
+        for handle in handles:
+            data = get_raw_data(handle)
+            if data is not None:
+                result[handle] = data
+        return result
+
+    def _get_many_from_handles(self, get_func, handles):
+        """
+        Helper function for the get_*_from_handles methods.
+        """
+        result = []
+        for handle in handles:
+            try:
+                obj = get_func(handle)
+            except HandleError:
+                continue
+            if obj is not None:
+                result.append(obj)
+        return result
+
+    def get_citations_from_handles(self, handles):
+        """
+        Return a list of the Citations with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_citation_from_handle,
+                                           handles)
+
+    def get_events_from_handles(self, handles):
+        """
+        Return a list of the Events with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_event_from_handle,
+                                           handles)
+
+    def get_families_from_handles(self, handles):
+        """
+        Return a list of the Families with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_family_from_handle,
+                                           handles)
+
+    def get_media_from_handles(self, handles):
+        """
+        Return a list of the Media with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_media_from_handle,
+                                           handles)
+
+    def get_notes_from_handles(self, handles):
+        """
+        Return a list of the Notes with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_note_from_handle,
+                                           handles)
+
+    def get_people_from_handles(self, handles):
+        """
+        Return a list of the People with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_person_from_handle,
+                                           handles)
+
+    def get_places_from_handles(self, handles):
+        """
+        Return a list of the Places with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_place_from_handle,
+                                           handles)
+
+    def get_repositories_from_handles(self, handles):
+        """
+        Return a list of the Repositories with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_repository_from_handle,
+                                           handles)
+
+    def get_sources_from_handles(self, handles):
+        """
+        Return a list of the Sources with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_source_from_handle,
+                                           handles)
+
+    def get_tags_from_handles(self, handles):
+        """
+        Return a list of the Tags with the given handles, in the same
+        order. Handles that are not found, or that are filtered out by a
+        proxy, are left out.
+        """
+        return self._get_many_from_handles(self.get_tag_from_handle,
+                                           handles)
+
+    def _get_person_or_none(self, handle):
+        """
+        Helper function for the pedigree methods.
+        """
+        try:
+            return self.get_person_from_handle(handle)
+        except HandleError:
+            return None
+
+    def _get_family_or_none(self, handle):
+        """
+        Helper function for the pedigree methods.
+        """
+        try:
+            return self.get_family_from_handle(handle)
+        except HandleError:
+            return None
+
+    def _get_parent_handles(self, handle):
+        """
+        Return the handles of the parents of a person in its main family.
+        """
+        person = self._get_person_or_none(handle)
+        if person is None:
+            return []
+        family_handle = person.get_main_parents_family_handle()
+        family = self._get_family_or_none(family_handle)
+        if family is None:
+            return []
+        return [parent for parent in (family.get_father_handle(),
+                                      family.get_mother_handle()) if parent]
+
+    def _get_child_handles(self, handle):
+        """
+        Return the handles of the children of a person in all its families.
+        """
+        person = self._get_person_or_none(handle)
+        if person is None:
+            return []
+        return [child_ref.ref
+                for family in self.get_families_from_handles(
+                    person.get_family_handle_list())
+                for child_ref in family.get_child_ref_list() if child_ref.ref]
+
+    def _get_relative_handles(self, handle):
+        """
+        Return the handles of the people that share a family with a person.
+        """
+        person = self._get_person_or_none(handle)
+        if person is None:
+            return []
+        result = set()
+        for family in self.get_families_from_handles(
+                person.get_family_handle_list() +
+                person.get_parent_family_handle_list()):
+            result.add(family.get_father_handle())
+            result.add(family.get_mother_handle())
+            result.update(child_ref.ref
+                          for child_ref in family.get_child_ref_list())
+        result.discard(handle)
+        result.discard(None)
+        return result
+
+    def get_ancestor_handles(self, handle, generations=None):
+        """
+        Return a dictionary of the ancestors of a person, following the main
+        parent family of each person, mapped to their generation (1 for the
+        parents). The person is only included if it is its own ancestor.
+
+        :param handle: handle of the person.
+        :type handle: str
+        :param generations: maximum generation, or None for no limit.
+        :type generations: int
+        """
+        return breadth_first(handle, self._get_parent_handles, generations)
+
+    def get_descendant_handles(self, handle, generations=None):
+        """
+        Return a dictionary of the descendants of a person, following the
+        children of all its families, mapped to their generation (1 for the
+        children). The person is only included if it is its own descendant.
+
+        :param handle: handle of the person.
+        :type handle: str
+        :param generations: maximum generation, or None for no limit.
+        :type generations: int
+        """
+        return breadth_first(handle, self._get_child_handles, generations)
+
+    def get_common_ancestor_handles(self, handle1, handle2):
+        """
+        Return a list of the handles of the common ancestors of two people
+        that are the fewest generations away from the first one. A person
+        counts as its own ancestor.
+        """
+        return nearest_common(handle1, handle2, self._get_parent_handles)
+
+    def get_relation_paths(self, handle, target_handles, callback=None):
+        """
+        Return paths from a person to each of the target people that can be
+        reached by going from a person to its parents, siblings, spouses and
+        children. The paths are not necessarily the shortest ones.
+
+        :param handle: handle of the person to start from.
+        :type handle: str
+        :param target_handles: handles of the people to find.
+        :type target_handles: list
+        :param callback: function called for each person visited.
+        :type callback: callable
+        :returns: list of paths, each a list of person handles.
+        :rtype: list
+        """
+        return depth_first_paths(handle, self._get_relative_handles,
+                                 target_handles, callback)
+
+    def get_change_count(self):
+        """
+        Return the number of object changes made to the database since it was
+        created, or None if the database does not count its changes.
+
+        Caches of derived data can store the count and later ask for the
+        objects changed since with :meth:`get_changed_handles`.
+        """
+        return None
+
+    def get_changed_handles(self, count, obj_key):
+        """
+        Return the set of handles of the objects of the given type that have
+        been added, changed or removed since the change count was the given
+        count, or None if these are no longer known.
+
+        :param count: value returned by :meth:`get_change_count`.
+        :type count: int
+        :param obj_key: object type, eg PERSON_KEY.
+        :type obj_key: int
+        """
+        return None
+
+    def get_sort_index(self, obj_key, name, signature):
+        """
+        Prepare the sort index with the given name and return the handles of
+        the objects that have no up-to-date sort key in it, or None if the
+        database does not store sort keys.
+
+        A sort index holds a string sort key for each object of a type, as
+        computed by the caller, for example a view sorting on a column. The
+        keys of an object are marked as stale when it, or an object it refers
+        to, is changed; they keep their place in the index until they are
+        replaced with :meth:`set_sort_keys`. The signature describes the
+        settings the keys were computed with; if it differs from the stored
+        one, the index is emptied.
+
+        :param obj_key: object type, eg PERSON_KEY.
+        :type obj_key: int
+        :param name: name of the sort index.
+        :type name: str
+        :param signature: settings the sort keys depend on.
+        :type signature: str
+        """
+        return None
+
+    def get_sort_keys(self, name, start=None, offset=0, limit=None):
+        """
+        Return the sorted list of (sort_key, handle) pairs of a sort index,
+        including the stale ones.
+
+        :param name: name of the sort index.
+        :type name: str
+        :param start: if given, only the pairs after this pair are returned.
+        :type start: tuple
+        :param offset: number of pairs to skip, if a limit is given.
+        :type offset: int
+        :param limit: maximum number of pairs to return.
+        :type limit: int
+        """
+        raise NotImplementedError
+
+    def get_sort_key(self, name, handle):
+        """
+        Return the sort key of an object in a sort index, or None.
+        """
+        raise NotImplementedError
+
+    def count_sort_keys(self, name, end=None):
+        """
+        Return the number of pairs in a sort index, or if a (sort_key, handle)
+        pair is given, the number of pairs before it.
+        """
+        raise NotImplementedError
+
     def get_researcher(self):
         """
         Return the Researcher instance, providing information about the owner
@@ -1727,6 +2088,25 @@ class DbWriteBase(DbReadBase):
         """
         raise NotImplementedError
 
+    def remove_sort_keys(self, name, handles):
+        """
+        Remove the sort keys of the given objects from a sort index.
+        """
+        raise NotImplementedError
+
+    def set_sort_keys(self, name, keys):
+        """
+        Store sort keys in the sort index with the given name, which must have
+        been prepared by :meth:`get_sort_index`, replacing those of the same
+        objects.
+
+        :param name: name of the sort index.
+        :type name: str
+        :param keys: list of (sort_key, handle) pairs.
+        :type keys: list
+        """
+        raise NotImplementedError
+
     def transaction_begin(self, transaction):
         """
         Prepare the database for the start of a new transaction.
@@ -45,17 +45,20 @@ from . import (DbReadBase, DbWriteBase, DbUndo, DBLOGNAME, DBUNDOFN,
                KEY_TO_CLASS_MAP, REFERENCE_KEY, PERSON_KEY, FAMILY_KEY,
                CITATION_KEY, SOURCE_KEY, EVENT_KEY, MEDIA_KEY, PLACE_KEY,
                REPOSITORY_KEY, NOTE_KEY, TAG_KEY, TXNADD, TXNUPD, TXNDEL,
-               KEY_TO_NAME_MAP)
+               KEY_TO_NAME_MAP, DBMODE_R)
 from ..errors import HandleError
 from ..utils.callback import Callback
+from ..utils.lru import LRU
 from ..updatecallback import UpdateCallback
 from .bookmarks import DbBookmarks
+from .pedigree import PedigreeGraph
 from . import exceptions
 
 from ..utils.id import create_id
 from ..lib.researcher import Researcher
 from ..lib import (Tag, Media, Person, Family, Source, Citation, Event,
                    Place, Repository, Note, NameOriginType)
+from ..lib.lazy import LazyPerson, LazyFamily
 from ..lib.genderstats import GenderStats
 from ..config import config
 from ..const import GRAMPS_LOCALE as glocale
@@ -66,6 +69,21 @@ LOG = logging.getLogger(DBLOGNAME)
 SIGBASE = ('person', 'family', 'source', 'event', 'media',
            'place', 'repository', 'reference', 'note', 'tag', 'citation')
 
+# Number of object changes kept for get_changed_handles.
+CHANGE_LOG_SIZE = 100000
+
+# Number of stored objects of each type kept in the object cache.
+OBJECT_CACHE_SIZES = {PERSON_KEY: 20000,
+                      FAMILY_KEY: 10000,
+                      EVENT_KEY: 20000,
+                      PLACE_KEY: 10000,
+                      CITATION_KEY: 10000,
+                      SOURCE_KEY: 2000,
+                      REPOSITORY_KEY: 500,
+                      MEDIA_KEY: 2000,
+                      NOTE_KEY: 5000,
+                      TAG_KEY: 200}
+
 def touch(fname, mode=0o666, dir_fd=None, **kwargs):
     ## After http://stackoverflow.com/questions/1158076/implement-touch-using-python
     if sys.version_info < (3, 3, 0):
@@ -244,15 +262,12 @@ class DbGenericUndo(DbUndo):
         if data is None:
             sql = "DELETE FROM %s WHERE handle = ?" % table
             self.db.dbapi.execute(sql, [handle])
+            obj = None
         else:
-            if self.db.has_handle(obj_key, handle):
-                sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
-                self.db.dbapi.execute(sql, [pickle.dumps(data), handle])
-            else:
-                sql = "INSERT INTO %s (handle, blob_data) VALUES (?, ?)" % table
-                self.db.dbapi.execute(sql, [handle, pickle.dumps(data)])
             obj = self.db._get_table_func(cls)["class_func"].create(data)
-            self.db._update_secondary_values(obj)
+            self.db._write_object(obj, obj_key, data=data)
+        self.db._update_pedigree(obj_key, handle, obj)
+        self.db._record_change(obj_key, handle)
 
     def undo_sigs(self, sigs, undo):
         """
@@ -574,6 +589,13 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         self.surname_list = []
         self.genderStats = GenderStats() # can pass in loaded stats as dict
         self.owner = Researcher()
+        self._pedigree = None
+        self._change_count = 0
+        self._change_log = []
+        self._object_cache = {
+            obj_key: LRU(size, name='object-cache-%s'
+                         % KEY_TO_NAME_MAP[obj_key])
+            for obj_key, size in OBJECT_CACHE_SIZES.items()}
         if directory:
             self.load(directory)
 
@@ -599,6 +621,7 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
                                             str(current_schema_version),
                                             str(current_schema_version))
         # run backend-specific code:
+        self.readonly = mode == DBMODE_R
         self._initialize(directory)
 
         # Load metadata
@@ -736,6 +759,11 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
             self._close()
         self.db_is_open = False
         self._directory = None
+        self._pedigree = None
+        self._clear_object_cache()
+        # Changes made before the database is reopened are not known
+        self._change_count += 1
+        self._change_log = []
 
     def is_open(self):
         return self.db_is_open
@@ -1336,6 +1364,170 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
     def get_tag_from_handle(self, handle):
         return self._get_from_handle(TAG_KEY, Tag, handle)
 
+    ################################################################
+    #
+    # get_*_from_handles methods
+    #
+    ################################################################
+
+    def _get_from_handles(self, obj_key, obj_class, handles):
+        data = self.get_raw_data_many(obj_key, handles)
+        return [obj_class.create(data[handle])
+                for handle in handles if handle in data]
+
+    def get_citations_from_handles(self, handles):
+        return self._get_from_handles(CITATION_KEY, Citation, handles)
+
+    def get_events_from_handles(self, handles):
+        return self._get_from_handles(EVENT_KEY, Event, handles)
+
+    def get_families_from_handles(self, handles):
+        return self._get_from_handles(FAMILY_KEY, Family, handles)
+
+    def get_media_from_handles(self, handles):
+        return self._get_from_handles(MEDIA_KEY, Media, handles)
+
+    def get_notes_from_handles(self, handles):
+        return self._get_from_handles(NOTE_KEY, Note, handles)
+
+    def get_people_from_handles(self, handles):
+        return self._get_from_handles(PERSON_KEY, Person, handles)
+
+    def get_places_from_handles(self, handles):
+        return self._get_from_handles(PLACE_KEY, Place, handles)
+
+    def get_repositories_from_handles(self, handles):
+        return self._get_from_handles(REPOSITORY_KEY, Repository, handles)
+
+    def get_sources_from_handles(self, handles):
+        return self._get_from_handles(SOURCE_KEY, Source, handles)
+
+    def get_tags_from_handles(self, handles):
+        return self._get_from_handles(TAG_KEY, Tag, handles)
+
+    ################################################################
+    #
+    # Pedigree methods
+    #
+    ################################################################
+
+    def _get_pedigree(self):
+        """
+        Return the graph of the links between people and families, building
+        it the first time it is needed. Once built, it is kept up to date by
+        the commit and remove methods.
+        """
+        if self._pedigree is None:
+            pedigree = PedigreeGraph()
+            with self.get_person_cursor() as cursor:
+                for handle, data in cursor:
+                    person = LazyPerson(data)
+                    pedigree.set_person(handle,
+                                        person.get_parent_family_handle_list(),
+                                        person.get_family_handle_list())
+            with self.get_family_cursor() as cursor:
+                for handle, data in cursor:
+                    family = LazyFamily(data)
+                    pedigree.set_family(handle, family.get_father_handle(),
+                                        family.get_mother_handle(),
+                                        [child_ref.ref for child_ref
+                                         in family.get_child_ref_list()])
+            self._pedigree = pedigree
+        return self._pedigree
+
+    def _update_pedigree(self, obj_key, handle, obj):
+        """
+        Update the pedigree graph, if it has been built, after a person or
+        family has been written or removed.
+        """
+        if self._pedigree is None:
+            return
+        if obj_key == PERSON_KEY:
+            if obj is None:
+                self._pedigree.remove_person(handle)
+            else:
+                self._pedigree.set_person(handle,
+                                          obj.get_parent_family_handle_list(),
+                                          obj.get_family_handle_list())
+        elif obj_key == FAMILY_KEY:
+            if obj is None:
+                self._pedigree.remove_family(handle)
+            else:
+                self._pedigree.set_family(handle, obj.get_father_handle(),
+                                          obj.get_mother_handle(),
+                                          [child_ref.ref for child_ref
+                                           in obj.get_child_ref_list()])
+
+    def get_ancestor_handles(self, handle, generations=None):
+        return self._get_pedigree().get_ancestors(handle, generations)
+
+    def get_descendant_handles(self, handle, generations=None):
+        return self._get_pedigree().get_descendants(handle, generations)
+
+    def get_common_ancestor_handles(self, handle1, handle2):
+        return self._get_pedigree().get_common_ancestors(handle1, handle2)
+
+    def get_relation_paths(self, handle, target_handles, callback=None):
+        return self._get_pedigree().get_relation_paths(handle, target_handles,
+                                                       callback)
+
+    ################################################################
+    #
+    # Change log methods
+    #
+    ################################################################
+
+    def _record_change(self, obj_key, handle):
+        """
+        Record that an object has been written or removed.
+        """
+        self._change_count += 1
+        self._change_log.append((obj_key, handle))
+        if len(self._change_log) > CHANGE_LOG_SIZE:
+            del self._change_log[:CHANGE_LOG_SIZE // 2]
+        cache = self._object_cache.get(obj_key)
+        if cache is not None and handle in cache:
+            del cache[handle]
+
+    def get_change_count(self):
+        return self._change_count
+
+    ################################################################
+    #
+    # Object cache methods
+    #
+    ################################################################
+
+    def _get_cached(self, obj_key, handle):
+        """
+        Return the stored form of an object from the object cache, or None.
+
+        The cache holds the stored form rather than the data or the object,
+        since both can be changed by the caller.
+        """
+        return self._object_cache[obj_key].get(handle)
+
+    def _set_cached(self, obj_key, handle, value):
+        """
+        Store the stored form of an object in the object cache.
+        """
+        self._object_cache[obj_key][handle] = value
+
+    def _clear_object_cache(self):
+        """
+        Remove all objects from the object cache.
+        """
+        for cache in self._object_cache.values():
+            cache.clear()
+
+    def get_changed_handles(self, count, obj_key):
+        changes = self._change_count - count
+        if changes < 0 or changes > len(self._change_log):
+            return None
+        return set(handle for key, handle
+                   in self._change_log[len(self._change_log) - changes:]
+                   if key == obj_key)
+
     ################################################################
     #
     # get_*_from_gramps_id methods
@@ -1849,6 +2041,7 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         part of the transaction.
         """
         old_data = self._commit_base(person, PERSON_KEY, trans, change_time)
+        self._update_pedigree(PERSON_KEY, person.handle, person)
 
         if old_data:
             old_person = Person(old_data)
@@ -1902,6 +2095,7 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         part of the transaction.
         """
         self._commit_base(family, FAMILY_KEY, trans, change_time)
+        self._update_pedigree(FAMILY_KEY, family.handle, family)
 
         # Misc updates:
         self.family_attributes.update(
@@ -2080,6 +2274,7 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         database, preserving the change in the passed transaction.
         """
         self._do_remove(handle, transaction, PERSON_KEY)
+        self._update_pedigree(PERSON_KEY, handle, None)
 
     def remove_source(self, handle, transaction):
         """
@@ -2122,6 +2317,7 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         database, preserving the change in the passed transaction.
         """
         self._do_remove(handle, transaction, FAMILY_KEY)
+        self._update_pedigree(FAMILY_KEY, handle, None)
 
     def remove_repository(self, handle, transaction):
         """
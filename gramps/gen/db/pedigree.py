@@ -0,0 +1,309 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Traversal of the parent, child and spouse links between people.
+
+The search functions work on any kind of node and are given a function that
+returns the neighbours of a node, so they can be used both on the handles of
+a database and on the integer ids of a :class:`PedigreeGraph`. They are
+iterative, so deep or looped trees do not hit the recursion limit.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+from array import array
+from collections import deque
+
+#-------------------------------------------------------------------------
+#
+# Search functions
+#
+#-------------------------------------------------------------------------
+def breadth_first(start, get_next, generations=None):
+    """
+    Return a dictionary of the nodes that can be reached from the start node,
+    mapped to the smallest number of steps needed to reach them.
+
+    The start node is only included if it can be reached from itself.
+
+    :param start: node to start from.
+    :param get_next: function that returns the neighbours of a node.
+    :type get_next: callable
+    :param generations: maximum number of steps, or None for no limit.
+    :type generations: int
+    :returns: dictionary of node: number of steps.
+    :rtype: dict
+    """
+    result = {}
+    if generations is not None and generations < 1:
+        return result
+    queue = deque((node, 1) for node in get_next(start))
+    while queue:
+        node, generation = queue.popleft()
+        if node in result:
+            continue
+        result[node] = generation
+        if generations is None or generation < generations:
+            generation += 1
+            queue.extend((next_node, generation)
+                         for next_node in get_next(node)
+                         if next_node not in result)
+    return result
+
+def nearest_common(first, second, get_next):
+    """
+    Return the nodes that can be reached from both the first and the second
+    node and are the fewest steps away from the first node. Both nodes count
+    as reachable from themselves.
+
+    :returns: list of nodes.
+    :rtype: list
+    """
+    first_map = breadth_first(first, get_next)
+    first_map[first] = 0
+    second_map = breadth_first(second, get_next)
+    second_map[second] = 0
+    common = [node for node in first_map if node in second_map]
+    if not common:
+        return []
+    rank = min(first_map[node] for node in common)
+    return [node for node in common if first_map[node] == rank]
+
+def depth_first_paths(start, get_next, targets, callback=None):
+    """
+    Search depth first from the start node and return the path to each of
+    the target nodes that is found. Each node is only visited once, so the
+    paths are not necessarily the shortest ones. The search stops when all
+    targets have been found.
+
+    :param start: node to start from.
+    :param get_next: function that returns the neighbours of a node.
+    :type get_next: callable
+    :param targets: nodes to find.
+    :type targets: iterable
+    :param callback: function called for each visited node.
+    :type callback: callable
+    :returns: list of paths, each a list of nodes starting with the start
+              node.
+    :rtype: list
+    """
+    targets = set(targets)
+    paths = []
+    seen = set()
+    path = []
+    stack = []
+    node = start
+    while targets:
+        if node is not None:
+            seen.add(node)
+            if callback:
+                callback()
+            path.append(node)
+            if node in targets:
+                paths.append(list(path))
+                targets.remove(node)
+            stack.append(iter(get_next(node)))
+        if not stack:
+            break
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            path.pop()
+        elif node in seen:
+            node = None
+    return paths
+
+#-------------------------------------------------------------------------
+#
+# PedigreeGraph class
+#
+#-------------------------------------------------------------------------
+class PedigreeGraph:
+    """
+    Compact in-memory graph of the links between people and families.
+
+    People and families are numbered in the order they are added and the
+    links are stored in lists and arrays indexed by these numbers, so that
+    searching the graph does not load any objects from the database.
+    Removed people and families keep their number, with their links cleared.
+    """
+    NONE = -1
+
+    def __init__(self):
+        self.__person_ids = {}
+        self.__person_handles = []
+        self.__family_ids = {}
+        # per person:
+        self.__parent_families = []
+        self.__families = []
+        # per family:
+        self.__fathers = array('l')
+        self.__mothers = array('l')
+        self.__children = []
+
+    def __person_id(self, handle):
+        """
+        Return the number of a person, adding it if necessary.
+        """
+        pid = self.__person_ids.get(handle)
+        if pid is None:
+            pid = self.__person_ids[handle] = len(self.__person_handles)
+            self.__person_handles.append(handle)
+            self.__parent_families.append(())
+            self.__families.append(())
+        return pid
+
+    def __family_id(self, handle):
+        """
+        Return the number of a family, adding it if necessary.
+        """
+        fid = self.__family_ids.get(handle)
+        if fid is None:
+            fid = self.__family_ids[handle] = len(self.__children)
+            self.__fathers.append(self.NONE)
+            self.__mothers.append(self.NONE)
+            self.__children.append(())
+        return fid
+
+    def set_person(self, handle, parent_family_handles, family_handles):
+        """
+        Set the families in which a person is a child and a parent.
+        """
+        pid = self.__person_id(handle)
+        self.__parent_families[pid] = tuple(
+            self.__family_id(fam) for fam in parent_family_handles if fam)
+        self.__families[pid] = tuple(
+            self.__family_id(fam) for fam in family_handles if fam)
+
+    def set_family(self, handle, father_handle, mother_handle, child_handles):
+        """
+        Set the father, mother and children of a family.
+        """
+        fid = self.__family_id(handle)
+        self.__fathers[fid] = (self.__person_id(father_handle)
+                               if father_handle else self.NONE)
+        self.__mothers[fid] = (self.__person_id(mother_handle)
+                               if mother_handle else self.NONE)
+        self.__children[fid] = tuple(
+            self.__person_id(child) for child in child_handles if child)
+
+    def remove_person(self, handle):
+        """
+        Remove the links of a person.
+        """
+        if handle in self.__person_ids:
+            self.set_person(handle, (), ())
+
+    def remove_family(self, handle):
+        """
+        Remove the links of a family.
+        """
+        if handle in self.__family_ids:
+            self.set_family(handle, None, None, ())
+
+    def get_parents(self, pid):
+        """
+        Return the numbers of the parents of a person in its main family.
+        """
+        if not self.__parent_families[pid]:
+            return ()
+        fid = self.__parent_families[pid][0]
+        return tuple(parent for parent in (self.__fathers[fid],
+                                           self.__mothers[fid])
+                     if parent != self.NONE)
+
+    def get_children(self, pid):
+        """
+        Return the numbers of the children of a person in all its families.
+        """
+        return [child for fid in self.__families[pid]
+                for child in self.__children[fid]]
+
+    def get_relatives(self, pid):
+        """
+        Return the numbers of the people that share a family with a person:
+        its parents, siblings, spouses and children.
+        """
+        result = set()
+        for fid in self.__families[pid] + self.__parent_families[pid]:
+            result.update(self.__children[fid])
+            result.add(self.__fathers[fid])
+            result.add(self.__mothers[fid])
+        result.discard(pid)
+        result.discard(self.NONE)
+        return result
+
+    def __to_handles(self, result):
+        """
+        Replace the numbers of people by their handles.
+        """
+        handles = self.__person_handles
+        if isinstance(result, dict):
+            return {handles[pid]: value for pid, value in result.items()}
+        return [handles[pid] for pid in result]
+
+    def get_ancestors(self, handle, generations=None):
+        """
+        Return a dictionary of the ancestors of a person, mapped to their
+        generation.
+        """
+        if handle not in self.__person_ids:
+            return {}
+        return self.__to_handles(breadth_first(self.__person_ids[handle],
+                                               self.get_parents,
+                                               generations))
+
+    def get_descendants(self, handle, generations=None):
+        """
+        Return a dictionary of the descendants of a person, mapped to their
+        generation.
+        """
+        if handle not in self.__person_ids:
+            return {}
+        return self.__to_handles(breadth_first(self.__person_ids[handle],
+                                               self.get_children,
+                                               generations))
+
+    def get_common_ancestors(self, handle1, handle2):
+        """
+        Return the nearest common ancestors of two people.
+        """
+        if handle1 not in self.__person_ids or handle2 not in self.__person_ids:
+            return []
+        return self.__to_handles(nearest_common(self.__person_ids[handle1],
+                                                self.__person_ids[handle2],
+                                                self.get_parents))
+
+    def get_relation_paths(self, handle, targets, callback=None):
+        """
+        Return paths of relatives from a person to the target people.
+        """
+        if handle not in self.__person_ids:
+            return []
+        targets = [self.__person_ids[target] for target in targets
+                   if target in self.__person_ids]
+        return [self.__to_handles(path)
+                for path in depth_first_paths(self.__person_ids[handle],
+                                              self.get_relatives,
+                                              targets, callback)]
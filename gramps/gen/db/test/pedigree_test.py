@@ -0,0 +1,104 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the pedigree graph """
+
+import unittest
+
+from ..pedigree import PedigreeGraph, depth_first_paths
+
+class PedigreeGraphTest(unittest.TestCase):
+    """
+    Tree used by the tests:
+
+    F1: P1 + P2 -> P3, P4
+    F2: P3 + P5 -> P6
+    """
+    def setUp(self):
+        self.graph = PedigreeGraph()
+        self.graph.set_family('F1', 'P1', 'P2', ['P3', 'P4'])
+        self.graph.set_family('F2', 'P3', 'P5', ['P6'])
+        self.graph.set_person('P1', [], ['F1'])
+        self.graph.set_person('P2', [], ['F1'])
+        self.graph.set_person('P3', ['F1'], ['F2'])
+        self.graph.set_person('P4', ['F1'], [])
+        self.graph.set_person('P5', [], ['F2'])
+        self.graph.set_person('P6', ['F2'], [])
+
+    def test_ancestors(self):
+        self.assertEqual(self.graph.get_ancestors('P6'),
+                         {'P3': 1, 'P5': 1, 'P1': 2, 'P2': 2})
+        self.assertEqual(self.graph.get_ancestors('P6', 1),
+                         {'P3': 1, 'P5': 1})
+        self.assertEqual(self.graph.get_ancestors('P6', 0), {})
+        self.assertEqual(self.graph.get_ancestors('X'), {})
+
+    def test_descendants(self):
+        self.assertEqual(self.graph.get_descendants('P1'),
+                         {'P3': 1, 'P4': 1, 'P6': 2})
+        self.assertEqual(self.graph.get_descendants('P6'), {})
+
+    def test_common_ancestors(self):
+        self.assertEqual(sorted(self.graph.get_common_ancestors('P6', 'P4')),
+                         ['P1', 'P2'])
+        self.assertEqual(self.graph.get_common_ancestors('P6', 'P3'), ['P3'])
+        self.assertEqual(self.graph.get_common_ancestors('P6', 'P5'), ['P5'])
+
+    def test_relation_paths(self):
+        paths = self.graph.get_relation_paths('P4', ['P6'])
+        self.assertEqual(len(paths), 1)
+        self.assertEqual((paths[0][0], paths[0][-1]), ('P4', 'P6'))
+        self.assertEqual(self.graph.get_relation_paths('P4', ['P4']),
+                         [['P4']])
+
+    def test_update(self):
+        self.graph.set_person('P3', [], ['F2'])
+        self.assertEqual(self.graph.get_ancestors('P6'), {'P3': 1, 'P5': 1})
+        self.graph.remove_family('F2')
+        self.assertEqual(self.graph.get_ancestors('P6'), {})
+        self.assertEqual(self.graph.get_descendants('P3'), {})
+
+    def test_loop(self):
+        self.graph.set_family('F3', 'P6', None, ['P1'])
+        self.graph.set_person('P1', ['F3'], ['F1'])
+        self.assertEqual(self.graph.get_ancestors('P6'),
+                         {'P3': 1, 'P5': 1, 'P1': 2, 'P2': 2, 'P6': 3})
+
+    def test_deep(self):
+        count = 10000
+        for index in range(count):
+            self.graph.set_family('D%d' % index, 'Q%d' % index, None,
+                                  ['Q%d' % (index + 1)])
+            self.graph.set_person('Q%d' % (index + 1), ['D%d' % index], [])
+        ancestors = self.graph.get_ancestors('Q%d' % count)
+        self.assertEqual(ancestors['Q0'], count)
+
+class DepthFirstPathsTest(unittest.TestCase):
+    def test_paths(self):
+        links = {1: [2, 3], 2: [1, 4], 3: [1], 4: [2]}
+        visited = []
+        paths = depth_first_paths(1, links.get, [3, 4],
+                                  lambda: visited.append(1))
+        self.assertEqual(paths, [[1, 2, 4], [1, 3]])
+        self.assertEqual(len(visited), 4)
+        self.assertEqual(depth_first_paths(1, links.get, []), [])
+
+if __name__ == "__main__":
+    unittest.main()
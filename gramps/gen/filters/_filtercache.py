@@ -0,0 +1,180 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Cache of the results of filters.
+
+The handles matched by a filter are stored with the change count of the
+database. The results are used again as long as the database has not
+changed. If the rules of the filter only look at the object itself, the
+results are updated by checking the objects changed since, otherwise the
+filter is applied again.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import weakref
+from collections import OrderedDict
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..db.dbconst import CLASS_TO_KEY_MAP
+from .rules import Rule
+from .rules._matchesfilterbase import MatchesFilterBase
+
+# Number of filter results kept per database.
+CACHE_SIZE = 10
+
+#-------------------------------------------------------------------------
+#
+# Filter definitions
+#
+#-------------------------------------------------------------------------
+def get_definition(filt, seen=()):
+    """
+    Return a hashable description of the filter and its rules, including the
+    filters used by MatchesFilter rules.
+    """
+    rules = []
+    for rule in filt.flist:
+        nested = None
+        if isinstance(rule, MatchesFilterBase):
+            nested_filter = rule.find_filter()
+            if nested_filter is not None and id(nested_filter) not in seen:
+                nested = get_definition(nested_filter,
+                                        seen + (id(nested_filter),))
+        rules.append((rule.__class__, tuple(rule.list), rule.use_regex,
+                      nested))
+    return (filt.__class__, filt.logical_op, filt.invert, tuple(rules))
+
+def get_cache_scope(filt, seen=()):
+    """
+    Return the cache scope of the filter, the smallest cache scope of its
+    rules and of the filters used by MatchesFilter rules.
+    """
+    scope = Rule.CACHE_OBJECT
+    for rule in filt.flist:
+        scope = min(scope, rule.cache_scope)
+        if isinstance(rule, MatchesFilterBase):
+            nested_filter = rule.find_filter()
+            if nested_filter is None or id(nested_filter) in seen:
+                continue
+            scope = min(scope, Rule.CACHE_DATABASE,
+                        get_cache_scope(nested_filter,
+                                        seen + (id(nested_filter),)))
+    return scope
+
+#-------------------------------------------------------------------------
+#
+# FilterCache class
+#
+#-------------------------------------------------------------------------
+class _Entry:
+    """
+    Matched handles of a filter and the change count at which they are
+    valid.
+    """
+    __slots__ = ('count', 'handles')
+
+    def __init__(self, count, handles):
+        self.count = count
+        self.handles = handles
+
+
+class FilterCache:
+    """
+    Results of the filters applied to the open databases.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self.__size = size
+        self.__databases = weakref.WeakKeyDictionary()
+
+    def clear(self):
+        """
+        Remove all results.
+        """
+        self.__databases.clear()
+
+    def apply(self, filt, db, id_list=None, tupleind=None, user=None):
+        """
+        Return the result of :meth:`.GenericFilter.apply`, using the cached
+        results where possible, or None if the filter can not be cached.
+        """
+        count = db.get_change_count()
+        if count is None or filt.timings is not None:
+            return None
+        scope = get_cache_scope(filt)
+        if scope == Rule.CACHE_NONE:
+            return None
+        key = get_definition(filt)
+        try:
+            entries = self.__databases.setdefault(db, OrderedDict())
+            entry = entries.get(key)
+        except TypeError:
+            # The database or the values of a rule can not be used as keys
+            return None
+        if entry is not None and entry.count != count:
+            if not (scope == Rule.CACHE_OBJECT and
+                    self.__update(filt, db, entry, count)):
+                entry = None
+                del entries[key]
+        if entry is None:
+            # Only fill the cache when most objects are asked for
+            if (id_list is not None and
+                    2 * len(id_list) < filt.get_number(db)):
+                return None
+            entry = _Entry(count, dict.fromkeys(filt.evaluate(db,
+                                                              user=user)))
+            entries[key] = entry
+            while len(entries) > self.__size:
+                entries.popitem(last=False)
+        entries.move_to_end(key)
+
+        if id_list is None:
+            return list(entry.handles)
+        if tupleind is None:
+            return [handle for handle in id_list if handle in entry.handles]
+        return [data for data in id_list if data[tupleind] in entry.handles]
+
+    def __update(self, filt, db, entry, count):
+        """
+        Check the objects changed since the results were cached, and return
+        True if the results could be updated.
+        """
+        obj_key = CLASS_TO_KEY_MAP[filt.make_obj().__class__.__name__]
+        changed = db.get_changed_handles(entry.count, obj_key)
+        if changed is None:
+            return False
+        for handle in changed:
+            entry.handles.pop(handle, None)
+        existing = list(db.get_raw_data_many(obj_key, changed))
+        if existing:
+            entry.handles.update(dict.fromkeys(filt.evaluate(db, existing)))
+        entry.count = count
+        return True
+
+FILTER_CACHE = FilterCache()
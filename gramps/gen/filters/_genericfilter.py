@@ -24,6 +24,14 @@
 Package providing filtering framework for Gramps.
 """
 
+#------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#------------------------------------------------------------------------
+import time
+import logging
+
 #------------------------------------------------------------------------
 #
 # Gramps imports
@@ -39,9 +47,39 @@ from ..lib.repo import Repository
 from ..lib.media import Media
 from ..lib.note import Note
 from ..lib.tag import Tag
+from ..lib.lazy import LazyPerson, LazyFamily, LazyEvent, LazyPlace
+from ._parallel import apply_parallel
+from ._filtercache import FILTER_CACHE, get_cache_scope
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 
+LOG = logging.getLogger(".filter")
+
+#-------------------------------------------------------------------------
+#
+# _TimedRule
+#
+#-------------------------------------------------------------------------
+class _TimedRule:
+    """
+    Wrapper of a rule that records the number of calls, the number of
+    matches and the time spent in its apply method.
+    """
+    __slots__ = ('rule', 'stats')
+
+    def __init__(self, rule, stats):
+        self.rule = rule
+        self.stats = stats
+
+    def apply(self, db, obj):
+        start = time.perf_counter()
+        result = self.rule.apply(db, obj)
+        self.stats[3] += time.perf_counter() - start
+        self.stats[1] += 1
+        if result:
+            self.stats[2] += 1
+        return result
+
 #-------------------------------------------------------------------------
 #
 # GenericFilter
@@ -67,6 +105,11 @@ class GenericFilter:
             self.comment = ''
             self.logical_op = 'and'
             self.invert = False
+        self.nrprepare = 0
+        self.cache = None
+        self.timings = None
+        self._plan_key = None
+        self._plan = None
 
     def match(self, handle, db):
         """
@@ -127,21 +170,71 @@ class GenericFilter:
     def make_obj(self):
         return Person()
 
+    def make_lazy_obj(self):
+        """
+        Return an object for the cursor loops of the check methods. Where
+        available, the object only unserializes the fields used by the rules.
+        """
+        return LazyPerson()
+
     def find_from_handle(self, db, handle):
         return db.get_person_from_handle(handle)
 
     def get_number(self, db):
         return db.get_number_of_people()
 
+    def get_cache_scope(self):
+        """
+        Return the cache scope of the filter, the smallest cache scope of its
+        rules, see :class:`.Rule`. If it is CACHE_OBJECT, whether an object
+        matches only changes when the object changes.
+        """
+        return get_cache_scope(self)
+
+    def get_sql(self):
+        """
+        Return a SQL condition that holds for all objects matched by the filter
+        and its arguments, or None if the rules can not be expressed in SQL.
+        """
+        if self.invert or self.logical_op not in ('and', 'or'):
+            return None
+        conditions = []
+        args = []
+        for rule in self.flist:
+            sql = rule.get_sql()
+            if sql is None:
+                if self.logical_op == 'or':
+                    return None
+                continue
+            conditions.append('(%s)' % sql[0])
+            args.extend(sql[1])
+        if not conditions:
+            return None
+        return (' %s ' % self.logical_op.upper()).join(conditions), args
+
+    def get_filtered_cursor(self, db):
+        """
+        Return a cursor over the objects that may match the filter. If the
+        database supports it, the objects are selected by the SQL condition
+        of the rules, otherwise all objects are returned.
+        """
+        sql = self.get_sql()
+        if sql is not None:
+            class_name = self.make_obj().__class__.__name__
+            cursor = db.get_filtered_cursor(class_name, *sql)
+            if cursor is not None:
+                return cursor
+        return self.get_cursor(db)
+
     def check_func(self, db, id_list, task, user=None, tupleind=None):
         final_list = []
         if user:
             user.begin_progress(_('Filter'), _('Applying ...'),
                                 self.get_number(db))
         if id_list is None:
-            with self.get_cursor(db) as cursor:
+            with self.get_filtered_cursor(db) as cursor:
                 for handle, data in cursor:
-                    person = self.make_obj()
+                    person = self.make_lazy_obj()
                     person.unserialize(data)
                     if user:
                         user.step_progress()
@@ -162,20 +255,77 @@ class GenericFilter:
             user.end_progress()
         return final_list
 
+    def get_rule_order(self):
+        """
+        Return the rules in the order in which they are applied.
+
+        For 'and' filters the cheapest and most selective rules come first,
+        so that an object is rejected as soon as possible. For 'or' and 'one'
+        filters the cheapest rules that match the most objects come first.
+        The rules of 'xor' filters are all applied, so their order is kept.
+        """
+        if self.logical_op == 'and':
+            return sorted(self.flist,
+                          key=lambda rule: (rule.cost, rule.selectivity))
+        if self.logical_op in ('or', 'one'):
+            return sorted(self.flist,
+                          key=lambda rule: (rule.cost, -rule.selectivity))
+        return list(self.flist)
+
+    def get_rule_funcs(self):
+        """
+        Return the apply functions of the rules in the order in which they
+        are applied. The order is only computed again when the rules change.
+        """
+        key = (self.logical_op, tuple(self.flist), self.timings is not None)
+        if key != self._plan_key:
+            self._plan = self.get_rule_order()
+            if self.timings is not None:
+                self._plan = [self._timed_rule(rule) for rule in self._plan]
+            self._plan_key = key
+        # Some rules replace their apply method when they are prepared.
+        return [rule.apply for rule in self._plan]
+
+    def _timed_rule(self, rule):
+        """
+        Return an object with an apply method that calls the apply method of
+        the rule and records its timing.
+        """
+        return _TimedRule(rule, self.timings.setdefault(id(rule),
+                                                        [rule, 0, 0, 0.0]))
+
+    def set_timings(self, enable):
+        """
+        Enable or disable recording the number of calls, the number of
+        matches and the time spent in each rule.
+        """
+        self.timings = {} if enable else None
+        self._plan_key = None
+
+    def get_timings(self):
+        """
+        Return a list of (rule, calls, matches, seconds) tuples, slowest rule
+        first. The list is empty if timings are not enabled.
+        """
+        if self.timings is None:
+            return []
+        return sorted((tuple(stats) for stats in self.timings.values()),
+                      key=lambda stats: stats[3], reverse=True)
+
     def check_and(self, db, id_list, user=None, tupleind=None):
         final_list = []
-        flist = self.flist
+        funcs = self.get_rule_funcs()
         if user:
             user.begin_progress(_('Filter'), _('Applying ...'),
                                 self.get_number(db))
         if id_list is None:
-            with self.get_cursor(db) as cursor:
+            with self.get_filtered_cursor(db) as cursor:
                 for handle, data in cursor:
-                    person = self.make_obj()
+                    person = self.make_lazy_obj()
                     person.unserialize(data)
                     if user:
                         user.step_progress()
-                    val = all(rule.apply(db, person) for rule in flist)
+                    val = all(func(db, person) for func in funcs)
                     if val != self.invert:
                         final_list.append(handle)
         else:
@@ -187,7 +337,7 @@ class GenericFilter:
                 person = self.find_from_handle(db, handle)
                 if user:
                     user.step_progress()
-                val = all(rule.apply(db, person) for rule in flist if person)
+                val = all(func(db, person) for func in funcs if person)
                 if val != self.invert:
                     final_list.append(data)
         if user:
@@ -203,23 +353,26 @@ class GenericFilter:
     def check_xor(self, db, id_list, user=None, tupleind=None):
         return self.check_func(db, id_list, self.xor_test, user, tupleind)
 
+    def and_test(self, db, person):
+        return all(func(db, person) for func in self.get_rule_funcs())
+
     def xor_test(self, db, person):
         test = False
-        for rule in self.flist:
-            test = test ^ rule.apply(db, person)
+        for func in self.get_rule_funcs():
+            test = test ^ func(db, person)
         return test
 
     def one_test(self, db, person):
         found_one = False
-        for rule in self.flist:
-            if rule.apply(db, person):
+        for func in self.get_rule_funcs():
+            if func(db, person):
                 if found_one:
                     return False    # There can be only one!
                 found_one = True
         return found_one
 
     def or_test(self, db, person):
-        return any(rule.apply(db, person) for rule in self.flist)
+        return any(func(db, person) for func in self.get_rule_funcs())
 
     def get_check_func(self):
         try:
@@ -228,8 +381,59 @@ class GenericFilter:
             m = self.check_and
         return m
 
+    def get_test_func(self):
+        try:
+            m = getattr(self, self.logical_op + '_test')
+        except AttributeError:
+            m = self.and_test
+        return m
+
     def check(self, db, handle):
-        return self.get_check_func()(db, [handle])
+        """
+        Return a list with the handle if the object matches the filter, or an
+        empty list. While the filter is prepared, the results are cached.
+        """
+        if self.cache is None:
+            return self.get_check_func()(db, [handle])
+        if handle not in self.cache:
+            self.cache[handle] = bool(self.get_check_func()(db, [handle]))
+        return [handle] if self.cache[handle] else []
+
+    def check_obj(self, db, obj):
+        """
+        Return True if the loaded object matches the filter. While the filter
+        is prepared, the results are cached.
+        """
+        if self.cache is not None and obj.handle in self.cache:
+            return self.cache[obj.handle]
+        result = self.get_test_func()(db, obj) != self.invert
+        if self.cache is not None:
+            self.cache[obj.handle] = result
+        return result
+
+    def requestprepare(self, db, user):
+        """
+        Request that the rules are prepared, for a filter that is used by
+        other filters. Only the first request prepares the rules and starts
+        caching the results of :meth:`check` and :meth:`check_obj`.
+        """
+        if self.nrprepare == 0:
+            for rule in self.flist:
+                rule.requestprepare(db, user)
+            self.cache = {}
+        self.nrprepare += 1
+
+    def requestreset(self):
+        """
+        Request that the rules are reset. Only the last request resets the
+        rules and clears the cache.
+        """
+        if self.nrprepare == 1:
+            for rule in self.flist:
+                rule.requestreset()
+            self.cache = None
+        if self.nrprepare > 0:
+            self.nrprepare -= 1
 
     def apply(self, db, id_list=None, tupleind=None, user=None):
         """
@@ -243,17 +447,39 @@ class GenericFilter:
 
         user is optional. If present it must be an instance of a User class.
 
+        The results are cached until the database changes. If the rules
+        only look at the object itself, only the changed objects are checked
+        again.
+
         :Returns: if id_list given, it is returned with the items that
                 do not match the filter, filtered out.
                 if id_list not given, all items in the database that
                 match the filter are returned as a list of handles
         """
+        res = FILTER_CACHE.apply(self, db, id_list, tupleind, user)
+        if res is None:
+            res = self.evaluate(db, id_list, tupleind, user)
+        return res
+
+    def evaluate(self, db, id_list=None, tupleind=None, user=None):
+        """
+        Apply the filter like :meth:`apply`, without using the cached
+        results.
+
+        If the database.filter-workers option is set, large databases are
+        filtered in that many worker processes where possible.
+        """
         m = self.get_check_func()
         for rule in self.flist:
             rule.requestprepare(db, user)
-        res = m(db, id_list, user, tupleind)
+        res = apply_parallel(self, db, id_list, tupleind, user)
+        if res is None:
+            res = m(db, id_list, user, tupleind)
         for rule in self.flist:
             rule.requestreset()
+        for rule, calls, matches, seconds in self.get_timings():
+            LOG.debug("%s: %d calls, %d matches, %.3f s",
+                      rule.__class__.__name__, calls, matches, seconds)
         return res
 
 class GenericFamilyFilter(GenericFilter):
@@ -267,6 +493,9 @@ class GenericFamilyFilter(GenericFilter):
     def make_obj(self):
         return Family()
 
+    def make_lazy_obj(self):
+        return LazyFamily()
+
     def find_from_handle(self, db, handle):
         return db.get_family_from_handle(handle)
 
@@ -284,6 +513,9 @@ class GenericEventFilter(GenericFilter):
     def make_obj(self):
         return Event()
 
+    def make_lazy_obj(self):
+        return LazyEvent()
+
     def find_from_handle(self, db, handle):
         return db.get_event_from_handle(handle)
 
@@ -301,6 +533,9 @@ class GenericSourceFilter(GenericFilter):
     def make_obj(self):
         return Source()
 
+    def make_lazy_obj(self):
+        return Source()
+
     def find_from_handle(self, db, handle):
         return db.get_source_from_handle(handle)
 
@@ -318,6 +553,9 @@ class GenericCitationFilter(GenericFilter):
     def make_obj(self):
         return Citation()
 
+    def make_lazy_obj(self):
+        return Citation()
+
     def find_from_handle(self, db, handle):
         return db.get_citation_from_handle(handle)
 
@@ -335,6 +573,9 @@ class GenericPlaceFilter(GenericFilter):
     def make_obj(self):
         return Place()
 
+    def make_lazy_obj(self):
+        return LazyPlace()
+
     def find_from_handle(self, db, handle):
         return db.get_place_from_handle(handle)
 
@@ -352,6 +593,9 @@ class GenericMediaFilter(GenericFilter):
     def make_obj(self):
         return Media()
 
+    def make_lazy_obj(self):
+        return Media()
+
     def find_from_handle(self, db, handle):
         return db.get_media_from_handle(handle)
 
@@ -369,6 +613,9 @@ class GenericRepoFilter(GenericFilter):
     def make_obj(self):
         return Repository()
 
+    def make_lazy_obj(self):
+        return Repository()
+
     def find_from_handle(self, db, handle):
         return db.get_repository_from_handle(handle)
 
@@ -386,6 +633,9 @@ class GenericNoteFilter(GenericFilter):
     def make_obj(self):
         return Note()
 
+    def make_lazy_obj(self):
+        return Note()
+
     def find_from_handle(self, db, handle):
         return db.get_note_from_handle(handle)
 
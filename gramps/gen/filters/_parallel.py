@@ -0,0 +1,220 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Evaluation of filters in worker processes.
+
+The rules of the filter are prepared in the main process. The prepared
+filter is then pickled and sent to worker processes, which open the same
+database read-only and each check a part of the handles. References to the
+database in the state of the rules are replaced by the database of the
+worker.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import io
+import os
+import sys
+import pickle
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+import gramps.gen.filters
+from ..config import config
+from ..db.dbconst import DBMODE_R
+from ..const import GRAMPS_LOCALE as glocale
+_ = glocale.translation.gettext
+
+LOG = logging.getLogger(".filter")
+
+# Smallest number of objects for which worker processes are started.
+MIN_OBJECTS = 5000
+
+# Number of handles checked by a worker at a time.
+CHUNK_SIZE = 1000
+
+# The initializer and mp_context of ProcessPoolExecutor need Python 3.7.
+MIN_PYTHON_VERSION = (3, 7)
+
+_DB_ID = 'db'
+
+# State of a worker process.
+_WORKER = {}
+
+#-------------------------------------------------------------------------
+#
+# Pickling
+#
+#-------------------------------------------------------------------------
+class _Pickler(pickle.Pickler):
+    """
+    Pickler that stores a reference in place of the database.
+    """
+    def __init__(self, file, db):
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self.db = db
+
+    def persistent_id(self, obj):
+        if obj is self.db:
+            return _DB_ID
+        return None
+
+class _Unpickler(pickle.Unpickler):
+    """
+    Unpickler that replaces the reference to the database by another one.
+    """
+    def __init__(self, file, db):
+        pickle.Unpickler.__init__(self, file)
+        self.db = db
+
+    def persistent_load(self, pid):
+        if pid == _DB_ID:
+            return self.db
+        raise pickle.UnpicklingError("Unknown persistent id %s" % pid)
+
+#-------------------------------------------------------------------------
+#
+# Worker functions
+#
+#-------------------------------------------------------------------------
+def _init_worker(backend, directory, state):
+    """
+    Open the database read-only and load the prepared filter.
+    """
+    from ..db.utils import make_database
+    database = make_database(backend)
+    database.load(directory, mode=DBMODE_R, update=False)
+    filt, custom_filters = _Unpickler(io.BytesIO(state), database).load()
+    # The MatchesFilter rules look up their prepared filter by name.
+    gramps.gen.filters.CustomFilters = custom_filters
+    _WORKER['db'] = database
+    _WORKER['filter'] = filt
+
+def _check_chunk(handles):
+    """
+    Return the handles of a chunk that match the filter.
+    """
+    filt = _WORKER['filter']
+    return filt.get_check_func()(_WORKER['db'], handles)
+
+#-------------------------------------------------------------------------
+#
+# apply_parallel
+#
+#-------------------------------------------------------------------------
+def _get_backend(db):
+    """
+    Return the id of the database plugin of the database, or None.
+    """
+    from ..plug import BasePluginManager
+    pmgr = BasePluginManager.get_instance()
+    for pdata in pmgr.get_reg_databases():
+        if pdata.databaseclass == db.__class__.__name__:
+            return pdata.id
+    return None
+
+def can_apply_parallel(filt, db):
+    """
+    Return True if the filter can be applied to the database in worker
+    processes: parallel filtering is enabled, the version of Python supports
+    it, the database is a committed DB-API database on disk and the timings
+    of the rules are not recorded.
+    """
+    from ..db.generic import DbGeneric
+    if config.get('database.filter-workers') < 2:
+        return False
+    if sys.version_info < MIN_PYTHON_VERSION:
+        return False
+    if not isinstance(db, DbGeneric) or db.transaction is not None:
+        return False
+    directory = db.get_save_path()
+    if not directory or not os.path.isdir(directory):
+        return False
+    return filt.timings is None and _get_backend(db) is not None
+
+def apply_parallel(filt, db, id_list=None, tupleind=None, user=None):
+    """
+    Apply a filter whose rules are prepared, in worker processes.
+
+    The arguments and the result are the same as for
+    :meth:`.GenericFilter.apply`, except that None is returned if the filter
+    can not be applied in parallel, in which case the caller applies it
+    itself. If id_list is not given, the handles are returned in the order
+    of the handle list of the database.
+    """
+    if not can_apply_parallel(filt, db):
+        return None
+    if id_list is None:
+        class_name = filt.make_obj().__class__.__name__
+        items = handles = list(getattr(db, 'get_%s_handles'
+                                       % class_name.lower())())
+    else:
+        items = id_list
+        if tupleind is None:
+            handles = list(id_list)
+        else:
+            handles = [data[tupleind] for data in id_list]
+    if len(handles) < MIN_OBJECTS:
+        return None
+
+    state = io.BytesIO()
+    try:
+        _Pickler(state, db).dump((filt, gramps.gen.filters.CustomFilters))
+    except (pickle.PicklingError, TypeError, AttributeError) as msg:
+        LOG.debug("Filter %s can not be applied in parallel: %s",
+                  filt.get_name(), msg)
+        return None
+
+    chunks = [handles[index:index + CHUNK_SIZE]
+              for index in range(0, len(handles), CHUNK_SIZE)]
+    workers = min(config.get('database.filter-workers'), len(chunks))
+    context = multiprocessing.get_context('spawn')
+    if user:
+        user.begin_progress(_('Filter'), _('Applying ...'), len(chunks))
+    matched = set()
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(_get_backend(db),
+                                           db.get_save_path(),
+                                           state.getvalue())) as executor:
+            for result in executor.map(_check_chunk, chunks):
+                matched.update(result)
+                if user:
+                    user.step_progress()
+    except (BrokenProcessPool, OSError) as msg:
+        LOG.warning("Parallel filter failed, applying it in one process: %s",
+                    msg)
+        return None
+    finally:
+        if user:
+            user.end_progress()
+    return [data for data, handle in zip(items, handles) if handle in matched]
@@ -54,6 +54,8 @@ class ChangedSinceBase(Rule):
                     "date/time (yyyy-mm-dd hh:mm:ss) or in range, if a second " \
                     "date/time is given."
     category    = _('General filters')
+    cost        = Rule.COST_LOW
+    cache_scope = Rule.CACHE_OBJECT
 
     def add_time(self, date):
         if re.search("\d.*\s+\d{1,2}:\d{2}:\d{2}", date):
@@ -104,3 +106,12 @@ class ChangedSinceBase(Rule):
         if self.before:
             return obj_time < self.before
         return False
+
+    def get_sql(self):
+        if self.since and self.before:
+            return ('change >= ? AND change < ?', [self.since, self.before])
+        if self.since:
+            return ('change >= ?', [self.since])
+        if self.before:
+            return ('change < ?', [self.before])
+        return ('1 = 0', [])
@@ -44,6 +44,9 @@ class Everything(Rule):
     name        = 'Every object'
     category    = _('General filters')
     description = 'Matches every object in the database'
+    cost        = Rule.COST_LOW
+    selectivity = 1.0
+    cache_scope = Rule.CACHE_OBJECT
 
     def is_empty(self):
         return True
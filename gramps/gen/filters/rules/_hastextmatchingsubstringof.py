@@ -46,6 +46,7 @@ class HasTextMatchingSubstringOf(Rule):
     description = "Matches objects whose records contain text " \
                    "matching a substring"
     category    = _('General filters')
+    cost        = Rule.COST_HIGH
 
     # FIXME: This needs to be written for an arbitrary object
     # if possible
@@ -40,6 +40,9 @@ class IsPrivate(Rule):
     name        = 'Objects marked private'
     description = "Matches objects that are indicated as private"
     category    = _('General filters')
+    cost        = Rule.COST_LOW
+    selectivity = 0.1
+    cache_scope = Rule.CACHE_OBJECT
 
     def apply(self, db, obj):
         return obj.get_privacy()
@@ -37,6 +37,9 @@ class IsPublic(Rule):
     name        = 'Objects not marked private'
     description = "Matches objects that are not indicated as private"
     category    = _('General filters')
+    cost        = Rule.COST_LOW
+    selectivity = 0.9
+    cache_scope = Rule.CACHE_OBJECT
 
     def apply(self, db, obj):
         return not obj.get_privacy()
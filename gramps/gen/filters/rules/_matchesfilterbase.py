@@ -55,14 +55,14 @@ class MatchesFilterBase(Rule):
     name        = 'Objects matching the <filter>'
     description = "Matches objects matched by the specified filter name"
     category    = _('General filters')
+    cost        = Rule.COST_HIGH
 
     def prepare(self, db, user):
         if gramps.gen.filters.CustomFilters:
             filters = gramps.gen.filters.CustomFilters.get_filters_dict(self.namespace)
             if self.list[0] in filters:
                 filt = filters[self.list[0]]
-                for rule in filt.flist:
-                    rule.requestprepare(db, user)
+                filt.requestprepare(db, user)
             else:
                 LOG.warning(_("Can't find filter %s in the defined custom filters")
                                     % self.list[0])
@@ -75,15 +75,14 @@ class MatchesFilterBase(Rule):
             filters = gramps.gen.filters.CustomFilters.get_filters_dict(self.namespace)
             if self.list[0] in filters:
                 filt = filters[self.list[0]]
-                for rule in filt.flist:
-                    rule.requestreset()
+                filt.requestreset()
 
     def apply(self, db, obj):
         if gramps.gen.filters.CustomFilters:
             filters = gramps.gen.filters.CustomFilters.get_filters_dict(self.namespace)
             if self.list[0] in filters:
                 filt = filters[self.list[0]]
-                return filt.check(db, obj.handle)
+                return filt.check_obj(db, obj)
         return False
 
     def find_filter(self):
@@ -51,6 +51,33 @@ class RegExpIdBase(Rule):
                    "or matches a regular expression"
     category    = _('General filters')
     allow_regex = True
+    cost        = Rule.COST_LOW
+    selectivity = 0.1
+    cache_scope = Rule.CACHE_OBJECT
 
     def apply(self, db, obj):
         return self.match_substring(0, obj.gramps_id)
+
+    def get_sql(self):
+        """
+        Return a SQL condition for substring matches. Regular expressions
+        and text that is not ASCII are matched in Python only, since their
+        behaviour differs between Python and the SQL databases.
+        """
+        text = self.list[0]
+        if self.use_regex or not text or not _is_ascii(text):
+            return None
+        pattern = text.upper()
+        for char in '!%_':
+            pattern = pattern.replace(char, '!' + char)
+        return ("UPPER(gramps_id) LIKE ? ESCAPE '!'", ['%' + pattern + '%'])
+
+def _is_ascii(text):
+    """
+    Return True if the text only contains ASCII characters.
+    """
+    try:
+        text.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    return True
@@ -46,13 +46,39 @@ LOG = logging.getLogger(".")
 #
 #-------------------------------------------------------------------------
 class Rule:
-    """Base rule class."""
+    """
+    Base rule class.
+
+    The cost and selectivity of a rule are hints used by the filters to
+    decide in which order the rules are applied. The cost is the relative
+    cost of applying the rule to one object: COST_LOW for rules that only
+    look at a few fields of the object, COST_HIGH for rules that read other
+    objects or scan all text. The selectivity is the fraction of the objects
+    that the rule is expected to match.
+
+    The cache scope tells how long the results of the rule may be cached:
+    CACHE_OBJECT if the result only depends on the object itself, so that
+    it only changes when the object changes, CACHE_DATABASE if it depends
+    on other objects in the database, and CACHE_NONE if it depends on
+    anything else, such as the bookmarks or the current date.
+    """
+
+    COST_LOW = 1
+    COST_MEDIUM = 2
+    COST_HIGH = 3
+
+    CACHE_NONE = 0
+    CACHE_DATABASE = 1
+    CACHE_OBJECT = 2
 
     labels      = []
     name        = ''
     category    = _('Miscellaneous filters')
     description = _('No description')
     allow_regex = False
+    cost        = COST_MEDIUM
+    selectivity = 0.5
+    cache_scope = CACHE_DATABASE
 
     def __init__(self, arg, use_regex=False):
         self.list = []
@@ -62,6 +88,23 @@ class Rule:
         self.use_regex = use_regex
         self.nrprepare = 0
 
+    def __getstate__(self):
+        """
+        Return the state of the rule for pickling. The private bound method
+        used to match substrings can not be pickled, so only which of the
+        match methods is used is stored.
+        """
+        state = self.__dict__.copy()
+        state['match_substring'] = self.match_substring == self.match_regex
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if state['match_substring']:
+            self.match_substring = self.match_regex
+        else:
+            self.match_substring = self.__match_substring
+
     def is_empty(self):
         return False
 
@@ -133,6 +176,18 @@ class Rule:
         """Apply the rule to some database entry; must be overwritten."""
         return True
 
+    def get_sql(self):
+        """
+        Return a SQL condition that holds for all objects matched by the rule
+        and its arguments, or None if the rule can not be expressed in SQL.
+
+        The condition may also hold for objects that the rule does not match,
+        since the rule is still applied to the objects selected by it. It is
+        used on the columns of the table of the filtered objects, with "?" as
+        the placeholder for the arguments, and is only called after prepare.
+        """
+        return None
+
     def display_values(self):
         """Return the labels and values of this rule."""
         l_v = ( '%s="%s"' % (_(self.labels[ix]), self.list[ix])
@@ -54,3 +54,7 @@ class HasSourceIdOf(HasGrampsId):
         if HasGrampsId.apply(self, dbase, source):
             return True
         return False
+
+    def get_sql(self):
+        # The ID belongs to the source of the citation.
+        return None
@@ -56,3 +56,7 @@ class RegExpSourceIdOf(RegExpIdBase):
         if RegExpIdBase.apply(self, dbase, source):
             return True
         return False
+
+    def get_sql(self):
+        # The ID belongs to the source of the citation.
+        return None
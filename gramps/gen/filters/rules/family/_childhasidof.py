@@ -32,7 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import RegExpIdBase
-from ._memberbase import child_base
+from ._memberbase import child_base, no_sql
 
 #-------------------------------------------------------------------------
 #
@@ -49,3 +49,4 @@ class ChildHasIdOf(RegExpIdBase):
     category    = _('Child filters')
     base_class = RegExpIdBase
     apply = child_base
+    get_sql = no_sql
@@ -32,7 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import RegExpIdBase
-from ._memberbase import father_base
+from ._memberbase import father_base, no_sql
 
 #-------------------------------------------------------------------------
 #
@@ -49,3 +49,4 @@ class FatherHasIdOf(RegExpIdBase):
     category    = _('Father filters')
     base_class = RegExpIdBase
     apply = father_base
+    get_sql = no_sql
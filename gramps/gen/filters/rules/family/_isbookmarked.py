@@ -43,6 +43,7 @@ class IsBookmarked(Rule):
 
     name        = _('Bookmarked families')
     category    = _('General filters')
+    cache_scope = Rule.CACHE_NONE
     description = _("Matches the families on the bookmark list")
 
     def prepare(self, db, user):
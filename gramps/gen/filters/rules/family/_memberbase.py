@@ -25,10 +25,13 @@ Any rule that matches family based on personal rule applied
 to father, mother, or any child, just needs to do two things:
 > Set the class attribute 'base_class' to the personal rule
 > Set apply method to be an appropriate wrapper below
+> Set get_sql method to no_sql, as the SQL of the personal rule does
+  not apply to families
 Example:
 in the class body, outside any method:
 >    base_class = SearchName
 >    apply = child_base
+>    get_sql = no_sql
 """
 
 def father_base(self, db, family):
@@ -55,3 +58,6 @@ def child_base(self, db, family):
         if self.base_class.apply(self, db, child):
             return True
     return False
+
+def no_sql(self):
+    return None
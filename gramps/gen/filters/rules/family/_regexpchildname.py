@@ -32,7 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from ..person import RegExpName
-from ._memberbase import child_base
+from ._memberbase import child_base, no_sql
 
 #-------------------------------------------------------------------------
 #
@@ -48,3 +48,4 @@ class RegExpChildName(RegExpName):
     category    = _('Child filters')
     base_class = RegExpName
     apply = child_base
+    get_sql = no_sql
@@ -32,7 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from ..person import RegExpName
-from ._memberbase import mother_base
+from ._memberbase import mother_base, no_sql
 
 #-------------------------------------------------------------------------
 #
@@ -48,3 +48,4 @@ class RegExpMotherName(RegExpName):
     category    = _('Mother filters')
     base_class = RegExpName
     apply = mother_base
+    get_sql = no_sql
@@ -32,7 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from ..person import SearchName
-from ._memberbase import child_base
+from ._memberbase import child_base, no_sql
 
 #-------------------------------------------------------------------------
 #
@@ -48,3 +48,4 @@ class SearchChildName(SearchName):
     category    = _('Child filters')
     base_class = SearchName
     apply = child_base
+    get_sql = no_sql
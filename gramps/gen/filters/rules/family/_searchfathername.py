@@ -32,7 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from ..person import SearchName
-from ._memberbase import father_base
+from ._memberbase import father_base, no_sql
 
 #-------------------------------------------------------------------------
 #
@@ -48,3 +48,4 @@ class SearchFatherName(SearchName):
     category    = _('Father filters')
     base_class = SearchName
     apply = father_base
+    get_sql = no_sql
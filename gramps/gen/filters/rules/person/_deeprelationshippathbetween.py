@@ -65,64 +65,6 @@ def filter_database(db, user, filter_name):
 
     return matches
 
-def get_family_handle_people(db, exclude_handle, family_handle):
-    people = set()
-
-    family = db.get_family_from_handle(family_handle)
-
-    def possibly_add_handle(h):
-        if h != None and h != exclude_handle:
-            people.add(h)
-
-    possibly_add_handle(family.get_father_handle())
-    possibly_add_handle(family.get_mother_handle())
-
-    for child_ref in family.get_child_ref_list():
-        if child_ref:
-            possibly_add_handle(child_ref.get_reference_handle())
-
-    return people
-
-def get_person_family_people(db, person, person_handle):
-    people = set()
-
-    def add_family_handle_list(list):
-        for family_handle in list:
-            people.update(get_family_handle_people(db, person_handle, family_handle))
-
-    add_family_handle_list(person.get_family_handle_list())
-    add_family_handle_list(person.get_parent_family_handle_list())
-
-    return people
-
-def find_deep_relations(db, user, person, path, seen, target_people):
-    if len(target_people) < 1:
-        return []
-
-    if person is None:
-        return []
-
-    handle = person.get_handle()
-    if handle in seen:
-        return []
-    seen.append(handle)
-    if user:
-        user.step_progress()
-
-    return_paths = []
-    person_path = path + [handle]
-
-    if handle in target_people:
-        return_paths += [person_path]
-        target_people.remove(handle)
-
-    family_people = get_person_family_people(db, person, handle)
-    for family_person in family_people:
-        pers = db.get_person_from_handle(family_person)
-        return_paths += find_deep_relations(db, user, pers, person_path, seen, target_people)
-
-    return return_paths
-
 class DeepRelationshipPathBetween(Rule):
     """Checks if there is any familial connection between a person and a
        filter match by searching over all connections."""
@@ -147,7 +89,12 @@ class DeepRelationshipPathBetween(Rule):
             user.begin_progress(_('Finding relationship paths'),
                                 _('Evaluating people'),
                                 db.get_number_of_people())
-        paths = find_deep_relations(db, user, root_person, [], [], target_people)
+        if root_person is None:
+            paths = []
+        else:
+            paths = db.get_relation_paths(
+                root_person.get_handle(), target_people,
+                user.step_progress if user else None)
         if user:
             user.end_progress()
 
@@ -44,6 +44,9 @@ class Everyone(Rule):
     name        = _('Everyone')
     category    = _('General filters')
     description = _('Matches everyone in the database')
+    cost        = Rule.COST_LOW
+    selectivity = 1.0
+    cache_scope = Rule.CACHE_OBJECT
 
     def is_empty(self):
         return True
@@ -50,6 +50,7 @@ class HasTextMatchingSubstringOf(Rule):
                     "matching a substring")
     category    = _('General filters')
     allow_regex = True
+    cost        = Rule.COST_HIGH
 
     def prepare(self, db, user):
         self.db = db
@@ -45,6 +45,9 @@ class HasUnknownGender(Rule):
     name        = _('People with unknown gender')
     category    = _('General filters')
     description = _('Matches all people with unknown gender')
+    cost        = Rule.COST_LOW
+    selectivity = 0.05
+    cache_scope = Rule.CACHE_OBJECT
 
     def apply(self,db,person):
         return person.gender == Person.UNKNOWN
@@ -45,6 +45,9 @@ class IsBookmarked(Rule):
     name        = _('Bookmarked people')
     category    = _('General filters')
     description = _("Matches the people on the bookmark list")
+    cost        = Rule.COST_LOW
+    selectivity = 0.01
+    cache_scope = Rule.CACHE_NONE
 
     def prepare(self, db, user):
         self.bookmarks = db.get_bookmarks().get()
@@ -44,6 +44,9 @@ class IsDefaultPerson(Rule):
     name        = _('Default person')
     category    = _('General filters')
     description = _("Matches the default person")
+    cost        = Rule.COST_LOW
+    selectivity = 0.0
+    cache_scope = Rule.CACHE_NONE
 
     def prepare(self, db, user):
         p = db.get_default_person()
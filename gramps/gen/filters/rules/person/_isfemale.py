@@ -45,6 +45,11 @@ class IsFemale(Rule):
     name        = _('Females')
     category    = _('General filters')
     description = _('Matches all females')
+    cost        = Rule.COST_LOW
+    cache_scope = Rule.CACHE_OBJECT
 
     def apply(self,db,person):
         return person.gender == Person.FEMALE
+
+    def get_sql(self):
+        return ('gender = ?', [Person.FEMALE])
@@ -58,24 +58,10 @@ class IsLessThanNthGenerationAncestorOf(Rule):
                 self.init_ancestor_list(root_handle)
 
     def init_ancestor_list(self, root_handle):
-        queue = [(root_handle, 1)] # generation 1 is root
-        while queue:
-            handle, gen = queue.pop(0) # pop off front of queue
-            self.map.add(handle)
-            gen += 1
-            if gen <= int(self.list[1]):
-                p = self.db.get_person_from_handle(handle)
-                fam_id = p.get_main_parents_family_handle()
-                if fam_id:
-                    fam = self.db.get_family_from_handle(fam_id)
-                    if fam:
-                        f_id = fam.get_father_handle()
-                        m_id = fam.get_mother_handle()
-                        # append to back of queue:
-                        if f_id:
-                            queue.append((f_id, gen))
-                        if m_id:
-                            queue.append((m_id, gen))
+        # generation 1 is root
+        self.map.add(root_handle)
+        self.map.update(self.db.get_ancestor_handles(root_handle,
+                                                     int(self.list[1]) - 1))
 
     def reset(self):
         self.map.clear()
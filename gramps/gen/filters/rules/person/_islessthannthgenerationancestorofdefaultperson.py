@@ -47,6 +47,7 @@ class IsLessThanNthGenerationAncestorOfDefaultPerson(Rule):
     name        = _('Ancestors of the default person '
                     'not more than <N> generations away')
     category    = _('Ancestral filters')
+    cache_scope = Rule.CACHE_NONE
     description = _("Matches ancestors of the default person "
                     "not more than N generations away")
 
@@ -62,26 +63,11 @@ class IsLessThanNthGenerationAncestorOfDefaultPerson(Rule):
             self.apply = lambda db,p: False
 
     def init_ancestor_list(self, handle, gen):
-#        if p.get_handle() in self.map:
-#            loop_error(self.orig,p)
         if not handle:
             return
-        if gen:
-            self.map.add(handle)
-            if gen >= int(self.list[0]):
-                return
-
-        p = self.db.get_person_from_handle(handle)
-        fam_id = p.get_main_parents_family_handle()
-        fam = self.db.get_family_from_handle(fam_id)
-        if fam:
-            f_id = fam.get_father_handle()
-            m_id = fam.get_mother_handle()
-
-            if f_id:
-                self.init_ancestor_list(f_id, gen+1)
-            if m_id:
-                self.init_ancestor_list(m_id, gen+1)
+        self.map.add(handle)
+        self.map.update(self.db.get_ancestor_handles(
+            handle, int(self.list[0]) - gen))
 
     def apply_real(self,db,person):
         return person.handle in self.map
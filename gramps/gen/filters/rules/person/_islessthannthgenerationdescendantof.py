@@ -67,14 +67,6 @@ class IsLessThanNthGenerationDescendantOf(Rule):
     def init_list(self,person,gen):
         if not person:
             return
-        if gen:
-            self.map.add(person.handle)
-            if gen >= int(self.list[1]):
-                return
-
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(
-                        self.db.get_person_from_handle(child_ref.ref), gen+1)
+        # the children are always included
+        self.map.update(self.db.get_descendant_handles(
+            person.handle, max(int(self.list[1]) - gen, 1)))
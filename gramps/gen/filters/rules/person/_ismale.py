@@ -45,6 +45,11 @@ class IsMale(Rule):
     name        = _('Males')
     category    = _('General filters')
     description = _('Matches all males')
+    cost        = Rule.COST_LOW
+    cache_scope = Rule.CACHE_OBJECT
 
     def apply(self,db,person):
         return person.gender == Person.MALE
+
+    def get_sql(self):
+        return ('gender = ?', [Person.MALE])
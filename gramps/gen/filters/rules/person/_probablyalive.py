@@ -45,6 +45,8 @@ class ProbablyAlive(Rule):
     name        =  _('People probably alive')
     description = _("Matches people without indications of death that are not too old")
     category    = _('General filters')
+    cost        = Rule.COST_HIGH
+    cache_scope = Rule.CACHE_NONE
 
     def prepare(self, db, user):
         try:
@@ -62,59 +62,19 @@ class RelationshipPathBetween(Rule):
     def reset(self):
         self.map = ()
 
-    def desc_list(self, handle, map, first):
-        if not first:
-            map.add(handle)
-
-        p = self.db.get_person_from_handle(handle)
-        for fam_id in p.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    if child_ref.ref:
-                        self.desc_list(child_ref.ref, map, 0)
-
-    def apply_filter(self, rank, handle, plist, pmap):
-        person = self.db.get_person_from_handle(handle)
-        if person is None:
-            return
-        plist.add(handle)
-        pmap[person.get_handle()] = rank
-
-        fam_id = person.get_main_parents_family_handle()
-        family = self.db.get_family_from_handle(fam_id)
-        if family is not None:
-            self.apply_filter(rank+1, family.get_father_handle(), plist, pmap)
-            self.apply_filter(rank+1, family.get_mother_handle(), plist, pmap)
-
     def apply(self, db, person):
         return person.handle in self.map
 
     def init_list(self, p1_handle, p2_handle):
-        firstMap = {}
-        firstList = set()
-        secondMap = {}
-        secondList = set()
-        common = []
-        rank = 9999999
-
-        self.apply_filter(0, p1_handle, firstList, firstMap)
-        self.apply_filter(0, p2_handle ,secondList, secondMap)
-
-        for person_handle in firstList & secondList:
-            new_rank = firstMap[person_handle]
-            if new_rank < rank:
-                rank = new_rank
-                common = [person_handle]
-            elif new_rank == rank:
-                common.append(person_handle)
+        firstMap = self.db.get_ancestor_handles(p1_handle)
+        secondMap = self.db.get_ancestor_handles(p2_handle)
+        common = self.db.get_common_ancestor_handles(p1_handle, p2_handle)
 
         path1 = set([p1_handle])
         path2 = set([p2_handle])
 
         for person_handle in common:
-            new_map = set()
-            self.desc_list(person_handle, new_map, 1)
-            path1.update(new_map.intersection(firstMap))
-            path2.update(new_map.intersection(secondMap))
+            new_map = self.db.get_descendant_handles(person_handle)
+            path1.update(new_map.keys() & firstMap.keys())
+            path2.update(new_map.keys() & secondMap.keys())
         self.map.update(path1, path2, common)
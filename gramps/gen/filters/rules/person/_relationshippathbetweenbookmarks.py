@@ -50,6 +50,7 @@ class RelationshipPathBetweenBookmarks(Rule):
 
     name        = _("Relationship path between bookmarked persons")
     category    = _('Relationship filters')
+    cache_scope = Rule.CACHE_NONE
     description = _("Matches the ancestors of bookmarked individuals "
                     "back to common ancestors, producing the relationship "
                     "path(s) between bookmarked persons.")
@@ -36,7 +36,9 @@ from ..person import (
     IsDuplicatedAncestorOf, IsRelatedWith, HasIdOf, IsDefaultPerson, IsFemale,
     IsMale, MissingParent, MultipleMarriages, NeverMarried, NoBirthdate,
     NoDeathdate, PeoplePrivate, PeoplePublic, PersonWithIncompleteEvent,
-    RelationshipPathBetweenBookmarks, HasNameOf, HasSoundexName)
+    RelationshipPathBetweenBookmarks, HasNameOf, HasSoundexName,
+    IsAncestorOf, IsDescendantOf, IsLessThanNthGenerationAncestorOf,
+    IsLessThanNthGenerationDescendantOf, RelationshipPathBetween)
 
 TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
 EXAMPLE = os.path.join(TEST_DIR, "example.gramps")
@@ -580,6 +582,107 @@ class BaseTest(unittest.TestCase):
         self.assertEqual(self.filter_with_rule(rule), set([
             'GNUJQCL9MD64AM56OH']))
 
+    def test_isancestorof(self):
+        """
+        Test IsAncestorOf rule.
+        """
+        rule = IsAncestorOf(['I0044', '1'])
+        self.assertEqual(self.filter_with_rule(rule), set([
+            'GNUJQCL9MD64AM56OH', '35WJQC1B7T7NPV8OLV', '44WJQCLCQIPZUB0UH',
+            '46WJQCIOLQ0KOX2XCC', 'D3WJQCCGV58IP8PNHZ', 'H1DKQC4YGZ5A61FGS',
+            'W2DKQCV4H3EZUJ35DX',
+            ]))
+        rule = IsAncestorOf(['I0044', '0'])
+        self.assertEqual(len(self.filter_with_rule(rule)), 6)
+
+    def test_isdescendantof(self):
+        """
+        Test IsDescendantOf rule.
+        """
+        rule = IsDescendantOf(['I0044', '1'])
+        self.assertEqual(len(self.filter_with_rule(rule)), 73)
+        rule = IsDescendantOf(['I0044', '0'])
+        self.assertEqual(len(self.filter_with_rule(rule)), 72)
+
+    def test_islessthannthgenerationancestorof(self):
+        """
+        Test IsLessThanNthGenerationAncestorOf rule.
+        """
+        rule = IsLessThanNthGenerationAncestorOf(['I0044', '2'])
+        self.assertEqual(self.filter_with_rule(rule), set([
+            'GNUJQCL9MD64AM56OH', '35WJQC1B7T7NPV8OLV', '46WJQCIOLQ0KOX2XCC',
+            ]))
+
+    def test_islessthannthgenerationdescendantof(self):
+        """
+        Test IsLessThanNthGenerationDescendantOf rule.
+        """
+        rule = IsLessThanNthGenerationDescendantOf(['I0044', '2'])
+        self.assertEqual(len(self.filter_with_rule(rule)), 22)
+
+    def test_relationshippathbetween(self):
+        """
+        Test RelationshipPathBetween rule.
+        """
+        rule = RelationshipPathBetween(['I0044', 'I0001'])
+        self.assertEqual(self.filter_with_rule(rule), set([
+            'GNUJQCL9MD64AM56OH', '66TJQC6CC7ZWL9YZ64', 'BBTJQCNT6N1H4X6TL4',
+            'DPUJQCUYKKDPT78JJV', 'TDTJQCGYRS2RCCGQN3',
+            ]))
+
+    def test_rule_order(self):
+        """
+        Test that cheap and selective rules are applied first.
+        """
+        filter_ = GenericFilter()
+        rules = [HasNameOf(['', '', '', '', '', '', '', 'Garner', '', '', '']),
+                 Everyone([]), IsMale([]), HasIdOf(['I0044'])]
+        filter_.set_rules(rules)
+        self.assertEqual(filter_.get_rule_order(),
+                         [rules[3], rules[2], rules[1], rules[0]])
+        filter_.set_logical_op('or')
+        self.assertEqual(filter_.get_rule_order(),
+                         [rules[1], rules[2], rules[3], rules[0]])
+        filter_.set_logical_op('xor')
+        self.assertEqual(filter_.get_rule_order(), rules)
+
+    def test_timings(self):
+        """
+        Test the timings of the rules of a filter.
+        """
+        filter_ = GenericFilter()
+        filter_.add_rule(IsMale([]))
+        filter_.add_rule(HasIdOf(['I0044']))
+        self.assertEqual(filter_.get_timings(), [])
+        filter_.set_timings(True)
+        self.assertEqual(filter_.apply(self.db), ['GNUJQCL9MD64AM56OH'])
+        stats = {rule.__class__.__name__: (calls, matches)
+                 for rule, calls, matches, seconds in filter_.get_timings()}
+        # HasIdOf is applied first, so IsMale is only applied once.
+        self.assertEqual(stats['HasIdOf'][1], 1)
+        self.assertEqual(stats['IsMale'], (1, 1))
+
+    def test_check_cache(self):
+        """
+        Test that the results of a prepared filter are cached.
+        """
+        filter_ = GenericFilter()
+        filter_.add_rule(HasIdOf(['I0044']))
+        person = self.db.get_person_from_gramps_id('I0044')
+        other = self.db.get_person_from_gramps_id('I0001')
+        filter_.requestprepare(self.db, None)
+        filter_.requestprepare(self.db, None)
+        self.assertEqual(filter_.check(self.db, person.handle),
+                         [person.handle])
+        self.assertFalse(filter_.check_obj(self.db, other))
+        self.assertEqual(filter_.cache,
+                         {person.handle: True, other.handle: False})
+        filter_.requestreset()
+        self.assertIsNotNone(filter_.cache)
+        filter_.requestreset()
+        self.assertIsNone(filter_.cache)
+        self.assertTrue(filter_.check_obj(self.db, person))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,120 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the filter result cache """
+
+import unittest
+
+from ...db import DbTxn
+from ...db.utils import make_database
+from ...lib import Person, Name, Surname
+from .. import GenericFilter
+from .._filtercache import FILTER_CACHE
+from ..rules.person import IsMale, HasNameOf, IsBookmarked
+
+class FilterCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        self.handles = []
+        with DbTxn('Add test people', self.db) as trans:
+            for index in range(6):
+                person = Person()
+                person.set_gender(Person.MALE if index % 2 else Person.FEMALE)
+                name = Name()
+                surname = Surname()
+                surname.set_surname('Smith' if index < 3 else 'Jones')
+                name.add_surname(surname)
+                person.set_primary_name(name)
+                self.handles.append(self.db.add_person(person, trans))
+        self.evaluated = []
+
+    def tearDown(self):
+        FILTER_CACHE.clear()
+        self.db.close()
+
+    def __filter(self, rule):
+        """
+        Return a filter with the rule that records the handles it evaluates.
+        """
+        filter_ = GenericFilter()
+        filter_.add_rule(rule)
+        evaluate = filter_.evaluate
+        def recording_evaluate(db, id_list=None, tupleind=None, user=None):
+            self.evaluated.append(id_list)
+            return evaluate(db, id_list, tupleind, user)
+        filter_.evaluate = recording_evaluate
+        return filter_
+
+    def __set_gender(self, handle, gender):
+        person = self.db.get_person_from_handle(handle)
+        person.set_gender(gender)
+        with DbTxn('Edit person', self.db) as trans:
+            self.db.commit_person(person, trans)
+
+    def test_object_rule(self):
+        males = set(self.handles[1::2])
+        self.assertEqual(set(self.__filter(IsMale([])).apply(self.db)), males)
+        self.assertEqual(set(self.__filter(IsMale([])).apply(self.db)), males)
+        self.assertEqual(self.evaluated, [None])
+
+        self.__set_gender(self.handles[0], Person.MALE)
+        with DbTxn('Remove person', self.db) as trans:
+            self.db.remove_person(self.handles[1], trans)
+        result = self.__filter(IsMale([])).apply(self.db)
+        self.assertEqual(set(result),
+                         males - {self.handles[1]} | {self.handles[0]})
+        self.assertEqual(self.evaluated, [None, [self.handles[0]]])
+
+        id_list = [('key', handle) for handle in reversed(self.handles)]
+        self.assertEqual(self.__filter(IsMale([])).apply(self.db, id_list, 1),
+                         [data for data in id_list if data[1] in result])
+        self.assertEqual(len(self.evaluated), 2)
+
+    def test_database_rule(self):
+        rule = HasNameOf(['', '', '', '', '', '', '', 'Smith', '', '', ''])
+        self.assertEqual(set(self.__filter(rule).apply(self.db)),
+                         set(self.handles[:3]))
+        self.__filter(rule).apply(self.db)
+        self.assertEqual(self.evaluated, [None])
+        self.__set_gender(self.handles[0], Person.MALE)
+        self.__filter(rule).apply(self.db)
+        self.assertEqual(self.evaluated, [None, None])
+
+    def test_not_cached(self):
+        self.__filter(IsBookmarked([])).apply(self.db)
+        self.__filter(IsBookmarked([])).apply(self.db)
+        self.assertEqual(self.evaluated, [None, None])
+        self.__filter(IsMale([])).apply(self.db)
+        filter_ = self.__filter(IsMale([]))
+        filter_.set_timings(True)
+        filter_.apply(self.db)
+        self.assertEqual(self.evaluated, [None, None, None, None])
+
+    def test_definition(self):
+        self.__filter(IsMale([])).apply(self.db)
+        filter_ = self.__filter(IsMale([]))
+        filter_.set_invert(True)
+        self.assertEqual(set(filter_.apply(self.db)), set(self.handles[::2]))
+        self.assertEqual(self.evaluated, [None, None])
+
+if __name__ == "__main__":
+    unittest.main()
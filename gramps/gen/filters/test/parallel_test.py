@@ -0,0 +1,148 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for filters applied in worker processes """
+
+import os
+import subprocess
+import sys
+import unittest
+
+import gramps
+from ...config import config
+from ...db import DbTxn
+from ...db.utils import make_database
+from ...lib import Person, Name, Surname
+from ...utils.file import get_empty_tempdir
+from .. import GenericFilter, _parallel
+from ..rules.person import IsMale, HasNameOf
+
+class ParallelFilterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = make_database("dbapi")
+        path = get_empty_tempdir("parallel_filter_test")
+        cls.db.write_version(path)
+        cls.db.load(path)
+        with DbTxn('Add test people', cls.db) as trans:
+            for index in range(40):
+                person = Person()
+                person.set_gender(Person.MALE if index % 3 else Person.FEMALE)
+                name = Name()
+                name.set_first_name('Person %d' % index)
+                surname = Surname()
+                surname.set_surname('Smith' if index % 2 else 'Jones')
+                name.add_surname(surname)
+                person.set_primary_name(name)
+                cls.db.add_person(person, trans)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+
+    def setUp(self):
+        self.min_objects = _parallel.MIN_OBJECTS
+        self.chunk_size = _parallel.CHUNK_SIZE
+        self.min_python_version = _parallel.MIN_PYTHON_VERSION
+        _parallel.MIN_OBJECTS = 10
+        _parallel.CHUNK_SIZE = 15
+
+    def tearDown(self):
+        _parallel.MIN_OBJECTS = self.min_objects
+        _parallel.CHUNK_SIZE = self.chunk_size
+        _parallel.MIN_PYTHON_VERSION = self.min_python_version
+        config.set('database.filter-workers', 0)
+
+    def __filter(self):
+        filter_ = GenericFilter()
+        filter_.add_rule(IsMale([]))
+        filter_.add_rule(HasNameOf(['', '', '', '', '', '', '', 'Smith',
+                                    '', '', '']))
+        return filter_
+
+    def __apply(self, filter_, id_list=None, tupleind=None):
+        for rule in filter_.flist:
+            rule.requestprepare(self.db, None)
+        try:
+            return _parallel.apply_parallel(filter_, self.db, id_list,
+                                            tupleind)
+        finally:
+            for rule in filter_.flist:
+                rule.requestreset()
+
+    def test_disabled(self):
+        self.assertIsNone(self.__apply(self.__filter()))
+
+    @unittest.skipIf(sys.version_info < _parallel.MIN_PYTHON_VERSION,
+                     "filters are not applied in workers on this Python")
+    def test_apply(self):
+        filter_ = self.__filter()
+        expected = filter_.apply(self.db)
+        config.set('database.filter-workers', 2)
+        self.assertEqual(self.__apply(filter_),
+                         [handle for handle in self.db.get_person_handles()
+                          if handle in expected])
+        filter_.set_invert(True)
+        self.assertEqual(len(self.__apply(filter_)),
+                         self.db.get_number_of_people() - len(expected))
+
+    @unittest.skipIf(sys.version_info < _parallel.MIN_PYTHON_VERSION,
+                     "filters are not applied in workers on this Python")
+    def test_id_list(self):
+        filter_ = self.__filter()
+        config.set('database.filter-workers', 2)
+        id_list = [('key', handle) for handle in self.db.get_person_handles()]
+        id_list.reverse()
+        result = self.__apply(filter_, id_list, 1)
+        self.assertEqual(result, [data for data in id_list
+                                  if filter_.match(data[1], self.db)])
+
+    def test_python_version(self):
+        config.set('database.filter-workers', 2)
+        _parallel.MIN_PYTHON_VERSION = (99, 0)
+        self.assertIsNone(self.__apply(self.__filter()))
+
+    def test_launchers(self):
+        # Spawned workers run the main script of the parent again as
+        # __mp_main__, which must not start another Gramps
+        root = os.path.dirname(os.path.dirname(gramps.__file__))
+        code = ("import runpy, sys\n"
+                "import gramps.grampsapp as app\n"
+                "app.main = lambda: print('main')\n"
+                "runpy.run_path(sys.argv[1], run_name=sys.argv[2])\n")
+        for path in ('Gramps.py', os.path.join('scripts', 'gramps')):
+            path = os.path.join(root, path)
+            for run_name, output in (('__mp_main__', ''),
+                                     ('__main__', 'main')):
+                result = subprocess.run(
+                    [sys.executable, '-c', code, path, run_name],
+                    cwd=root, stdout=subprocess.PIPE, check=True)
+                self.assertEqual(result.stdout.decode().strip(), output)
+
+    def test_not_picklable(self):
+        filter_ = GenericFilter()
+        filter_.add_rule(IsMale([]))
+        filter_.flist[0].apply = lambda db, person: True
+        config.set('database.filter-workers', 2)
+        self.assertIsNone(self.__apply(filter_))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Lazily unserialized primary objects.
+
+The objects in this module hold the tuple created by the serialize method of
+the primary object and only unserialize a field when it is first accessed.
+They are intended for read-only code that scans many objects, such as the
+filters, where most rules only look at a few fields of each object.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from .person import Person
+from .family import Family
+from .event import Event
+from .place import Place
+from .name import Name
+from .eventref import EventRef
+from .childref import ChildRef
+from .personref import PersonRef
+from .placeref import PlaceRef
+from .placename import PlaceName
+from .location import Location
+from .mediaref import MediaRef
+from .attribute import Attribute
+from .address import Address
+from .url import Url
+from .ldsord import LdsOrd
+from .date import Date
+from .eventtype import EventType
+from .familyreltype import FamilyRelType
+from .placetype import PlaceType
+
+#-------------------------------------------------------------------------
+#
+# Field decoders
+#
+#-------------------------------------------------------------------------
+def _object(cls):
+    """
+    Return a decoder for a field holding a single serialized object.
+    """
+    return lambda data: cls().unserialize(data)
+
+def _object_list(cls):
+    """
+    Return a decoder for a field holding a list of serialized objects.
+    """
+    return lambda data: [cls().unserialize(item) for item in data]
+
+def _date(data):
+    """
+    Decode a date in the same way as DateBase.unserialize.
+    """
+    date = Date()
+    if data:
+        date.unserialize(data)
+    return date
+
+def _type(cls):
+    """
+    Return a decoder for a GrampsType field.
+    """
+    def decode(data):
+        value = cls()
+        value.unserialize(data)
+        return value
+    return decode
+
+# Fields common to the objects in this module.
+_BASE_FIELDS = {
+    'handle': (0, None),
+    'gramps_id': (1, None),
+}
+
+#-------------------------------------------------------------------------
+#
+# LazyObject class
+#
+#-------------------------------------------------------------------------
+class LazyObject:
+    """
+    Mixin for a primary object that unserializes its fields on first access.
+
+    Subclasses define FIELDS, a dictionary mapping each attribute name to a
+    tuple of the index of the field in the serialized data and a function
+    that converts the field into the attribute value. If the function is None
+    the field is used as it is. Attributes that are not in FIELDS are
+    provided by a full unserialize of the object.
+    """
+    __slots__ = ('_data', '_complete')
+    FIELDS = {}
+
+    def __init__(self, data=None):
+        self._data = data
+        self._complete = False
+
+    def unserialize(self, data):
+        """
+        Set the serialized data of the object. The fields are unserialized
+        when they are first accessed.
+        """
+        self.__dict__.clear()
+        self._data = data
+        self._complete = False
+        return self
+
+    def serialize(self):
+        """
+        Return the serialized data of the object, without unserializing it
+        if no field has been accessed.
+        """
+        if not self.__dict__:
+            return self._data
+        return super().serialize()
+
+    def __getattr__(self, name):
+        # Only called when normal attribute lookup fails, so each field is
+        # decoded at most once and then read from the instance dictionary.
+        try:
+            index, decode = self.FIELDS[name]
+        except KeyError:
+            return self._unserialize_remaining(name)
+        value = self._data[index]
+        if decode is not None:
+            value = decode(value)
+        self.__dict__[name] = value
+        return value
+
+    def _unserialize_remaining(self, name):
+        """
+        Unserialize the whole object into the attributes that have not been
+        accessed yet and return the requested attribute.
+        """
+        if name.startswith('__') or self._complete:
+            raise AttributeError(name)
+        for cls in type(self).__mro__:
+            if not issubclass(cls, LazyObject):
+                break
+        full = cls()
+        full.unserialize(self._data)
+        for key, value in full.__dict__.items():
+            self.__dict__.setdefault(key, value)
+        self._complete = True
+        return object.__getattribute__(self, name)
+
+#-------------------------------------------------------------------------
+#
+# Lazy primary objects
+#
+#-------------------------------------------------------------------------
+class LazyPerson(LazyObject, Person):
+    """
+    Person that unserializes its fields on first access.
+    """
+    __slots__ = ()
+    FIELDS = dict(_BASE_FIELDS, **{
+        '_Person__gender': (2, None),
+        'primary_name': (3, _object(Name)),
+        'alternate_names': (4, _object_list(Name)),
+        'death_ref_index': (5, None),
+        'birth_ref_index': (6, None),
+        'event_ref_list': (7, _object_list(EventRef)),
+        'family_list': (8, None),
+        'parent_family_list': (9, None),
+        'media_list': (10, _object_list(MediaRef)),
+        'address_list': (11, _object_list(Address)),
+        'attribute_list': (12, _object_list(Attribute)),
+        'urls': (13, _object_list(Url)),
+        'lds_ord_list': (14, _object_list(LdsOrd)),
+        'citation_list': (15, list),
+        'note_list': (16, list),
+        'change': (17, None),
+        'tag_list': (18, None),
+        'private': (19, None),
+        'person_ref_list': (20, _object_list(PersonRef)),
+    })
+
+
+class LazyFamily(LazyObject, Family):
+    """
+    Family that unserializes its fields on first access.
+    """
+    __slots__ = ()
+    FIELDS = dict(_BASE_FIELDS, **{
+        'father_handle': (2, None),
+        'mother_handle': (3, None),
+        'child_ref_list': (4, _object_list(ChildRef)),
+        'type': (5, _type(FamilyRelType)),
+        'event_ref_list': (6, _object_list(EventRef)),
+        'media_list': (7, _object_list(MediaRef)),
+        'attribute_list': (8, _object_list(Attribute)),
+        'lds_ord_list': (9, _object_list(LdsOrd)),
+        'citation_list': (10, list),
+        'note_list': (11, list),
+        'change': (12, None),
+        'tag_list': (13, None),
+        'private': (14, None),
+    })
+
+
+class LazyEvent(LazyObject, Event):
+    """
+    Event that unserializes its fields on first access.
+    """
+    __slots__ = ()
+    FIELDS = dict(_BASE_FIELDS, **{
+        '_Event__type': (2, _type(EventType)),
+        'date': (3, _date),
+        '_Event__description': (4, None),
+        'place': (5, None),
+        'citation_list': (6, list),
+        'note_list': (7, list),
+        'media_list': (8, _object_list(MediaRef)),
+        'attribute_list': (9, _object_list(Attribute)),
+        'change': (10, None),
+        'tag_list': (11, None),
+        'private': (12, None),
+    })
+
+
+class LazyPlace(LazyObject, Place):
+    """
+    Place that unserializes its fields on first access.
+    """
+    __slots__ = ()
+    FIELDS = dict(_BASE_FIELDS, **{
+        'title': (2, None),
+        'long': (3, None),
+        'lat': (4, None),
+        'placeref_list': (5, _object_list(PlaceRef)),
+        'name': (6, _object(PlaceName)),
+        'alt_names': (7, _object_list(PlaceName)),
+        'place_type': (8, _type(PlaceType)),
+        'code': (9, None),
+        'alt_loc': (10, _object_list(Location)),
+        'urls': (11, _object_list(Url)),
+        'media_list': (12, _object_list(MediaRef)),
+        'citation_list': (13, list),
+        'note_list': (14, list),
+        'change': (15, None),
+        'tag_list': (16, None),
+        'private': (17, None),
+    })
@@ -46,6 +46,10 @@ from ..errors import HandleError
 #-------------------------------------------------------------------------
 from ..const import GRAMPS_LOCALE as glocale
 CODESET = glocale.encoding
+
+# Secondary fields of each class, which only depend on the schema.
+_SECONDARY_FIELDS = {}
+
 #-------------------------------------------------------------------------
 #
 # Table Object class
@@ -160,6 +164,9 @@ class TableObject(BaseObject):
         """
         Return all secondary fields and their types
         """
+        result = _SECONDARY_FIELDS.get(cls)
+        if result is not None:
+            return result
         result = []
         for (key, value) in cls.get_schema()["properties"].items():
             schema_type = value.get("type")
@@ -172,4 +179,5 @@ class TableObject(BaseObject):
                 result.append((key.lower(),
                                schema_type,
                                value.get("maxLength")))
+        _SECONDARY_FIELDS[cls] = result
         return result
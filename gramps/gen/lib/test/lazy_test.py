@@ -0,0 +1,145 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for lazily unserialized objects """
+
+import unittest
+
+from .. import (Person, Family, Event, Place, Name, Surname, EventRef,
+                ChildRef, Attribute, Date, EventType, FamilyRelType,
+                PlaceName, PlaceType)
+from ..lazy import LazyPerson, LazyFamily, LazyEvent, LazyPlace
+
+class BaseCheck:
+    def test_serialize(self):
+        obj = self.lazy_cls().unserialize(self.data)
+        self.assertEqual(obj.serialize(), self.data)
+        obj.get_gramps_id()
+        self.assertEqual(obj.serialize(), self.data)
+
+    def test_fields(self):
+        obj = self.lazy_cls().unserialize(self.data)
+        self.assertIsInstance(obj, self.cls)
+        full = self.cls().unserialize(self.data)
+        for name in self.lazy_cls.FIELDS:
+            value = getattr(obj, name)
+            if hasattr(value, 'serialize'):
+                self.assertEqual(value.serialize(),
+                                 getattr(full, name).serialize())
+            elif isinstance(value, list):
+                self.assertEqual([getattr(item, 'serialize', lambda: item)()
+                                  for item in value],
+                                 [getattr(item, 'serialize', lambda: item)()
+                                  for item in getattr(full, name)])
+            else:
+                self.assertEqual(value, getattr(full, name))
+
+    def test_on_access(self):
+        obj = self.lazy_cls().unserialize(self.data)
+        self.assertEqual(obj.get_handle(), self.data[0])
+        self.assertEqual(list(obj.__dict__), ['handle'])
+        obj.unserialize(self.data)
+        self.assertEqual(list(obj.__dict__), [])
+
+class PersonCheck(unittest.TestCase, BaseCheck):
+    def setUp(self):
+        self.cls = Person
+        self.lazy_cls = LazyPerson
+        person = Person()
+        person.set_handle('P1')
+        person.set_gramps_id('I0001')
+        person.set_gender(Person.FEMALE)
+        name = Name()
+        name.set_first_name('Anna')
+        surname = Surname()
+        surname.set_surname('Smith')
+        name.add_surname(surname)
+        person.set_primary_name(name)
+        person.add_event_ref(EventRef())
+        person.add_attribute(Attribute())
+        person.add_family_handle('F1')
+        person.add_tag('T1')
+        self.data = person.serialize()
+
+    def test_methods(self):
+        person = LazyPerson().unserialize(self.data)
+        self.assertEqual(person.get_gender(), Person.FEMALE)
+        self.assertEqual(person.get_primary_name().get_surname(), 'Smith')
+        self.assertEqual(person.get_family_handle_list(), ['F1'])
+        self.assertNotIn('alternate_names', person.__dict__)
+
+class FamilyCheck(unittest.TestCase, BaseCheck):
+    def setUp(self):
+        self.cls = Family
+        self.lazy_cls = LazyFamily
+        family = Family()
+        family.set_handle('F1')
+        family.set_gramps_id('F0001')
+        family.set_father_handle('P1')
+        family.set_relationship(FamilyRelType.MARRIED)
+        family.add_child_ref(ChildRef())
+        self.data = family.serialize()
+
+    def test_unserialized_attribute(self):
+        family = LazyFamily().unserialize(self.data)
+        self.assertEqual(family.get_father_handle(), 'P1')
+        self.assertEqual(family.complete, 0)
+        self.assertEqual(family.serialize(), self.data)
+
+class EventCheck(unittest.TestCase, BaseCheck):
+    def setUp(self):
+        self.cls = Event
+        self.lazy_cls = LazyEvent
+        event = Event()
+        event.set_handle('E1')
+        event.set_gramps_id('E0001')
+        event.set_type(EventType.BIRTH)
+        event.set_description('Birth of Anna')
+        date = Date()
+        date.set_yr_mon_day(1900, 1, 2)
+        event.set_date_object(date)
+        self.data = event.serialize()
+
+    def test_methods(self):
+        event = LazyEvent().unserialize(self.data)
+        self.assertEqual(event.get_type(), EventType.BIRTH)
+        self.assertEqual(event.get_description(), 'Birth of Anna')
+        self.assertEqual(event.get_date_object().get_year(), 1900)
+
+class PlaceCheck(unittest.TestCase, BaseCheck):
+    def setUp(self):
+        self.cls = Place
+        self.lazy_cls = LazyPlace
+        place = Place()
+        place.set_handle('L1')
+        place.set_gramps_id('P0001')
+        name = PlaceName()
+        name.set_value('Springfield')
+        place.set_name(name)
+        place.set_type(PlaceType.CITY)
+        self.data = place.serialize()
+
+    def test_methods(self):
+        place = LazyPlace().unserialize(self.data)
+        self.assertEqual(place.get_name().get_value(), 'Springfield')
+        self.assertEqual(place.get_type(), PlaceType.CITY)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,6 +22,7 @@
 Proxy class for the Gramps databases. Caches lookups from handles.
 """
 
+from ..config import config
 from ..utils.lru import LRU
 
 class CacheProxyDb:
@@ -31,15 +32,21 @@ class CacheProxyDb:
     Does not invalid caches. Should be used only in read-only
     places, and not where caches are altered.
     """
-    def __init__(self, database):
+    def __init__(self, database, size=None):
         """
         CacheProxy will cache items based on their handle.
 
         Assumes all handles (regardless of type) are unique.
         Database is called self.db for consistency with other
         proxies.
+
+        The cached objects are limited to about size bytes, by default the
+        database.proxy-cache-memory setting.
         """
         self.db = database
+        if size is None:
+            size = config.get('database.proxy-cache-memory') * 1024 * 1024
+        self.cache_size = size or None
         self.clear_cache()
 
     def __getattr__(self, attr):
@@ -57,103 +64,93 @@ class CacheProxyDb:
         if handle:
             del self.cache_handle[handle]
         else:
-            self.cache_handle = LRU(100000)
+            self.cache_handle = LRU(100000, size=self.cache_size,
+                                    name='CacheProxyDb')
+
+    def __get(self, handle, get_object):
+        """
+        Return the object from the cache, or get it from the database.
+        """
+        try:
+            return self.cache_handle[handle]
+        except KeyError:
+            obj = get_object(handle)
+            self.cache_handle[handle] = obj
+            return obj
 
     def get_person_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_person_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_person_from_handle)
 
     def get_event_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_event_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_event_from_handle)
 
     def get_family_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_family_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_family_from_handle)
 
     def get_repository_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_repository_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_repository_from_handle)
 
     def get_place_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_place_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_place_from_handle)
 
     def get_place_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_place_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_place_from_handle)
 
     def get_citation_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_citation_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_citation_from_handle)
 
     def get_source_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_source_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_source_from_handle)
 
     def get_note_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_note_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_note_from_handle)
 
     def get_media_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_media_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_media_from_handle)
 
     def get_tag_from_handle(self, handle):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_tag_from_handle(handle)
-        return self.cache_handle[handle]
+        return self.__get(handle, self.db.get_tag_from_handle)
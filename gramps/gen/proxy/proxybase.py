@@ -36,6 +36,7 @@ import types
 #
 #-------------------------------------------------------------------------
 from ..db.base import DbReadBase, DbWriteBase
+from ..db.dbconst import KEY_TO_NAME_MAP
 from ..lib import (Citation, Event, Family, Media, Note, Person, Place,
                    Repository, Source, Tag)
 from ..const import GRAMPS_LOCALE as glocale
@@ -939,6 +940,13 @@ class ProxyDbBase(DbReadBase):
     def get_gramps_ids(self, obj_key):
         return self.db.get_gramps_ids(obj_key)
 
+    def get_gramps_id_handles(self, obj_key):
+        include = getattr(self, 'include_%s' % KEY_TO_NAME_MAP[obj_key])
+        if include is None:
+            return self.db.get_gramps_id_handles(obj_key)
+        return [data for data in self.db.get_gramps_id_handles(obj_key)
+                if include(data[1])]
+
     def has_gramps_id(self, obj_key, gramps_id):
         return self.db.has_gramps_id(obj_key, gramps_id)
 
@@ -113,14 +113,14 @@ class ProbablyAlive:
         # Look for Cause Of Death, Burial or Cremation events.
         # These are fairly good indications that someone's not alive.
         if not death_date:
-            for ev_ref in person.get_primary_event_ref_list():
-                if ev_ref:
-                    ev = self.db.get_event_from_handle(ev_ref.ref)
-                    if ev and ev.type.is_death_fallback():
-                        death_date = ev.get_date_object()
-                        if not death_date.is_valid():
-                            death_date = Today() # before today
-                            death_date.set_modifier(Date.MOD_BEFORE)
+            for ev in self.db.get_events_from_handles(
+                    [ev_ref.ref for ev_ref in person.get_primary_event_ref_list()
+                     if ev_ref]):
+                if ev.type.is_death_fallback():
+                    death_date = ev.get_date_object()
+                    if not death_date.is_valid():
+                        death_date = Today() # before today
+                        death_date.set_modifier(Date.MOD_BEFORE)
 
         # If they were born within X years before current year then
         # assume they are alive (we already know they are not dead).
@@ -133,9 +133,9 @@ class ProbablyAlive:
         # Look for Baptism, etc events.
         # These are fairly good indications that someone's birth.
         if not birth_date:
-            for ev_ref in person.get_primary_event_ref_list():
-                ev = self.db.get_event_from_handle(ev_ref.ref)
-                if ev and ev.type.is_birth_fallback():
+            for ev in self.db.get_events_from_handles(
+                    [ev_ref.ref for ev_ref in person.get_primary_event_ref_list()]):
+                if ev.type.is_birth_fallback():
                     birth_date = ev.get_date_object()
 
         if not birth_date and death_date:
@@ -168,10 +168,11 @@ class ProbablyAlive:
                 child = self.db.get_person_from_handle(child_handle)
                 if child is None:
                     continue
+                child_events = self.db.get_events_from_handles(
+                    [ev_ref.ref for ev_ref in child.get_primary_event_ref_list()])
                 # Go through once looking for direct evidence:
-                for ev_ref in child.get_primary_event_ref_list():
-                    ev = self.db.get_event_from_handle(ev_ref.ref)
-                    if ev and ev.type.is_birth():
+                for ev in child_events:
+                    if ev.type.is_birth():
                         dobj = ev.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
                             # if sibling birth date too far away, then not alive:
@@ -182,7 +183,7 @@ class ProbablyAlive:
                                         Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF + self.MAX_AGE_PROB_ALIVE),
                                         _("sibling birth date"),
                                         child)
-                    elif ev and ev.type.is_death():
+                    elif ev.type.is_death():
                         dobj = ev.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
                             # if sibling death date too far away, then not alive:
@@ -195,9 +196,8 @@ class ProbablyAlive:
                                         _("sibling death date"),
                                         child)
                 # Go through again looking for fallback:
-                for ev_ref in child.get_primary_event_ref_list():
-                    ev = self.db.get_event_from_handle(ev_ref.ref)
-                    if ev and ev.type.is_birth_fallback():
+                for ev in child_events:
+                    if ev.type.is_birth_fallback():
                         dobj = ev.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
                             # if sibling birth date too far away, then not alive:
@@ -208,7 +208,7 @@ class ProbablyAlive:
                                         Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF + self.MAX_AGE_PROB_ALIVE),
                                         _("sibling birth-related date"),
                                         child)
-                    elif ev and ev.type.is_death_fallback():
+                    elif ev.type.is_death_fallback():
                         dobj = ev.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
                             # if sibling death date too far away, then not alive:
@@ -5,6 +5,7 @@
 #
 # Copyright (C) 2003-2006  Josiah Carlson
 # Copyright (C) 2009       Gary Burton
+# Copyright (C) 2017       Gramps Development Team
 #
 # This program is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -23,29 +24,82 @@
 
 """
 Least recently used algorithm
+
+The caches can be limited by the number of entries and by the approximate
+memory size of the entries. Each cache counts its hits, misses and
+evictions; the statistics of the named caches are returned by
+:func:`get_cache_stats`.
 """
 
-class Node:
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import sys
+import weakref
+from collections import OrderedDict
+
+# Named caches, for the diagnostics.
+_CACHES = weakref.WeakSet()
+
+#-------------------------------------------------------------------------
+#
+# Size estimate
+#
+#-------------------------------------------------------------------------
+def approximate_size(obj):
     """
-    Node to be stored in the LRU structure
+    Return the approximate memory size of an object in bytes: the size of
+    the object and, for containers, the sizes of their items, one level
+    deep.
     """
-    def __init__(self, prev, value):
-        self.prev = prev
-        self.value = value
-        self.next = None
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += sys.getsizeof(item)
+    elif hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+        for value in obj.__dict__.values():
+            size += sys.getsizeof(value)
+    return size
 
+#-------------------------------------------------------------------------
+#
+# LRU class
+#
+#-------------------------------------------------------------------------
 class LRU:
     """
     Implementation of a length-limited O(1) LRU cache
     """
-    def __init__(self, count):
+    def __init__(self, count, size=None, name=None, sizeof=approximate_size):
         """
         Set count to 0 or 1 to disable.
+
+        If size is given, the entries are also removed when their
+        approximate size in bytes, as estimated by the sizeof function,
+        exceeds it. Caches with a name are reported by
+        :func:`get_cache_stats`.
         """
         self.count = count
-        self.data = {}
-        self.first = None
-        self.last = None
+        self.size = size
+        self.name = name
+        self.sizeof = sizeof
+        self.data = OrderedDict()
+        self.sizes = {}
+        self.total_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if name is not None:
+            _CACHES.add(self)
+
+    def __len__(self):
+        return len(self.data)
 
     def __contains__(self, obj):
         """
@@ -55,129 +109,146 @@ class LRU:
 
     def __getitem__(self, obj):
         """
-        Return item associated with Obj
+        Return item associated with Obj, and mark it as recently used
+        """
+        try:
+            value = self.data[obj]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        self.data.move_to_end(obj)
+        return value
+
+    def get(self, obj, default=None):
+        """
+        Return item associated with Obj, or default if it is not in the LRU
         """
-        return self.data[obj].value[1]
+        try:
+            return self[obj]
+        except KeyError:
+            return default
 
     def __setitem__(self, obj, val):
         """
-        Set the item in the LRU, removing an old entry if needed
+        Set the item in the LRU, removing old entries if needed
         """
         if self.count <= 1: # Disabled
             return
         if obj in self.data:
             del self[obj]
-        nobj = Node(self.last, (obj, val))
-        if self.first is None:
-            self.first = nobj
-        if self.last:
-            self.last.next = nobj
-        self.last = nobj
-        self.data[obj] = nobj
-        if len(self.data) > self.count:
-            if self.first == self.last:
-                self.first = None
-                self.last = None
-                return
-            lnk = self.first
-            lnk.next.prev = None
-            self.first = lnk.next
-            lnk.next = None
-            if lnk.value[0] in self.data:
-                del self.data[lnk.value[0]]
-            del lnk
+        self.data[obj] = val
+        if self.size is not None:
+            item_size = self.sizeof(obj) + self.sizeof(val)
+            self.sizes[obj] = item_size
+            self.total_size += item_size
+        while self.data and (len(self.data) > self.count or
+                             (self.size is not None and
+                              self.total_size > self.size)):
+            self.__evict()
+
+    def __evict(self):
+        """
+        Remove the least recently used entry
+        """
+        obj = self.data.popitem(last=False)[0]
+        if self.size is not None:
+            self.total_size -= self.sizes.pop(obj)
+        self.evictions += 1
 
     def __delitem__(self, obj):
         """
         Delete the object from the LRU
         """
-        nobj = self.data[obj]
-        if nobj.prev:
-            nobj.prev.next = nobj.next
-        else:
-            self.first = nobj.next
-        if nobj.next:
-            nobj.next.prev = nobj.prev
-        else:
-            self.last = nobj.prev
         del self.data[obj]
+        if self.size is not None:
+            self.total_size -= self.sizes.pop(obj)
 
     def __iter__(self):
         """
-        Iterate over the LRU
+        Iterate over the values of the LRU, least recently used first
         """
-        cur = self.first
-        while cur is not None:
-            cur2 = cur.next
-            yield cur.value[1]
-            cur = cur2
-        raise StopIteration
+        return iter(list(self.data.values()))
 
     def iteritems(self):
         """
         Return items in the LRU using a generator
         """
-        cur = self.first
-        while cur is not None:
-            cur2 = cur.next
-            yield cur.value
-            cur = cur2
-        raise StopIteration
+        return iter(list(self.data.items()))
 
     def iterkeys(self):
         """
         Return keys in the LRU using a generator
         """
-        return iter(self.data)
+        return iter(list(self.data))
 
     def itervalues(self):
         """
-        Return items and keys in the LRU using a generator
+        Return values in the LRU using a generator
         """
-        for data in self.items():
-            yield data[1]
+        return iter(self)
 
     def keys(self):
         """
         Return all keys
         """
-        return [data[0] for data in self.items()]
+        return list(self.data)
 
     def values(self):
         """
         Return all values
         """
-        return [data[1] for data in self.items()]
+        return list(self.data.values())
 
     def items(self):
         """
         Return all items
         """
-        return [data[0] for data in self.items()]
+        return list(self.data.items())
 
     def clear(self):
         """
         Empties LRU
         """
-        # Step through the doubly linked list, setting prev and next to None.
-        # This ensures that each node is unreachable and therefore eligible for
-        # garbage collection. "del" is also called for each node, but it is
-        # unclear whether this actually has any effect, of just removes the
-        # binding to nobj
-        nobj = self.first
-        # The references first and last are removed so that the nodes are not
-        # reachable from these
-        self.first = None
-        self.last = None
-        # The references from self.data are removed
         self.data.clear()
-        while nobj is not None and nobj.next is not None:
-            # each node except the last is processed
-            nobj.next.prev = None
-            nextobj = nobj.next
-            nobj.next = None
-            del nobj
-            nobj = nextobj
-        if nobj is not None:
-            # The last node is processed
-            del nobj
+        self.sizes.clear()
+        self.total_size = 0
+
+    def get_stats(self):
+        """
+        Return a dictionary with the limits, the use and the hit, miss and
+        eviction counts of the LRU.
+        """
+        lookups = self.hits + self.misses
+        return {'name': self.name,
+                'count': self.count,
+                'size': self.size,
+                'entries': len(self.data),
+                'total_size': (self.total_size if self.size is not None
+                               else None),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else None}
+
+    def reset_stats(self):
+        """
+        Set the hit, miss and eviction counts to zero.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+#-------------------------------------------------------------------------
+#
+# Diagnostics
+#
+#-------------------------------------------------------------------------
+def get_cache_stats(name=None):
+    """
+    Return the statistics of the named LRU caches in use, or of the caches
+    with the given name, sorted by name. See :meth:`LRU.get_stats`.
+    """
+    return sorted((cache.get_stats() for cache in list(_CACHES)
+                   if name is None or cache.name == name),
+                  key=lambda stats: stats['name'])
@@ -0,0 +1,86 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for lru.py """
+
+import unittest
+
+from ..lru import LRU, get_cache_stats
+
+class LRUTest(unittest.TestCase):
+
+    def test_count(self):
+        lru = LRU(3)
+        for key in 'abcd':
+            lru[key] = key.upper()
+        self.assertEqual(lru.keys(), ['b', 'c', 'd'])
+        self.assertEqual(lru['b'], 'B')
+        lru['e'] = 'E'
+        self.assertEqual(lru.items(), [('d', 'D'), ('b', 'B'), ('e', 'E')])
+        self.assertEqual(list(lru), ['D', 'B', 'E'])
+        del lru['b']
+        self.assertNotIn('b', lru)
+        self.assertEqual(lru.values(), ['D', 'E'])
+        lru.clear()
+        self.assertEqual(len(lru), 0)
+
+    def test_disabled(self):
+        lru = LRU(1)
+        lru['a'] = 'A'
+        self.assertNotIn('a', lru)
+
+    def test_size(self):
+        lru = LRU(100, size=10, sizeof=len)
+        lru['a'] = 'xxxx'
+        lru['b'] = 'xxxx'
+        self.assertEqual(lru.keys(), ['a', 'b'])
+        lru['c'] = 'xx'
+        self.assertEqual(lru.keys(), ['b', 'c'])
+        lru['b'] = 'x'
+        self.assertEqual(lru.total_size, 5)
+        del lru['c']
+        self.assertEqual(lru.total_size, 2)
+        lru['d'] = 'x' * 20
+        self.assertEqual(len(lru), 0)
+        self.assertEqual(lru.total_size, 0)
+
+    def test_stats(self):
+        lru = LRU(2, name='lru-test')
+        lru['a'] = 1
+        lru['b'] = 2
+        lru['c'] = 3
+        self.assertEqual(lru.get('c'), 3)
+        self.assertIsNone(lru.get('a'))
+        with self.assertRaises(KeyError):
+            lru['a']
+        stats = get_cache_stats('lru-test')
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['entries'], 2)
+        self.assertEqual(stats[0]['hits'], 1)
+        self.assertEqual(stats[0]['misses'], 2)
+        self.assertEqual(stats[0]['evictions'], 1)
+        self.assertAlmostEqual(stats[0]['hit_ratio'], 1 / 3)
+        lru.reset_stats()
+        self.assertIsNone(lru.get_stats()['hit_ratio'])
+        del lru
+        self.assertEqual(get_cache_stats('lru-test'), [])
+
+if __name__ == "__main__":
+    unittest.main()
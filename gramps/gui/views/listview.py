@@ -796,6 +796,32 @@ class ListView(NavigationView):
         else:
             self.dirty = True
 
+    def batch_build(self, *args):
+        """
+        Called when many objects may have changed, as after a batch
+        transaction. If the changes are known and there are not too many of
+        them, they are applied to the model, otherwise the tree is rebuilt.
+        """
+        if (self.model and not self.dirty and
+                (self.active or not self._dirty_on_change_inactive)):
+            handles = self.model.get_changed_handles()
+            if handles is not None:
+                cput = time.clock()
+                self.list.set_model(None)
+                self.model.apply_changes(handles)
+                self.list.set_model(self.model)
+                LOG.debug('   ' + self.__class__.__name__ + ' batch_build ' +
+                          str(len(handles)) + ' rows ' +
+                          str(time.clock() - cput) + ' sec')
+                if self.active:
+                    self.bookmarks.redraw()
+                    self.goto_active(None)
+                    self.uistate.show_filter_results(self.dbstate,
+                                                     self.model.displayed(),
+                                                     self.model.total())
+                return
+        self.object_build()
+
     def object_build(self, *args):
         """
         Called when the tree must be rebuilt and bookmarks redrawn.
@@ -27,15 +27,33 @@
 #-------------------------------------------------------------------------
 from gramps.gen.utils.lru import LRU
 from gramps.gen.config import config
+from gramps.gen.db.dbconst import KEY_TO_CLASS_MAP, CLASS_TO_KEY_MAP
+from gramps.gen.filters import GenericFilter
+from gramps.gen.filters.rules import Rule
+
+# Largest number of changed objects that are applied to a model, rather than
+# building the model again.
+MAX_CHANGES = 5000
 
 class BaseModel:
 
     # LRU cache size
     _CACHE_SIZE = config.get('interface.treemodel-cache-size')
+    # Memory limit of each LRU cache in bytes, or None
+    _CACHE_MEMORY = (config.get('interface.treemodel-cache-memory')
+                     * 1024 * 1024 or None)
+
+    # Type of the objects of the model, eg PERSON_KEY
+    obj_key = None
 
     def __init__(self):
-        self.lru_data  = LRU(BaseModel._CACHE_SIZE)
-        self.lru_path = LRU(BaseModel._CACHE_SIZE)
+        self.lru_data = LRU(BaseModel._CACHE_SIZE, BaseModel._CACHE_MEMORY,
+                            name='treemodel-data')
+        self.lru_path = LRU(BaseModel._CACHE_SIZE, BaseModel._CACHE_MEMORY,
+                            name='treemodel-path')
+        # Change count of the database when the model was last brought up
+        # to date
+        self.change_count = None
 
     def destroy(self):
         """
@@ -62,10 +80,9 @@ class BaseModel:
         Get the value of a "col". col may be a number (position in a model)
         or a name (special value used by view).
         """
-        if handle in self.lru_data and col in self.lru_data[handle]:
-            #print("hit", handle, col)
-            return (True, self.lru_data[handle][col])
-        #print("MISS", handle, col)
+        row = self.lru_data.get(handle)
+        if row is not None and col in row:
+            return (True, row[col])
         return (False, None)
 
     def set_cached_value(self, handle, col, data):
@@ -83,8 +100,9 @@ class BaseModel:
         """
         Saves the Gtk iter path.
         """
-        if handle in self.lru_path:
-            return (True, self.lru_path[handle])
+        path = self.lru_path.get(handle)
+        if path is not None:
+            return (True, path)
         return (False, None)
 
     def set_cached_path(self, handle, path):
@@ -99,3 +117,55 @@ class BaseModel:
         Clear path cache for all.
         """
         self.lru_path.clear()
+
+    def get_changed_handles(self):
+        """
+        Return the handles of the objects of the model that changed since the
+        model was built: the objects written or removed, and the objects that
+        refer to changed objects of another type, directly or through one
+        other object, such as a person whose birth place changed. Return None
+        if the changes are not known, if there are too many of them, or if
+        the filter of the model depends on other objects.
+        """
+        if self.obj_key is None or self.change_count is None:
+            return None
+        if (isinstance(self.search, GenericFilter) and
+                self.search.get_cache_scope() != Rule.CACHE_OBJECT):
+            # The filter may match other objects after the changes, such as
+            # the ancestors of a changed person
+            return None
+        handles = set()
+        others = set()
+        for obj_key in CLASS_TO_KEY_MAP.values():
+            changed = self.db.get_changed_handles(self.change_count, obj_key)
+            if changed is None:
+                return None
+            if obj_key == self.obj_key:
+                handles.update(changed)
+            else:
+                others.update(changed)
+        class_name = KEY_TO_CLASS_MAP[self.obj_key]
+        todo = others
+        for include_classes in (None, [class_name]):
+            if len(handles) + len(todo) > MAX_CHANGES:
+                return None
+            refs = set()
+            for handle in todo:
+                for ref_class, ref_handle in self.db.find_backlink_handles(
+                        handle, include_classes):
+                    if ref_class == class_name:
+                        handles.add(ref_handle)
+                    else:
+                        refs.add(ref_handle)
+            todo = refs - others
+        if len(handles) > MAX_CHANGES:
+            return None
+        return handles
+
+    def apply_changes(self, handles):
+        """
+        Update the rows of the objects with the given handles, which are
+        returned by :meth:`get_changed_handles`. The model should not be
+        attached to a view while it is updated.
+        """
+        raise NotImplementedError
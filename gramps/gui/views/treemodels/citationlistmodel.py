@@ -44,6 +44,7 @@ from gi.repository import Gtk
 # Gramps modules
 #
 #-------------------------------------------------------------------------
+from gramps.gen.db.dbconst import CITATION_KEY
 from .flatbasemodel import FlatBaseModel
 from .citationbasemodel import CitationBaseModel
 
@@ -56,6 +57,8 @@ class CitationListModel(CitationBaseModel, FlatBaseModel):
     """
     Flat citation model.  (Original code in CitationBaseModel).
     """
+    obj_key = CITATION_KEY
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
         self.map = db.get_raw_citation_data
@@ -41,6 +41,7 @@ from gi.repository import Gtk
 #-------------------------------------------------------------------------
 from gramps.gen.datehandler import format_time, get_date, get_date_valid
 from gramps.gen.lib import Event, EventType
+from gramps.gen.db.dbconst import EVENT_KEY
 from gramps.gen.utils.db import get_participant_from_event
 from gramps.gen.display.place import displayer as place_displayer
 from gramps.gen.config import config
@@ -71,6 +72,10 @@ INVALID_DATE_FORMAT = config.get('preferences.invalid-date-format')
 #-------------------------------------------------------------------------
 class EventModel(FlatBaseModel):
 
+    obj_key = EVENT_KEY
+    # description, id, type, date, private, tags and change
+    indexed_sort_cols = (0, 1, 2, 3, 5, 6, 7)
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
         self.gen_cursor = db.get_event_cursor
@@ -53,7 +53,11 @@ It keeps a FlatNodeMap, and obtains data from database as needed
 #-------------------------------------------------------------------------
 import logging
 import bisect
+import heapq
+import hashlib
 import time
+import weakref
+from collections import OrderedDict
 
 _LOG = logging.getLogger(".gui.basetreemodel")
 
@@ -72,8 +76,39 @@ from gi.repository import Gtk
 #-------------------------------------------------------------------------
 from gramps.gen.filters import SearchFilter, ExactSearchFilter
 from gramps.gen.const import GRAMPS_LOCALE as glocale
+from gramps.gen.config import config
+from gramps.gen.display.name import displayer as name_displayer
 from .basemodel import BaseModel
 
+#-------------------------------------------------------------------------
+#
+# Sort index
+#
+#-------------------------------------------------------------------------
+
+# Smallest number of objects for which the rows of a model are fetched a
+# page at a time
+WINDOW_MIN_ROWS = 20000
+# Number of rows in a page, and number of pages kept in memory
+PAGE_SIZE = 200
+PAGE_CACHE = 20
+
+# The windows in use, by name of the sort index
+_WINDOWS = weakref.WeakValueDictionary()
+
+def sort_signature():
+    """
+    Return a description of the settings that the sort keys of the models
+    depend on: the locale, the name formats and the preferences.
+    """
+    settings = [glocale.get_collation(), glocale.lang,
+                name_displayer.get_default_format(),
+                name_displayer.get_name_format(also_default=True,
+                                               only_active=False)]
+    settings.extend((name, config.get('preferences.' + name)) for name
+                    in sorted(config.get_section_settings('preferences')))
+    return hashlib.md5(repr(settings).encode('utf-8')).hexdigest()
+
 #-------------------------------------------------------------------------
 #
 # FlatNodeMap
@@ -172,6 +207,33 @@ class FlatNodeMap:
         self._reverse = reverse
         self.reverse_order()
 
+    def update_path_map(self, handles, index2hndllist, fullhndllist):
+        """
+        Replace the (sortkey, handle) values of the objects with the given
+        handles by new values. The new values are merged into the maps in a
+        single pass, rather than inserted one at a time.
+
+        :param handles: the handles of the objects that changed
+        :type handles: set
+        :param index2hndllist: the sorted (sortkey, handle) values of the
+                    changed objects that must be shown
+        :type index2hndllist: a list of (sortkey, handle) tuples
+        :param fullhndllist: the sorted (sortkey, handle) values of all changed
+                    objects that still exist. Not used if the maps are
+                    identical.
+        :type fullhndllist: a list of (sortkey, handle) tuples
+        """
+        index2hndl = list(heapq.merge(
+            [key for key in self._index2hndl if key[1] not in handles],
+            index2hndllist))
+        if self._identical:
+            fullhndl = index2hndl
+        else:
+            fullhndl = list(heapq.merge(
+                [key for key in self._fullhndl if key[1] not in handles],
+                fullhndllist))
+        self.set_path_map(index2hndl, fullhndl, self._identical, self._reverse)
+
     def full_srtkey_hndl_map(self):
         """
         The list of all possible (sortkey, handle) tuples.
@@ -434,6 +496,242 @@ class FlatNodeMap:
             self._hndl2index[hndl] -= 1
         return Gtk.TreePath((delpath,))
 
+#-------------------------------------------------------------------------
+#
+# SortIndexWindow
+#
+#-------------------------------------------------------------------------
+class SortIndexWindow:
+    """
+    A read-only sequence of the sorted (sortkey, handle) pairs of a sort
+    index of the database, which is used as index2hndl list by the
+    WindowedNodeMap.
+
+    The pairs are fetched a page at a time, together with the next page. A
+    page following a page in memory is fetched starting from the last pair
+    of that page, so that scrolling down does not skip rows in the backend.
+    The pages used last are kept in memory.
+    """
+
+    def __init__(self, db, name, size):
+        self.db = db
+        self.name = name
+        self.size = size
+        self._pages = OrderedDict()
+        self._handles = {}
+
+    def destroy(self):
+        """
+        Unset all elements that can prevent garbage collection
+        """
+        self.db = None
+        self.clear()
+
+    def clear(self):
+        """
+        Forget the pages in memory, after the sort index changed.
+        """
+        self._pages.clear()
+        self._handles.clear()
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.size))]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('index %d out of range' % index)
+        page, offset = divmod(index, PAGE_SIZE)
+        return self._get_page(page)[offset]
+
+    def _get_page(self, page):
+        """
+        Return the pairs of a page.
+        """
+        rows = self._pages.get(page)
+        if rows is None:
+            previous = self._pages.get(page - 1)
+            if previous and len(previous) == PAGE_SIZE:
+                rows = self.db.get_sort_keys(self.name, start=previous[-1],
+                                             limit=2 * PAGE_SIZE)
+            else:
+                rows = self.db.get_sort_keys(self.name,
+                                             offset=page * PAGE_SIZE,
+                                             limit=2 * PAGE_SIZE)
+            if len(rows) > PAGE_SIZE and page + 1 not in self._pages:
+                self._add_page(page + 1, rows[PAGE_SIZE:])
+            rows = rows[:PAGE_SIZE]
+            self._add_page(page, rows)
+        self._pages.move_to_end(page)
+        return rows
+
+    def _add_page(self, page, rows):
+        """
+        Keep the pairs of a page in memory.
+        """
+        self._pages[page] = rows
+        start = page * PAGE_SIZE
+        for offset, (key, handle) in enumerate(rows):
+            self._handles[handle] = start + offset
+        while len(self._pages) > PAGE_CACHE:
+            for key, handle in self._pages.popitem(last=False)[1]:
+                self._handles.pop(handle, None)
+
+    def find(self, handle):
+        """
+        Return the index of the pair of the object, or None if the object is
+        not in the sort index.
+        """
+        index = self._handles.get(handle)
+        if index is None:
+            key = self.db.get_sort_key(self.name, handle)
+            if key is not None:
+                index = self.db.count_sort_keys(self.name, (key, handle))
+        return index
+
+    def get_sortkey(self, handle):
+        """
+        Return the sort key of the object, or None.
+        """
+        index = self._handles.get(handle)
+        if index is not None:
+            return self[index][0]
+        return self.db.get_sort_key(self.name, handle)
+
+    def insert(self, srtkey_hndl):
+        """
+        Add a pair to the sort index and return its index.
+        """
+        self.db.set_sort_keys(self.name, [srtkey_hndl])
+        self.clear()
+        self.size = self.db.count_sort_keys(self.name)
+        return self.db.count_sort_keys(self.name, srtkey_hndl)
+
+    def delete(self, handle):
+        """
+        Remove the pair of the object from the sort index.
+        """
+        self.db.remove_sort_keys(self.name, [handle])
+        self.clear()
+        self.size = self.db.count_sort_keys(self.name)
+
+#-------------------------------------------------------------------------
+#
+# WindowedNodeMap
+#
+#-------------------------------------------------------------------------
+class WindowedNodeMap(FlatNodeMap):
+    """
+    A FlatNodeMap of which only the shown part is in memory. The index2hndl
+    list is a SortIndexWindow, and the hndl2index map is replaced by queries
+    of the sort index. It is only used to show all objects, without search
+    or filter.
+
+    When the maps are set with set_path_map or cleared, the window is
+    dropped and the map works as a FlatNodeMap.
+    """
+
+    def __init__(self, window, reverse=False):
+        FlatNodeMap.__init__(self)
+        self._window = window
+        self._index2hndl = window
+        self._fullhndl = window
+        self._reverse = reverse
+
+    def _drop_window(self):
+        """
+        Stop fetching the rows from the sort index.
+        """
+        if self._window is not None:
+            self._window.destroy()
+            self._window = None
+
+    def destroy(self):
+        """
+        Unset all elements that can prevent garbage collection
+        """
+        self._drop_window()
+        FlatNodeMap.destroy(self)
+
+    def set_path_map(self, index2hndllist, fullhndllist, identical=True,
+                     reverse=False):
+        self._drop_window()
+        FlatNodeMap.set_path_map(self, index2hndllist, fullhndllist,
+                                 identical, reverse)
+
+    def clear_map(self):
+        self._drop_window()
+        FlatNodeMap.clear_map(self)
+
+    def full_srtkey_hndl_map(self):
+        """
+        The rows are not in memory, so no list is returned.
+        """
+        if self._window is None:
+            return FlatNodeMap.full_srtkey_hndl_map(self)
+        return []
+
+    def reverse_order(self):
+        """
+        Reverse the order in which the rows are shown.
+        """
+        if self._window is None:
+            FlatNodeMap.reverse_order(self)
+        else:
+            self._reverse = not self._reverse
+
+    def real_path(self, index):
+        if self._window is None:
+            return FlatNodeMap.real_path(self, index)
+        if self._reverse:
+            return len(self._window) - 1 - index
+        return index
+
+    def real_index(self, path):
+        if self._window is None:
+            return FlatNodeMap.real_index(self, path)
+        return self.real_path(path)
+
+    def get_path_from_handle(self, handle):
+        if self._window is None:
+            return FlatNodeMap.get_path_from_handle(self, handle)
+        index = self._window.find(handle)
+        if index is None:
+            return None
+        return Gtk.TreePath((self.real_path(index),))
+
+    def get_sortkey(self, handle):
+        if self._window is None:
+            return FlatNodeMap.get_sortkey(self, handle)
+        return self._window.get_sortkey(handle)
+
+    def new_iter(self, handle):
+        if self._window is None:
+            return FlatNodeMap.new_iter(self, handle)
+        iter = Gtk.TreeIter()
+        iter.stamp = self.stamp
+        iter.user_data = self._window.find(handle)
+        return iter
+
+    def insert(self, srtkey_hndl, allkeyonly=False):
+        if self._window is None:
+            return FlatNodeMap.insert(self, srtkey_hndl, allkeyonly)
+        index = self._window.insert(srtkey_hndl)
+        return Gtk.TreePath((self.real_path(index),))
+
+    def delete(self, srtkey_hndl):
+        if self._window is None:
+            return FlatNodeMap.delete(self, srtkey_hndl)
+        index = self._window.find(srtkey_hndl[1])
+        if index is None:
+            return None
+        delpath = self.real_path(index)
+        self._window.delete(srtkey_hndl[1])
+        return Gtk.TreePath((delpath,))
+
 #-------------------------------------------------------------------------
 #
 # FlatBaseModel
@@ -445,8 +743,19 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
     It keeps a FlatNodeMap, and obtains data from database as needed
     ..Note: glocale.sort_key is applied to the underlying sort key,
             so as to have localized sort
+
+    If the model sorts on one of the columns in indexed_sort_cols, the sort
+    keys are stored in a sort index of the database, so that they are only
+    computed again for the objects that changed. Only columns whose value
+    depends on nothing but the object, the objects it refers to and the
+    settings in :func:`sort_signature` may be indexed. If such a model shows
+    all objects of a large database, the rows are fetched from the sort index
+    a page at a time by a WindowedNodeMap.
     """
 
+    # Columns of smap whose sort keys can be stored in the database
+    indexed_sort_cols = ()
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(),
                  sort_map=None):
@@ -473,6 +782,10 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         # get the function that maps data to sort_keys
         self.sort_func = lambda x: glocale.sort_key(self.smap[col](x))
         self.sort_col = scol
+        if self.obj_key is not None and col in self.indexed_sort_cols:
+            self.sort_index = '%s_%d' % (self.__class__.__name__, col)
+        else:
+            self.sort_index = None
         self.skip = skip
         self._in_build = False
 
@@ -561,6 +874,10 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         be shown.
         This list is sorted ascending, via localized string sort.
         """
+        if self.sort_index is not None:
+            srt_keys = self._indexed_sort_keys()
+            if srt_keys is not None:
+                return srt_keys
         # use cursor as a context manager
         with self.gen_cursor() as cursor:
             #loop over database and store the sort field, and the handle
@@ -569,6 +886,84 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
             srt_keys.sort()
             return srt_keys
 
+    def _update_sort_index(self):
+        """
+        Compute and store the sort keys of the objects that have no
+        up-to-date key in the sort index of the database. Return the sorted
+        list of the new (sort_key, handle) pairs, or None if the database does
+        not store sort keys.
+        """
+        missing = self.db.get_sort_index(self.obj_key, self.sort_index,
+                                         sort_signature())
+        if missing is None:
+            return None
+        if 2 * len(missing) > self.db.get_number_of(self.obj_key):
+            # Reading all objects is faster than looking up most of them
+            missing = set(missing)
+            with self.gen_cursor() as cursor:
+                new_keys = [(self.sort_func(data), key)
+                            for key, data in cursor if key in missing]
+        else:
+            new_keys = [(self.sort_func(data), key) for key, data
+                        in self.db.get_raw_data_many(self.obj_key,
+                                                     missing).items()]
+        new_keys.sort()
+        self.db.set_sort_keys(self.sort_index, new_keys)
+        return new_keys
+
+    def _indexed_sort_keys(self):
+        """
+        Return the sorted (sort_key, handle) list from the sort index of the
+        database, or None if the database does not store sort keys.
+        """
+        new_keys = self._update_sort_index()
+        if new_keys is None:
+            return None
+        srt_keys = self.db.get_sort_keys(self.sort_index)
+        if not new_keys:
+            return srt_keys
+        new_handles = set(handle for key, handle in new_keys)
+        return list(heapq.merge([key for key in srt_keys
+                                 if key[1] not in new_handles], new_keys))
+
+    def _build_window(self):
+        """
+        Set up a node map that fetches the rows a page at a time from the
+        sort index of the database, if the database stores sort keys and
+        holds enough objects. Return True if this is done.
+        """
+        if self.sort_index is None or self.db.readonly:
+            return False
+        window = _WINDOWS.get(self.sort_index)
+        if window is not None and window.db is self.db:
+            # The sort index is already changed by another windowed model
+            return False
+        if self._update_sort_index() is None:
+            return False
+        size = self.db.get_number_of(self.obj_key)
+        if size < WINDOW_MIN_ROWS:
+            return False
+        window = SortIndexWindow(self.db, self.sort_index, size)
+        _WINDOWS[self.sort_index] = window
+        self.node_map = WindowedNodeMap(window, self._reverse)
+        return True
+
+    def _all_keys(self, window):
+        """
+        Return the (sort_key, handle) list of all data that can maximally be
+        shown, or None if window is True and the rows are fetched a page at a
+        time instead.
+        """
+        allkeys = self.node_map.full_srtkey_hndl_map()
+        if allkeys:
+            return allkeys
+        if isinstance(self.node_map, WindowedNodeMap):
+            self.node_map.destroy()
+            self.node_map = FlatNodeMap()
+        if window and self._build_window():
+            return None
+        return self.sort_keys()
+
     def _rebuild_search(self, ignore=None):
         """ function called when view must be build, given a search text
             in the top search bar
@@ -576,9 +971,12 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         self.clear_cache()
         self._in_build = True
         if (self.db is not None) and self.db.is_open():
-            allkeys = self.node_map.full_srtkey_hndl_map()
-            if not allkeys:
-                allkeys = self.sort_keys()
+            self.change_count = self.db.get_change_count()
+            allkeys = self._all_keys(not (self.search and self.search.text)
+                                     and ignore is None and not self.skip)
+            if allkeys is None:
+                self._in_build = False
+                return
             if self.search and self.search.text:
                 dlist = [h for h in allkeys
                              if self.search.match(h[1], self.db) and
@@ -605,9 +1003,11 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         self.clear_cache()
         self._in_build = True
         if (self.db is not None) and self.db.is_open():
-            allkeys = self.node_map.full_srtkey_hndl_map()
-            if not allkeys:
-                allkeys = self.sort_keys()
+            self.change_count = self.db.get_change_count()
+            allkeys = self._all_keys(not self.search and ignore is None)
+            if allkeys is None:
+                self._in_build = False
+                return
             if self.search:
                 ident = False
                 if ignore is None:
@@ -628,6 +1028,38 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
             self.node_map.clear_map()
         self._in_build = False
 
+    def get_changed_handles(self):
+        """
+        See :meth:`BaseModel.get_changed_handles`. A model whose rows are
+        fetched from the sort index is built again instead, which only
+        computes the sort keys of the changed objects.
+        """
+        if isinstance(self.node_map, WindowedNodeMap):
+            return None
+        return BaseModel.get_changed_handles(self)
+
+    def apply_changes(self, handles):
+        """
+        See :meth:`BaseModel.apply_changes`. No row signals are emitted.
+        """
+        self.clear_cache()
+        self._in_build = True
+        self.change_count = self.db.get_change_count()
+        allkeys = sorted((self.sort_func(data), handle) for handle, data
+                         in self.db.get_raw_data_many(self.obj_key,
+                                                      list(handles)).items())
+        if self.search and self.rebuild_data == self._rebuild_filter:
+            dlist = self.search.apply(self.db, [key for key in allkeys
+                                                if key[1] not in self.skip],
+                                      tupleind=1)
+        elif self.search and self.search.text:
+            dlist = [key for key in allkeys if key[1] not in self.skip and
+                     self.search.match(key[1], self.db)]
+        else:
+            dlist = [key for key in allkeys if key[1] not in self.skip]
+        self.node_map.update_path_map(handles, dlist, allkeys)
+        self._in_build = False
+
     def add_row_by_handle(self, handle):
         """
         Add a row. This is called after object with handle is created.
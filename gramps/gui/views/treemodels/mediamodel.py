@@ -43,6 +43,7 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 from gramps.gen.datehandler import displayer, format_time
 from gramps.gen.lib import Date, Media
+from gramps.gen.db.dbconst import MEDIA_KEY
 from .flatbasemodel import FlatBaseModel
 
 #-------------------------------------------------------------------------
@@ -52,6 +53,8 @@ from .flatbasemodel import FlatBaseModel
 #-------------------------------------------------------------------------
 class MediaModel(FlatBaseModel):
 
+    obj_key = MEDIA_KEY
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
         self.gen_cursor = db.get_media_cursor
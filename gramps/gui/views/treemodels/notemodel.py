@@ -43,6 +43,7 @@ from gramps.gen.datehandler import format_time
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 from .flatbasemodel import FlatBaseModel
 from gramps.gen.lib import (Note, NoteType, StyledText)
+from gramps.gen.db.dbconst import NOTE_KEY
 
 #-------------------------------------------------------------------------
 #
@@ -52,6 +53,8 @@ from gramps.gen.lib import (Note, NoteType, StyledText)
 class NoteModel(FlatBaseModel):
     """
     """
+    obj_key = NOTE_KEY
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
         """Setup initial values for instance variables."""
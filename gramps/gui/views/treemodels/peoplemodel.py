@@ -31,6 +31,7 @@ TreeModel for the Gramps Person tree.
 #
 #-------------------------------------------------------------------------
 from html import escape
+import weakref
 
 #-------------------------------------------------------------------------
 #
@@ -55,11 +56,15 @@ _LOG = logging.getLogger(".")
 #-------------------------------------------------------------------------
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
-from gramps.gen.lib import (Name, EventRef, EventType, EventRoleType,
-                            FamilyRelType, ChildRefType, NoteType)
+from gramps.gen.lib import (Name, Event, EventRef, EventType, EventRoleType,
+                            Family, FamilyRelType, ChildRefType, Note,
+                            NoteType)
 from gramps.gen.display.name import displayer as name_displayer
 from gramps.gen.display.place import displayer as place_displayer
 from gramps.gen.datehandler import format_time, get_date, get_date_valid
+from gramps.gen.db.dbconst import (PERSON_KEY, FAMILY_KEY, EVENT_KEY,
+                                   PLACE_KEY, NOTE_KEY)
+from gramps.gen.utils.lru import LRU
 from .flatbasemodel import FlatBaseModel
 from .treebasemodel import TreeBaseModel
 from .basemodel import BaseModel
@@ -85,6 +90,304 @@ COLUMN_PRIV   = 19
 
 invalid_date_format = config.get('preferences.invalid-date-format')
 
+#-------------------------------------------------------------------------
+#
+# PeopleRowCache
+#
+#-------------------------------------------------------------------------
+
+# Groups of derived values, which are computed together
+_EVENTS = 'events'
+_FAMILIES = 'families'
+_NOTES = 'notes'
+
+# Number of rows whose derived data is computed together
+PREFETCH_ROWS = 50
+
+# Largest number of changed objects for which the derived data of the
+# affected people is looked up, instead of clearing all data
+MAX_CHANGES = 100
+
+class PersonRow:
+    """
+    Derived data of a person, as shown in the columns of the people views.
+    A group of values is None until it is computed.
+    """
+    __slots__ = ('events', 'birth_day', 'sort_birth_day', 'birth_place',
+                 'death_day', 'sort_death_day', 'death_place',
+                 'families', 'spouse', 'parents', 'marriages', 'children',
+                 'notes', 'todo')
+
+    def __init__(self):
+        self.events = None
+        self.families = None
+        self.notes = None
+
+class PeopleRowCache:
+    """
+    Derived data of the people of a database, shared by the people views.
+
+    The data is computed for a batch of people at a time, reading the
+    objects they refer to with a few queries. If the database counts its
+    changes, the data of the people affected by changes is dropped when the
+    cache is used, and the cache is shared by all views of the database.
+    Otherwise the views clear it when they are rebuilt.
+    """
+
+    def __init__(self, db, count, size=None):
+        self.rows = LRU(count, size, name='people-rows')
+        self.count = db.get_change_count()
+        self.shared = self.count is not None
+        self.settings = None
+
+    def clear(self):
+        """
+        Remove the data of all people.
+        """
+        self.rows.clear()
+
+    def discard(self, handle):
+        """
+        Remove the data of a person.
+        """
+        if handle in self.rows:
+            del self.rows[handle]
+
+    def check_settings(self):
+        """
+        Clear the cache if the display settings changed.
+        """
+        settings = (name_displayer.get_default_format(),
+                    config.get('preferences.date-format'),
+                    tuple(config.get('preferences.place-' + name) for name
+                          in ('auto', 'number', 'reverse', 'restrict',
+                              'lang')))
+        if settings != self.settings:
+            self.settings = settings
+            self.clear()
+
+    def get(self, handle):
+        """
+        Return the derived data of a person, or None.
+        """
+        return self.rows.get(handle)
+
+    def update(self, db):
+        """
+        Drop the data of the people affected by the changes made to the
+        database since the cache was last used.
+        """
+        if not self.shared:
+            return
+        count = db.get_change_count()
+        if count == self.count:
+            return
+        changes = {}
+        for obj_key in (PERSON_KEY, FAMILY_KEY, EVENT_KEY, NOTE_KEY,
+                        PLACE_KEY):
+            changes[obj_key] = db.get_changed_handles(self.count, obj_key)
+        self.count = count
+        if (None in changes.values() or changes[PLACE_KEY] or
+                sum(len(handles) for handles in changes.values())
+                > MAX_CHANGES):
+            # Places are shown with the places that enclose them
+            self.clear()
+            return
+        affected = set(changes[PERSON_KEY])
+        families = set(changes[FAMILY_KEY])
+        for handle in changes[PERSON_KEY]:
+            # The name of a spouse is shown
+            families.update(ref for (cls, ref) in db.find_backlink_handles(
+                handle, ['Family']))
+        for handle in (families | changes[EVENT_KEY] | changes[NOTE_KEY]):
+            affected.update(ref for (cls, ref) in db.find_backlink_handles(
+                handle, ['Person']))
+        for handle in affected:
+            self.discard(handle)
+
+    def compute(self, db, group, data, handles):
+        """
+        Compute a group of values for a person, given by its raw data, and
+        for the other people with the given handles. Return the derived data
+        of the person.
+        """
+        people = {data[0]: data}
+        todo = [handle for handle in handles if handle not in people and
+                getattr(self.get(handle), group, None) is None]
+        if todo:
+            people.update(db.get_raw_data_many(PERSON_KEY, todo))
+        rows = {}
+        for handle in people:
+            row = self.get(handle)
+            if row is None:
+                row = PersonRow()
+                self.rows[handle] = row
+            rows[handle] = row
+        if group == _EVENTS:
+            self.__compute_events(db, people, rows)
+        elif group == _FAMILIES:
+            self.__compute_families(db, people, rows)
+        else:
+            self.__compute_notes(db, people, rows)
+        return rows[data[0]]
+
+    def __compute_events(self, db, people, rows):
+        refs = {}
+        for handle, data in people.items():
+            refs[handle] = []
+            for event_ref in data[COLUMN_EVENT]:
+                ref = EventRef()
+                ref.unserialize(event_ref)
+                refs[handle].append(ref)
+        events = db.get_raw_data_many(EVENT_KEY, set(
+            ref.ref for ref_list in refs.values() for ref in ref_list))
+        events = dict((handle, Event.create(raw))
+                      for handle, raw in events.items())
+        for handle, data in people.items():
+            row = rows[handle]
+            ref_list = [(ref, events.get(ref.ref)) for ref in refs[handle]]
+            (row.birth_day, row.sort_birth_day, row.birth_place) = \
+                _get_event_data(db, ref_list, data[COLUMN_BIRTH],
+                                [EventType.BAPTISM, EventType.CHRISTEN])
+            (row.death_day, row.sort_death_day, row.death_place) = \
+                _get_event_data(db, ref_list, data[COLUMN_DEATH],
+                                [EventType.BURIAL, EventType.CREMATION,
+                                 EventType.CAUSE_DEATH])
+            row.events = True
+
+    def __compute_families(self, db, people, rows):
+        family_handles = set()
+        for data in people.values():
+            family_handles.update(data[COLUMN_FAMILY])
+            family_handles.update(data[COLUMN_PARENT][:1])
+        families = db.get_raw_data_many(FAMILY_KEY, family_handles)
+        families = dict((handle, Family.create(raw))
+                        for handle, raw in families.items())
+        spouse_handles = set()
+        for family in families.values():
+            spouse_handles.update((family.get_father_handle(),
+                                   family.get_mother_handle()))
+        spouse_handles.discard(None)
+        spouse_handles.discard('')
+        spouses = db.get_raw_data_many(PERSON_KEY, spouse_handles)
+        for handle, data in people.items():
+            row = rows[handle]
+            row.parents = 0
+            if data[COLUMN_PARENT]:
+                family = families.get(data[COLUMN_PARENT][0])
+                if family:
+                    row.parents = ((1 if family.get_father_handle() else 0) +
+                                   (1 if family.get_mother_handle() else 0))
+            names = []
+            row.marriages = 0
+            row.children = 0
+            for family_handle in data[COLUMN_FAMILY]:
+                family = families.get(family_handle)
+                if not family:
+                    continue
+                for spouse_handle in [family.get_father_handle(),
+                                      family.get_mother_handle()]:
+                    if spouse_handle and spouse_handle != handle:
+                        spouse = spouses.get(spouse_handle)
+                        if spouse:
+                            names.append(name_displayer.raw_display_name(
+                                spouse[COLUMN_NAME]))
+                if int(family.get_relationship()) == FamilyRelType.MARRIED:
+                    row.marriages += 1
+                for child_ref in family.get_child_ref_list():
+                    if (child_ref.get_father_relation() ==
+                            ChildRefType.BIRTH and
+                            child_ref.get_mother_relation() ==
+                            ChildRefType.BIRTH):
+                        row.children += 1
+            row.spouse = ", ".join(names)
+            row.families = True
+
+    def __compute_notes(self, db, people, rows):
+        notes = db.get_raw_data_many(NOTE_KEY, set(
+            handle for data in people.values()
+            for handle in data[COLUMN_NOTES]))
+        todo = set(handle for handle, raw in notes.items()
+                   if int(Note.create(raw).get_type()) == NoteType.TODO)
+        for handle, data in people.items():
+            row = rows[handle]
+            row.todo = len([note for note in data[COLUMN_NOTES]
+                            if note in todo])
+            row.notes = True
+
+def _get_date_data(event, fallback):
+    """
+    Return the displayed date and the sort value of the date of an event.
+    """
+    sort_value = "%09d" % event.get_date_object().get_sort_value()
+    date_str = get_date(event)
+    if fallback:
+        date_str = "<i>%s</i>" % escape(date_str)
+    else:
+        date_str = escape(date_str)
+    if not get_date_valid(event):
+        if date_str:
+            date_str = invalid_date_format % date_str
+        sort_value = invalid_date_format % sort_value
+    return date_str, sort_value
+
+def _get_event_data(db, ref_list, index, fallback_types):
+    """
+    Return the displayed date, the sort value of the date and the place of
+    the event with the given index in the event references of a person, or
+    of the first event of one of the fallback types in which the person has
+    the primary role.
+
+    :param ref_list: list of (EventRef, Event) of the person, where the event
+                     is None if it does not exist.
+    """
+    date_data = None
+    place = None
+    if index != -1:
+        if index < len(ref_list) and ref_list[index][1]:
+            event = ref_list[index][1]
+            date_data = _get_date_data(event, False)
+            title = place_displayer.display_event(db, event)
+            if title:
+                place = escape(title)
+        else:
+            date_data = ('', '')
+            place = ''
+    for ref, event in ref_list:
+        if date_data is not None and place is not None:
+            break
+        if (event is None or event.get_type() not in fallback_types or
+                ref.get_role() != EventRoleType.PRIMARY):
+            continue
+        if date_data is None and get_date(event) != "":
+            date_data = _get_date_data(event, True)
+        if place is None:
+            title = place_displayer.display_event(db, event)
+            if title:
+                place = "<i>%s</i>" % escape(title)
+    if date_data is None:
+        date_data = ('', '')
+    return date_data + (place or '',)
+
+_ROW_CACHES = weakref.WeakKeyDictionary()
+
+def get_row_cache(db):
+    """
+    Return the cache of derived data of the people of the database.
+    """
+    cache = None
+    try:
+        cache = _ROW_CACHES.get(db)
+    except TypeError:
+        pass
+    if cache is None:
+        cache = PeopleRowCache(db, BaseModel._CACHE_SIZE,
+                               BaseModel._CACHE_MEMORY)
+        if cache.shared:
+            _ROW_CACHES[db] = cache
+    cache.check_settings()
+    return cache
+
 #-------------------------------------------------------------------------
 #
 # PeopleBaseModel
@@ -102,6 +405,7 @@ class PeopleBaseModel(BaseModel):
         """
         BaseModel.__init__(self)
         self.db = db
+        self.row_cache = get_row_cache(db)
         self.gen_cursor = db.get_person_cursor
         self.map = db.get_raw_person_data
 
@@ -148,6 +452,7 @@ class PeopleBaseModel(BaseModel):
         """
         BaseModel.destroy(self)
         self.db = None
+        self.row_cache = None
         self.gen_cursor = None
         self.map = None
         self.fmap = None
@@ -180,12 +485,7 @@ class PeopleBaseModel(BaseModel):
         return name
 
     def column_spouse(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "SPOUSE")
-        if not cached:
-            value = self._get_spouse_data(data)
-            self.set_cached_value(handle, "SPOUSE", value)
-        return value
+        return self._get_row(data, _FAMILIES).spouse
 
     def column_private(self, data):
         if data[COLUMN_PRIV]:
@@ -194,22 +494,6 @@ class PeopleBaseModel(BaseModel):
             # There is a problem returning None here.
             return ''
 
-    def _get_spouse_data(self, data):
-        spouses_names = ""
-        for family_handle in data[COLUMN_FAMILY]:
-            family = self.db.get_family_from_handle(family_handle)
-            for spouse_id in [family.get_father_handle(),
-                              family.get_mother_handle()]:
-                if not spouse_id:
-                    continue
-                if spouse_id == data[0]:
-                    continue
-                spouse = self.db.get_person_from_handle(spouse_id)
-                if spouses_names:
-                    spouses_names += ", "
-                spouses_names += name_displayer.display(spouse)
-        return spouses_names
-
     def column_id(self, data):
         return data[COLUMN_ID]
 
@@ -223,301 +507,81 @@ class PeopleBaseModel(BaseModel):
         return PeopleBaseModel._GENDER[data[COLUMN_GENDER]]
 
     def column_birth_day(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "BIRTH_DAY")
-        if not cached:
-            value = self._get_birth_data(data, False)
-            self.set_cached_value(handle, "BIRTH_DAY", value)
-        return value
+        return self._get_row(data, _EVENTS).birth_day
 
     def sort_birth_day(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "SORT_BIRTH_DAY")
-        if not cached:
-            value = self._get_birth_data(data, True)
-            self.set_cached_value(handle, "SORT_BIRTH_DAY", value)
-        return value
-
-    def _get_birth_data(self, data, sort_mode):
-        index = data[COLUMN_BIRTH]
-        if index != -1:
-            try:
-                local = data[COLUMN_EVENT][index]
-                b = EventRef()
-                b.unserialize(local)
-                birth = self.db.get_event_from_handle(b.ref)
-                if sort_mode:
-                    retval = "%09d" % birth.get_date_object().get_sort_value()
-                else:
-                    date_str = get_date(birth)
-                    if date_str != "":
-                        retval = escape(date_str)
-                if not get_date_valid(birth):
-                    return invalid_date_format % retval
-                else:
-                    return retval
-            except:
-                return ''
-
-        for event_ref in data[COLUMN_EVENT]:
-            er = EventRef()
-            er.unserialize(event_ref)
-            event = self.db.get_event_from_handle(er.ref)
-            etype = event.get_type()
-            date_str = get_date(event)
-            if (etype in [EventType.BAPTISM, EventType.CHRISTEN]
-                and er.get_role() == EventRoleType.PRIMARY
-                and date_str != ""):
-                if sort_mode:
-                    retval = "%09d" % event.get_date_object().get_sort_value()
-                else:
-                    retval = "<i>%s</i>" % escape(date_str)
-                if not get_date_valid(event):
-                    return invalid_date_format % retval
-                else:
-                    return retval
-
-        return ""
+        return self._get_row(data, _EVENTS).sort_birth_day
 
     def column_death_day(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "DEATH_DAY")
-        if not cached:
-            value = self._get_death_data(data, False)
-            self.set_cached_value(handle, "DEATH_DAY", value)
-        return value
+        return self._get_row(data, _EVENTS).death_day
 
     def sort_death_day(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "SORT_DEATH_DAY")
-        if not cached:
-            value = self._get_death_data(data, True)
-            self.set_cached_value(handle, "SORT_DEATH_DAY", value)
-        return value
-
-    def _get_death_data(self, data, sort_mode):
-        index = data[COLUMN_DEATH]
-        if index != -1:
-            try:
-                local = data[COLUMN_EVENT][index]
-                ref = EventRef()
-                ref.unserialize(local)
-                event = self.db.get_event_from_handle(ref.ref)
-                if sort_mode:
-                    retval = "%09d" % event.get_date_object().get_sort_value()
-                else:
-                    date_str = get_date(event)
-                    if date_str != "":
-                        retval = escape(date_str)
-                if not get_date_valid(event):
-                    return invalid_date_format % retval
-                else:
-                    return retval
-            except:
-                return ''
-
-        for event_ref in data[COLUMN_EVENT]:
-            er = EventRef()
-            er.unserialize(event_ref)
-            event = self.db.get_event_from_handle(er.ref)
-            etype = event.get_type()
-            date_str = get_date(event)
-            if (etype in [EventType.BURIAL,
-                          EventType.CREMATION,
-                          EventType.CAUSE_DEATH]
-                and er.get_role() == EventRoleType.PRIMARY
-                and date_str):
-                if sort_mode:
-                    retval = "%09d" % event.get_date_object().get_sort_value()
-                else:
-                    retval = "<i>%s</i>" % escape(date_str)
-                if not get_date_valid(event):
-                    return invalid_date_format % retval
-                else:
-                    return retval
-        return ""
+        return self._get_row(data, _EVENTS).sort_death_day
 
     def column_birth_place(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "BIRTH_PLACE")
-        if cached:
-            return value
-        else:
-            index = data[COLUMN_BIRTH]
-            if index != -1:
-                try:
-                    local = data[COLUMN_EVENT][index]
-                    br = EventRef()
-                    br.unserialize(local)
-                    event = self.db.get_event_from_handle(br.ref)
-                    if event:
-                        place_title = place_displayer.display_event(self.db, event)
-                        if place_title:
-                            value = escape(place_title)
-                            self.set_cached_value(handle, "BIRTH_PLACE", value)
-                            return value
-                except:
-                    value = ''
-                    self.set_cached_value(handle, "BIRTH_PLACE", value)
-                    return value
-
-            for event_ref in data[COLUMN_EVENT]:
-                er = EventRef()
-                er.unserialize(event_ref)
-                event = self.db.get_event_from_handle(er.ref)
-                etype = event.get_type()
-                if (etype in [EventType.BAPTISM, EventType.CHRISTEN] and
-                    er.get_role() == EventRoleType.PRIMARY):
-                        place_title = place_displayer.display_event(self.db, event)
-                        if place_title:
-                            value = "<i>%s</i>" % escape(place_title)
-                            self.set_cached_value(handle, "BIRTH_PLACE", value)
-                            return value
-            value = ""
-            self.set_cached_value(handle, "BIRTH_PLACE", value)
-            return value
+        return self._get_row(data, _EVENTS).birth_place
 
     def column_death_place(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "DEATH_PLACE")
-        if cached:
-            return value
-        else:
-            index = data[COLUMN_DEATH]
-            if index != -1:
-                try:
-                    local = data[COLUMN_EVENT][index]
-                    dr = EventRef()
-                    dr.unserialize(local)
-                    event = self.db.get_event_from_handle(dr.ref)
-                    if event:
-                        place_title = place_displayer.display_event(self.db, event)
-                        if place_title:
-                            value = escape(place_title)
-                            self.set_cached_value(handle, "DEATH_PLACE", value)
-                            return value
-                except:
-                    value = ''
-                    self.set_cached_value(handle, "DEATH_PLACE", value)
-                    return value
-
-            for event_ref in data[COLUMN_EVENT]:
-                er = EventRef()
-                er.unserialize(event_ref)
-                event = self.db.get_event_from_handle(er.ref)
-                etype = event.get_type()
-                if (etype in [EventType.BURIAL, EventType.CREMATION,
-                              EventType.CAUSE_DEATH]
-                    and er.get_role() == EventRoleType.PRIMARY):
-
-                        place_title = place_displayer.display_event(self.db, event)
-                        if place_title:
-                            value = "<i>%s</i>" % escape(place_title)
-                            self.set_cached_value(handle, "DEATH_PLACE", value)
-                            return value
-            value = ""
-            self.set_cached_value(handle, "DEATH_PLACE", value)
-            return value
-
-    def _get_parents_data(self, data):
-        parents = 0
-        if data[COLUMN_PARENT]:
-            family = self.db.get_family_from_handle(data[COLUMN_PARENT][0])
-            if family.get_father_handle():
-                parents += 1
-            if family.get_mother_handle():
-                parents += 1
-        return parents
-
-    def _get_marriages_data(self, data):
-        marriages = 0
-        for family_handle in data[COLUMN_FAMILY]:
-            family = self.db.get_family_from_handle(family_handle)
-            if int(family.get_relationship()) == FamilyRelType.MARRIED:
-                marriages += 1
-        return marriages
-
-    def _get_children_data(self, data):
-        children = 0
-        for family_handle in data[COLUMN_FAMILY]:
-            family = self.db.get_family_from_handle(family_handle)
-            for child_ref in family.get_child_ref_list():
-                if (child_ref.get_father_relation() == ChildRefType.BIRTH and
-                    child_ref.get_mother_relation() == ChildRefType.BIRTH):
-                    children += 1
-        return children
-
-    def _get_todo_data(self, data):
-        todo = 0
-        for note_handle in data[COLUMN_NOTES]:
-            note = self.db.get_note_from_handle(note_handle)
-            if int(note.get_type()) == NoteType.TODO:
-                todo += 1
-        return todo
+        return self._get_row(data, _EVENTS).death_place
 
     def column_parents(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "PARENTS")
-        if not cached:
-            value = self._get_parents_data(data)
-            self.set_cached_value(handle, "PARENTS", value)
-        return str(value)
+        return str(self._get_row(data, _FAMILIES).parents)
 
     def sort_parents(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "SORT_PARENTS")
-        if not cached:
-            value = self._get_parents_data(data)
-            self.set_cached_value(handle, "SORT_PARENTS", value)
-        return '%06d' % value
+        return '%06d' % self._get_row(data, _FAMILIES).parents
 
     def column_marriages(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "MARRIAGES")
-        if not cached:
-            value = self._get_marriages_data(data)
-            self.set_cached_value(handle, "MARRIAGES", value)
-        return str(value)
+        return str(self._get_row(data, _FAMILIES).marriages)
 
     def sort_marriages(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "SORT_MARRIAGES")
-        if not cached:
-            value = self._get_marriages_data(data)
-            self.set_cached_value(handle, "SORT_MARRIAGES", value)
-        return '%06d' % value
+        return '%06d' % self._get_row(data, _FAMILIES).marriages
 
     def column_children(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "CHILDREN")
-        if not cached:
-            value = self._get_children_data(data)
-            self.set_cached_value(handle, "CHILDREN", value)
-        return str(value)
+        return str(self._get_row(data, _FAMILIES).children)
 
     def sort_children(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "SORT_CHILDREN")
-        if not cached:
-            value = self._get_children_data(data)
-            self.set_cached_value(handle, "SORT_CHILDREN", value)
-        return '%06d' % value
+        return '%06d' % self._get_row(data, _FAMILIES).children
 
     def column_todo(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "TODO")
-        if not cached:
-            value = self._get_todo_data(data)
-            self.set_cached_value(handle, "TODO", value)
-        return str(value)
+        return str(self._get_row(data, _NOTES).todo)
 
     def sort_todo(self, data):
-        handle = data[0]
-        cached, value = self.get_cached_value(handle, "SORT_TODO")
-        if not cached:
-            value = self._get_todo_data(data)
-            self.set_cached_value(handle, "SORT_TODO", value)
-        return '%06d' % value
+        return '%06d' % self._get_row(data, _NOTES).todo
+
+    def clear_cache(self, handle=None):
+        """
+        Clear the LRU cache, and the derived data of the person if a handle
+        is given. The derived data of all people is only cleared if the
+        changes of the database can not be followed, otherwise it is kept
+        for the next views.
+        """
+        BaseModel.clear_cache(self, handle)
+        if self.row_cache is None:
+            return
+        if handle:
+            self.row_cache.discard(handle)
+        elif not self.row_cache.shared:
+            self.row_cache.clear()
+
+    def _get_row(self, data, group):
+        """
+        Return the derived data of the person, with the given group of
+        values computed. The values are computed together for the rows that
+        are likely shown next.
+        """
+        self.row_cache.update(self.db)
+        row = self.row_cache.get(data[0])
+        if row is None or getattr(row, group) is None:
+            row = self.row_cache.compute(self.db, group, data,
+                                         self._prefetch_handles(data[0]))
+        return row
+
+    def _prefetch_handles(self, handle):
+        """
+        Return the handles of the other people whose derived data is
+        computed together with that of the person.
+        """
+        return []
 
     def get_tag_name(self, tag_handle):
         """
@@ -567,12 +631,30 @@ class PersonListModel(PeopleBaseModel, FlatBaseModel):
     """
     Listed people model.
     """
+    obj_key = PERSON_KEY
+    # name, id, gender, birth date, death date, private, tags and change
+    indexed_sort_cols = (0, 1, 2, 3, 5, 12, 13, 14)
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
         PeopleBaseModel.__init__(self, db)
         FlatBaseModel.__init__(self, db, uistate, search=search, skip=skip,
                                scol=scol, order=order, sort_map=sort_map)
 
+    def _prefetch_handles(self, handle):
+        """
+        Return the handles of the rows following the row of the person.
+        """
+        if self._in_build:
+            return []
+        path = self.node_map.get_path_from_handle(handle)
+        if path is None:
+            return []
+        first = path.get_indices()[0]
+        last = min(first + PREFETCH_ROWS, len(self.node_map))
+        return [self.node_map.get_handle(index)
+                for index in range(first + 1, last)]
+
     def destroy(self):
         """
         Unset all elements that can prevent garbage collection
@@ -584,6 +666,8 @@ class PersonTreeModel(PeopleBaseModel, TreeBaseModel):
     """
     Hierarchical people model.
     """
+    obj_key = PERSON_KEY
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
         PeopleBaseModel.__init__(self, db)
@@ -49,6 +49,8 @@ from gramps.gen.datehandler import format_time
 from gramps.gen.utils.place import conv_lat_lon
 from gramps.gen.display.place import displayer as place_displayer
 from gramps.gen.config import config
+from gramps.gen.db.dbconst import PLACE_KEY
+from .basemodel import MAX_CHANGES
 from .flatbasemodel import FlatBaseModel
 from .treebasemodel import TreeBaseModel
 
@@ -230,6 +232,8 @@ class PlaceListModel(PlaceBaseModel, FlatBaseModel):
     """
     Flat place model.  (Original code in PlaceBaseModel).
     """
+    obj_key = PLACE_KEY
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
 
@@ -237,6 +241,23 @@ class PlaceListModel(PlaceBaseModel, FlatBaseModel):
         FlatBaseModel.__init__(self, db, uistate, scol, order, search=search,
                                skip=skip, sort_map=sort_map)
 
+    def get_changed_handles(self):
+        """
+        See :meth:`BaseModel.get_changed_handles`. The title of a place also
+        depends on all the places that enclose it.
+        """
+        handles = FlatBaseModel.get_changed_handles(self)
+        todo = list(handles or ())
+        while todo:
+            for ref_class, ref_handle in self.db.find_backlink_handles(
+                    todo.pop(), ['Place']):
+                if ref_handle not in handles:
+                    handles.add(ref_handle)
+                    todo.append(ref_handle)
+            if len(handles) > MAX_CHANGES:
+                return None
+        return handles
+
     def destroy(self):
         """
         Unset all elements that can prevent garbage collection
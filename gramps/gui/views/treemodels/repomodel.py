@@ -42,6 +42,7 @@ from gramps.gen.lib import Address, RepositoryType, Url, UrlType
 from gramps.gen.datehandler import format_time
 from .flatbasemodel import FlatBaseModel
 from gramps.gen.const import GRAMPS_LOCALE as glocale
+from gramps.gen.db.dbconst import REPOSITORY_KEY
 #-------------------------------------------------------------------------
 #
 # RepositoryModel
@@ -49,6 +50,8 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 #-------------------------------------------------------------------------
 class RepositoryModel(FlatBaseModel):
 
+    obj_key = REPOSITORY_KEY
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
         self.gen_cursor = db.get_repository_cursor
@@ -41,6 +41,7 @@ from gi.repository import Gtk
 from gramps.gen.datehandler import format_time
 from .flatbasemodel import FlatBaseModel
 from gramps.gen.const import GRAMPS_LOCALE as glocale
+from gramps.gen.db.dbconst import SOURCE_KEY
 
 #-------------------------------------------------------------------------
 #
@@ -49,6 +50,8 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 #-------------------------------------------------------------------------
 class SourceModel(FlatBaseModel):
 
+    obj_key = SOURCE_KEY
+
     def __init__(self, db, uistate, scol=0, order=Gtk.SortType.ASCENDING,
                  search=None, skip=set(), sort_map=None):
         self.map = db.get_raw_source_data
@@ -0,0 +1,87 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import unittest
+
+from gramps.gen.db import DbTxn, PERSON_KEY
+from gramps.gen.db.utils import make_database
+from gramps.gen.filters import GenericFilter
+from gramps.gen.filters.rules.person import IsMale, IsAncestorOf
+from gramps.gen.lib import Person
+from ..basemodel import BaseModel
+
+class DummyModel(BaseModel):
+    obj_key = PERSON_KEY
+
+    def __init__(self, db, search):
+        BaseModel.__init__(self)
+        self.db = db
+        self.search = search
+        self.change_count = db.get_change_count()
+
+
+class BaseModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        with DbTxn('Add test person', self.db) as trans:
+            self.handle = self.db.add_person(Person(), trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __changed_handles(self, rule):
+        search = None
+        if rule:
+            search = GenericFilter()
+            search.add_rule(rule)
+        model = DummyModel(self.db, search)
+        person = self.db.get_person_from_handle(self.handle)
+        person.set_gender(Person.MALE)
+        with DbTxn('Edit test person', self.db) as trans:
+            self.db.commit_person(person, trans)
+        return model.get_changed_handles()
+
+    def test_changed_handles(self):
+        self.assertEqual(self.__changed_handles(None), {self.handle})
+        self.assertEqual(self.__changed_handles(IsMale([])), {self.handle})
+
+    def test_filter_on_other_objects(self):
+        # An ancestor filter may match people that did not change
+        self.assertIsNone(self.__changed_handles(IsAncestorOf(['I0001',
+                                                               '1'])))
+
+    def test_cache_memory(self):
+        saved = BaseModel._CACHE_MEMORY
+        BaseModel._CACHE_MEMORY = 10000
+        try:
+            model = DummyModel(self.db, None)
+        finally:
+            BaseModel._CACHE_MEMORY = saved
+        for index in range(100):
+            model.lru_data[str(index)] = ['x' * 1000]
+        self.assertLess(len(model.lru_data), 10)
+        self.assertLessEqual(model.lru_data.total_size, 10000)
+        self.assertIn('99', model.lru_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import unittest
+
+from gramps.gen.db import DbTxn, PERSON_KEY
+from gramps.gen.db.utils import make_database
+from gramps.gen.lib import Person
+from ..flatbasemodel import FlatNodeMap, SortIndexWindow, WindowedNodeMap
+
+class FlatNodeMapTest(unittest.TestCase):
+
+    def test_update_identical(self):
+        node_map = FlatNodeMap()
+        keys = [('a', 'h1'), ('c', 'h2'), ('e', 'h3')]
+        node_map.set_path_map(keys, keys)
+        node_map.update_path_map({'h1', 'h3', 'h4'},
+                                 [('d', 'h1'), ('f', 'h4')],
+                                 [('d', 'h1'), ('f', 'h4')])
+        self.assertEqual(node_map.full_srtkey_hndl_map(),
+                         [('c', 'h2'), ('d', 'h1'), ('f', 'h4')])
+        self.assertEqual(node_map.get_handle(2), 'h4')
+        self.assertEqual(node_map.get_path_from_handle('h1')[0], 1)
+        self.assertIsNone(node_map.get_path_from_handle('h3'))
+
+    def test_update_filtered(self):
+        node_map = FlatNodeMap()
+        keys = [('a', 'h1'), ('c', 'h2'), ('e', 'h3')]
+        node_map.set_path_map(keys[1:], keys, identical=False, reverse=True)
+        node_map.update_path_map({'h1', 'h2'}, [('b', 'h1')],
+                                 [('b', 'h1'), ('f', 'h2')])
+        self.assertEqual(node_map.full_srtkey_hndl_map(),
+                         [('b', 'h1'), ('e', 'h3'), ('f', 'h2')])
+        self.assertEqual(len(node_map), 2)
+        self.assertEqual(node_map.get_handle(0), 'h3')
+        self.assertEqual(node_map.get_path_from_handle('h1')[0], 1)
+
+
+class WindowedNodeMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        with DbTxn('Add test people', self.db) as trans:
+            self.handles = [self.db.add_person(Person(), trans)
+                            for index in range(3)]
+        self.db.get_sort_index(PERSON_KEY, 'test', 'sig')
+        self.keys = list(zip(['b', 'd', 'f'], self.handles))
+        self.db.set_sort_keys('test', self.keys)
+        self.node_map = WindowedNodeMap(SortIndexWindow(self.db, 'test', 3))
+
+    def tearDown(self):
+        self.node_map.destroy()
+        self.db.close()
+
+    def test_changes(self):
+        person = Person()
+        self.db.connect('person-add', lambda handles: self.node_map.insert(
+            ('c', handles[0])))
+        self.db.connect('person-delete', lambda handles: self.node_map.delete(
+            ('b', handles[0])))
+        with DbTxn('Add test person', self.db) as trans:
+            self.db.add_person(person, trans)
+        self.assertEqual(len(self.node_map), 4)
+        self.assertEqual(self.node_map.get_handle(1), person.handle)
+        self.assertEqual(self.node_map.get_handle(3), self.handles[2])
+        with DbTxn('Remove test person', self.db) as trans:
+            self.db.remove_person(self.handles[0], trans)
+        self.assertEqual(len(self.node_map), 3)
+        self.assertEqual(self.node_map.get_handle(0), person.handle)
+        self.assertEqual(self.node_map.get_handle(2), self.handles[2])
+        self.assertEqual(self.db.count_sort_keys('test'), 3)
+
+    def test_set_path_map(self):
+        self.assertEqual(self.node_map.full_srtkey_hndl_map(), [])
+        keys = self.keys[1:]
+        self.node_map.set_path_map(keys, keys, reverse=True)
+        self.assertEqual(self.node_map.full_srtkey_hndl_map(), keys)
+        self.assertEqual(len(self.node_map), 2)
+        self.assertEqual(self.node_map.get_handle(0), self.handles[2])
+        self.assertEqual(self.node_map.get_path_from_handle(
+            self.handles[1])[0], 1)
+        self.assertIsNone(self.node_map.get_path_from_handle(
+            self.handles[0]))
+        # Rows are inserted in memory only
+        self.node_map.insert(('a', self.handles[0]))
+        self.assertEqual(self.node_map.get_handle(2), self.handles[0])
+        self.assertEqual(self.db.get_sort_key('test', self.handles[0]), 'b')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,7 +55,7 @@ _ = glocale.translation.gettext
 import gramps.gui.widgets.progressdialog as progressdlg
 from ...user import User
 from bisect import bisect_right
-from gramps.gen.filters import SearchFilter, ExactSearchFilter
+from gramps.gen.filters import SearchFilter, ExactSearchFilter, GenericFilter
 from .basemodel import BaseModel
 
 #-------------------------------------------------------------------------
@@ -492,6 +492,7 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
             return
 
         self.clear()
+        self.change_count = self.db.get_change_count()
         if self.has_secondary:
             self._build_data(self.current_filter, self.current_filter2, skip)
         else:
@@ -813,6 +814,33 @@ class TreeBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         self.dont_change_active = False
         self.add_row_by_handle(handle)
 
+    def get_changed_handles(self):
+        """
+        See :meth:`BaseModel.get_changed_handles`. Models with two object
+        types are built again instead.
+        """
+        if self.has_secondary:
+            return None
+        return BaseModel.get_changed_handles(self)
+
+    def apply_changes(self, handles):
+        """
+        See :meth:`BaseModel.apply_changes`.
+        """
+        self.clear_cache()
+        self.change_count = self.db.get_change_count()
+        for handle in handles:
+            self.delete_row_by_handle(handle)
+        data_map = self.db.get_raw_data_many(self.obj_key, list(handles))
+        if isinstance(self.search, GenericFilter):
+            shown = self.search.apply(self.db, list(data_map))
+        else:
+            shown = [handle for handle in data_map if not self.search or
+                     self.search.match(handle, self.db)]
+        for handle in shown:
+            self.add_row(handle, data_map[handle])
+        self.__total = self.number_items()
+
     def _new_iter(self, nodeid):
         """
         Return a new iter containing the nodeid in the nodemap
@@ -1643,6 +1643,79 @@ class DbBsddbRead(DbReadBase, Callback):
     def get_raw_tag_data(self, handle):
         return self.__get_raw_data(self.tag_map, handle)
 
+    def get_raw_data_many(self, obj_key, handles):
+        """
+        Return a dictionary of raw objects of the given type, keyed by handle.
+        Handles that are not found are left out.
+
+        The handles are looked up in key order, so that neighbouring keys
+        are read from the same pages of the table.
+        """
+        key2table = {
+            PERSON_KEY:     self.person_map,
+            FAMILY_KEY:     self.family_map,
+            SOURCE_KEY:     self.source_map,
+            CITATION_KEY:   self.citation_map,
+            EVENT_KEY:      self.event_map,
+            MEDIA_KEY:      self.media_map,
+            PLACE_KEY:      self.place_map,
+            REPOSITORY_KEY: self.repository_map,
+            NOTE_KEY:       self.note_map,
+            TAG_KEY:        self.tag_map,
+            }
+
+        table = key2table[obj_key]
+        result = {}
+        if table is None:
+            return result
+        try:
+            for handle in sorted(set(handle for handle in handles if handle)):
+                data = table.get(handle.encode('utf-8'), txn=self.txn)
+                if data is not None:
+                    result[handle] = data
+        except DBERRS as msg:
+            self.__log_error()
+            raise DbError(msg)
+        return result
+
+    def __get_from_handles(self, obj_key, class_type, handles):
+        """
+        Helper method for get_*_from_handles methods
+        """
+        data = self.get_raw_data_many(obj_key, handles)
+        return [class_type.create(data[handle])
+                for handle in handles if handle in data]
+
+    def get_citations_from_handles(self, handles):
+        return self.__get_from_handles(CITATION_KEY, Citation, handles)
+
+    def get_events_from_handles(self, handles):
+        return self.__get_from_handles(EVENT_KEY, Event, handles)
+
+    def get_families_from_handles(self, handles):
+        return self.__get_from_handles(FAMILY_KEY, Family, handles)
+
+    def get_media_from_handles(self, handles):
+        return self.__get_from_handles(MEDIA_KEY, Media, handles)
+
+    def get_notes_from_handles(self, handles):
+        return self.__get_from_handles(NOTE_KEY, Note, handles)
+
+    def get_people_from_handles(self, handles):
+        return self.__get_from_handles(PERSON_KEY, Person, handles)
+
+    def get_places_from_handles(self, handles):
+        return self.__get_from_handles(PLACE_KEY, Place, handles)
+
+    def get_repositories_from_handles(self, handles):
+        return self.__get_from_handles(REPOSITORY_KEY, Repository, handles)
+
+    def get_sources_from_handles(self, handles):
+        return self.__get_from_handles(SOURCE_KEY, Source, handles)
+
+    def get_tags_from_handles(self, handles):
+        return self.__get_from_handles(TAG_KEY, Tag, handles)
+
     def __has_handle(self, table, handle):
         """
         Helper function for has_<object>_handle methods
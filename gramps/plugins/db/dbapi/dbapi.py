@@ -29,6 +29,7 @@ import shutil
 import time
 import sys
 import pickle
+import threading
 from operator import itemgetter
 import logging
 
@@ -38,24 +39,69 @@ import logging
 #
 #------------------------------------------------------------------------
 from gramps.gen.db.dbconst import (DBLOGNAME, DBBACKEND, KEY_TO_NAME_MAP,
+                                   KEY_TO_CLASS_MAP, CLASS_TO_KEY_MAP,
+                                   ARRAYSIZE,
                                    TXNADD, TXNUPD, TXNDEL,
                                    PERSON_KEY, FAMILY_KEY, SOURCE_KEY,
                                    EVENT_KEY, MEDIA_KEY, PLACE_KEY, NOTE_KEY,
                                    TAG_KEY, CITATION_KEY, REPOSITORY_KEY,
                                    REFERENCE_KEY)
-from gramps.gen.db.generic import DbGeneric
+from gramps.gen.db.generic import DbGeneric, Cursor
 from gramps.gen.lib import (Tag, Media, Person, Family, Source,
                             Citation, Event, Place, Repository, Note)
 from gramps.gen.lib.genderstats import GenderStats
 from gramps.gen.const import GRAMPS_LOCALE as glocale
+from gramps.plugins.db.dbapi.serializer import get_serializer, decode
+from gramps.plugins.db.dbapi.pool import ReaderPool
+from gramps.plugins.db.dbapi.sqlite import Sqlite
 
 LOG = logging.getLogger(".dbapi")
 _LOG = logging.getLogger(DBLOGNAME)
 
+# Number of objects buffered by a batch transaction before they are written
+BATCH_SIZE = 1000
+
+# Number of handles in the IN clause of bulk reads. SQLite versions before
+# 3.32 allow at most 999 parameters in a statement.
+IN_SIZE = 500
+
+# SQLite PRAGMAs that can be set in the [sqlite] section of settings.ini,
+# with their defaults, in the order in which they are set. The page size
+# only has an effect on a new database, so it comes first.
+SQLITE_PRAGMAS = (
+    ('page_size', 4096),
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -20000),
+    ('mmap_size', 0),
+    ('temp_store', 'MEMORY'),
+)
+
 class DBAPI(DbGeneric):
     """
     Database backends class for DB-API 2.0 databases
     """
+    def __init__(self, directory=None):
+        # Objects committed in a batch transaction but not yet written:
+        # {obj_key: {handle: (in_db, blob, fields, values, refs, gramps_id)}}
+        self._pending = {}
+        # Gramps ids of the pending objects: {obj_key: {gramps_id: handle}}
+        self._pending_ids = {}
+        self._pending_count = 0
+        self.serializer = get_serializer('pickle')
+        # SQLite PRAGMAs used during batch transactions and the values they
+        # are restored to afterwards:
+        self._batch_pragmas = []
+        self._default_pragmas = []
+        # Read-only connections for threads other than the one that opened
+        # the database:
+        self._readers = None
+        self._owner = None
+        self._reader_pragmas = []
+        # True while the signals of a committed transaction are emitted:
+        self._txn_committed = False
+        super().__init__(directory)
+
     def get_schema_version(self, directory=None):
         """
         Get the version of the schema that the database was created
@@ -106,6 +152,10 @@ class DBAPI(DbGeneric):
         config_mgr.register('database.user', 'user')
         config_mgr.register('database.password', 'password')
         config_mgr.register('database.port', 'port')
+        config_mgr.register('storage.serializer', 'pickle')
+        for name, default in SQLITE_PRAGMAS:
+            config_mgr.register('sqlite.' + name, default)
+        config_mgr.register('sqlite.batch_synchronous', 'NORMAL')
         config_mgr.load() # load from settings.ini
         settings = {
             "__file__":
@@ -118,11 +168,44 @@ class DBAPI(DbGeneric):
             exec(code, globals(), settings)
         self.dbapi = settings["dbapi"]
 
+        if config_mgr.get('database.dbtype') == 'sqlite':
+            self.dbapi.set_pragmas([(name, config_mgr.get('sqlite.' + name))
+                                    for name, default in SQLITE_PRAGMAS])
+            self._default_pragmas = [
+                ('synchronous', config_mgr.get('sqlite.synchronous'))]
+            self._batch_pragmas = [
+                ('synchronous', config_mgr.get('sqlite.batch_synchronous'))]
+            self._reader_pragmas = [
+                (name, config_mgr.get('sqlite.' + name))
+                for name in ('cache_size', 'mmap_size', 'temp_store')]
+        self._owner = threading.current_thread()
+        self._readers = ReaderPool(self._open_reader)
+
         # We use the existence of the person table as a proxy for the database
         # being new
         if not self.dbapi.table_exists("person"):
             self._create_schema()
 
+        self.serializer = get_serializer(config_mgr.get('storage.serializer'))
+        if self.readonly:
+            # Blobs of any serializer are decoded, and sort keys are not used
+            # without their triggers
+            return
+        if self._get_metadata('serializer', 'pickle') != self.serializer.name:
+            self.rewrite_blobs()
+        if not self.dbapi.table_exists("sort_key"):
+            self._txn_begin()
+            self._create_sort_key_table()
+            self._txn_commit()
+        elif self._has_sort_index() and not self._has_sort_key_triggers():
+            # The keys were stored before they were marked by triggers, and
+            # may have been left unchanged by edits of another version.
+            self._txn_begin()
+            self.dbapi.execute("DELETE FROM sort_key")
+            self._create_sort_key_triggers()
+            self._txn_commit()
+            self._set_metadata('sort_index', {})
+
     def _create_schema(self):
         """
         Create and update schema.
@@ -238,8 +321,6 @@ class DBAPI(DbGeneric):
                            'ON place(gramps_id)')
         self.dbapi.execute('CREATE INDEX tag_name '
                            'ON tag(name)')
-        self.dbapi.execute('CREATE INDEX reference_ref_handle '
-                           'ON reference(ref_handle)')
         self.dbapi.execute('CREATE INDEX family_gramps_id '
                            'ON family(gramps_id)')
         self.dbapi.execute('CREATE INDEX event_gramps_id '
@@ -248,14 +329,124 @@ class DBAPI(DbGeneric):
                            'ON repository(gramps_id)')
         self.dbapi.execute('CREATE INDEX note_gramps_id '
                            'ON note(gramps_id)')
-        self.dbapi.execute('CREATE INDEX reference_obj_handle '
-                           'ON reference(obj_handle)')
+        self._create_reference_indexes()
+        self._create_sort_key_table()
 
         self.dbapi.commit()
 
+    def _create_reference_indexes(self):
+        """
+        Create the indexes of the reference table.
+
+        The unique index on (obj_handle, ref_handle) is also used to find the
+        references of an object. Databases created before it was added keep
+        their obj_handle index, and may hold duplicate rows, until the
+        reference map is rebuilt with :meth:`reindex_reference_map`.
+        """
+        self.dbapi.execute('CREATE INDEX reference_ref_handle '
+                           'ON reference(ref_handle)')
+        self.dbapi.execute('CREATE UNIQUE INDEX reference_obj_ref '
+                           'ON reference(obj_handle, ref_handle)')
+
+    def _create_sort_key_table(self):
+        """
+        Create the table of the sort indexes.
+
+        The sort keys are stored as UTF-8 encoded blobs, which sort in the
+        same order as the strings in Python, whatever the collation of the
+        backend. The keys of changed objects are kept, marked as stale, so
+        that views can still find where the objects were shown.
+        """
+        self.dbapi.execute('CREATE TABLE sort_key '
+                           '('
+                           'name VARCHAR(50), '
+                           'handle VARCHAR(50), '
+                           'sort_key BLOB, '
+                           'stale INTEGER'
+                           ')')
+        self.dbapi.execute('CREATE INDEX sort_key_name '
+                           'ON sort_key(name, sort_key, handle)')
+        self.dbapi.execute('CREATE INDEX sort_key_handle '
+                           'ON sort_key(handle)')
+        if self._has_sort_index():
+            self._create_sort_key_triggers()
+
+    def _has_sort_index(self):
+        """
+        Return True if the backend keeps sort indexes. The keys are marked as
+        stale by triggers, which are only created on SQLite.
+        """
+        return isinstance(self.dbapi, Sqlite)
+
+    def _create_sort_key_triggers(self):
+        """
+        Create the SQLite triggers that mark the sort keys of a written or
+        removed object, and of the objects that refer to it, as stale.
+
+        The triggers are stored in the database, so that the keys are also
+        marked when the tree is edited by a version of Gramps that does not
+        know about them.
+        """
+        for table in KEY_TO_NAME_MAP.values():
+            for event, row in (('INSERT', 'NEW'), ('UPDATE', 'OLD'),
+                               ('DELETE', 'OLD')):
+                self.dbapi.execute(
+                    'CREATE TRIGGER sort_key_%(table)s_%(event)s '
+                    'AFTER %(event)s ON %(table)s '
+                    'BEGIN '
+                    'UPDATE sort_key SET stale = 1 '
+                    'WHERE handle = %(row)s.handle; '
+                    'UPDATE sort_key SET stale = 1 '
+                    'WHERE handle IN (SELECT obj_handle FROM reference '
+                    'WHERE ref_handle = %(row)s.handle); '
+                    'END' % {'table': table, 'event': event.lower(),
+                             'row': row})
+
+    def _has_sort_key_triggers(self):
+        """
+        Return True if the triggers of the sort keys exist.
+        """
+        self.dbapi.execute("SELECT COUNT(*) FROM sqlite_master "
+                           "WHERE type = 'trigger' AND name LIKE 'sort_key_%'")
+        return self.dbapi.fetchone()[0] == 3 * len(KEY_TO_NAME_MAP)
+
+    def _drop_reference_indexes(self):
+        """
+        Drop the indexes of the reference table, including the obj_handle
+        index of databases created before the unique index was added.
+        """
+        for index in ('reference_ref_handle', 'reference_obj_handle',
+                      'reference_obj_ref'):
+            self.dbapi.execute('DROP INDEX IF EXISTS %s' % index)
+
     def _close(self):
+        if self._readers is not None:
+            self._readers.close()
+            self._readers = None
         self.dbapi.close()
 
+    def _open_reader(self):
+        """
+        Open a read-only connection for the current thread.
+        """
+        reader = self.dbapi.open_reader()
+        if reader is not None and self._reader_pragmas:
+            reader.set_pragmas(self._reader_pragmas)
+        return reader
+
+    def _get_reader(self):
+        """
+        Return the connection to use for reads in the current thread.
+
+        The thread that opened the database uses the main connection, which
+        also sees the changes of the current transaction. Other threads get a
+        read-only connection of their own, so that they do not have to share
+        the main connection and only see committed changes.
+        """
+        if self._readers is None or threading.current_thread() is self._owner:
+            return self.dbapi
+        return self._readers.get() or self.dbapi
+
     def _txn_begin(self):
         """
         Lowlevel interface to the backend transaction.
@@ -278,6 +469,7 @@ class DBAPI(DbGeneric):
         Executes a db ROLLBACK;
         """
         self.dbapi.rollback()
+        self._clear_object_cache()
 
     def transaction_begin(self, transaction):
         """
@@ -287,6 +479,8 @@ class DBAPI(DbGeneric):
                    "Batch " if transaction.batch else "",
                    hex(id(self)), transaction.get_description())
         self.transaction = transaction
+        if transaction.batch and self._batch_pragmas:
+            self.dbapi.set_pragmas(self._batch_pragmas)
         self.dbapi.begin()
         return transaction
 
@@ -303,11 +497,14 @@ class DBAPI(DbGeneric):
                   TXNDEL: "-delete",
                   None: "-delete"}
         if txn.batch:
-            # FIXME: need a User GUI update callback here:
-            self.reindex_reference_map(lambda percent: percent)
+            self._flush_batch()
         self.dbapi.commit()
+        if txn.batch and self._batch_pragmas:
+            self.dbapi.set_pragmas(self._default_pragmas)
         if not txn.batch:
-            # Now, emit signals:
+            # Now, emit signals. The changes are committed, so the handlers
+            # may write sort keys.
+            self._txn_committed = True
             # do deletes and adds first
             for trans_type in [TXNDEL, TXNADD, TXNUPD]:
                 for obj_type in range(11):
@@ -325,6 +522,7 @@ class DBAPI(DbGeneric):
                             signal = KEY_TO_NAME_MAP[
                                 obj_type] + action[trans_type]
                             self.emit(signal, (handles, ))
+            self._txn_committed = False
         self.transaction = None
         msg = txn.get_description()
         self.undodb.commit(txn, msg)
@@ -336,7 +534,16 @@ class DBAPI(DbGeneric):
         """
         Executed after a batch operation abort.
         """
+        self._pending.clear()
+        self._pending_ids.clear()
+        self._pending_count = 0
         self.dbapi.rollback()
+        # The pedigree graph and the object cache may hold changes that were
+        # rolled back
+        self._pedigree = None
+        self._clear_object_cache()
+        if txn.batch and self._batch_pragmas:
+            self.dbapi.set_pragmas(self._default_pragmas)
         self.transaction = None
         txn.clear()
         txn.first = None
@@ -411,6 +618,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             if locale != glocale:
                 self.dbapi.check_collation(locale)
@@ -433,6 +641,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             if locale != glocale:
                 self.dbapi.check_collation(locale)
@@ -463,6 +672,7 @@ class DBAPI(DbGeneric):
         Return a list of database handles, one handle for each Event in the
         database.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT handle FROM event")
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
@@ -477,6 +687,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             if locale != glocale:
                 self.dbapi.check_collation(locale)
@@ -499,6 +710,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             if locale != glocale:
                 self.dbapi.check_collation(locale)
@@ -521,6 +733,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             if locale != glocale:
                 self.dbapi.check_collation(locale)
@@ -538,6 +751,7 @@ class DBAPI(DbGeneric):
         Return a list of database handles, one handle for each Repository in
         the database.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT handle FROM repository")
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
@@ -552,6 +766,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             if locale != glocale:
                 self.dbapi.check_collation(locale)
@@ -569,6 +784,7 @@ class DBAPI(DbGeneric):
         Return a list of database handles, one handle for each Note in the
         database.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT handle FROM note")
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
@@ -583,6 +799,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             if locale != glocale:
                 self.dbapi.check_collation(locale)
@@ -601,13 +818,15 @@ class DBAPI(DbGeneric):
 
         If no such Tag exists, None is returned.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT blob_data FROM tag WHERE name = ?", [name])
         row = self.dbapi.fetchone()
         if row:
-            return Tag.create(pickle.loads(row[0]))
+            return Tag.create(decode(row[0]))
         return None
 
     def get_number_of(self, obj_key):
+        self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT count(1) FROM %s" % table
         self.dbapi.execute(sql)
@@ -642,44 +861,156 @@ class DBAPI(DbGeneric):
         Commit the specified object to the database, storing the changes as
         part of the transaction.
         """
-        old_data = None
         obj.change = int(change_time or time.time())
-        table = KEY_TO_NAME_MAP[obj_key]
+        self._record_change(obj_key, obj.handle)
+
+        if trans.batch:
+            return self._commit_batch(obj, obj_key)
+
+        old_data = self.get_raw_data(obj_key, obj.handle)
+        self._write_object(obj, obj_key, old_data is not None)
+        self._update_backlinks(obj, trans)
+        if old_data:
+            trans.add(obj_key, TXNUPD, obj.handle,
+                      old_data,
+                      obj.serialize())
+        else:
+            trans.add(obj_key, TXNADD, obj.handle,
+                      None,
+                      obj.serialize())
+
+        return old_data
 
-        if self.has_handle(obj_key, obj.handle):
-            old_data = self.get_raw_data(obj_key, obj.handle)
-            # update the object:
-            sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
-            self.dbapi.execute(sql,
-                               [pickle.dumps(obj.serialize()),
-                                obj.handle])
+    def _write_object(self, obj, obj_key, in_db=None, data=None):
+        """
+        Write the blob and the secondary columns of an object with a single
+        statement.
+
+        :param in_db: True if the object is already stored, False if it is
+                      not, and None if unknown.
+        :type in_db: bool or None
+        :param data: the serialized object, if already available.
+        :type data: tuple
+        """
+        table = KEY_TO_NAME_MAP[obj_key]
+        fields, values = self._get_secondary_values(obj)
+        blob = self.serializer.encode(obj.serialize() if data is None
+                                      else data)
+        if in_db is None and self.dbapi.has_upsert():
+            self.dbapi.execute(self._sql_upsert(table, fields),
+                               [obj.handle, blob] + values)
         else:
-            # Insert the object:
-            sql = ("INSERT INTO %s (handle, blob_data) VALUES (?, ?)") % table
-            self.dbapi.execute(sql,
-                               [obj.handle,
-                                pickle.dumps(obj.serialize())])
-        self._update_secondary_values(obj)
-        if not trans.batch:
-            self._update_backlinks(obj, trans)
-            if old_data:
-                trans.add(obj_key, TXNUPD, obj.handle,
-                          old_data,
-                          obj.serialize())
+            if in_db is None:
+                in_db = self.has_handle(obj_key, obj.handle)
+            if in_db:
+                self.dbapi.execute(self._sql_update(table, fields),
+                                   [blob] + values + [obj.handle])
             else:
-                trans.add(obj_key, TXNADD, obj.handle,
-                          None,
-                          obj.serialize())
+                self.dbapi.execute(self._sql_insert(table, fields),
+                                   [obj.handle, blob] + values)
+        self._set_cached(obj_key, obj.handle, blob)
 
+    def _commit_batch(self, obj, obj_key):
+        """
+        Buffer an object committed in a batch transaction.
+
+        The buffered objects are written with a few bulk statements once
+        BATCH_SIZE objects are pending, when the transaction is committed, or
+        before a query that could otherwise miss them.
+
+        Batch transactions are not undoable, so the stored object is only
+        read back when the caller needs it, which is for people. Otherwise,
+        if the backend supports upserts, the object is not looked up at all.
+        """
+        pending = self._pending.setdefault(obj_key, {})
+        pending_ids = self._pending_ids.setdefault(obj_key, {})
+        entry = pending.get(obj.handle)
+        old_data = None
+        if entry:
+            in_db = entry[0]
+            if obj_key == PERSON_KEY:
+                old_data = decode(entry[1])
+            if pending_ids.get(entry[5]) == obj.handle:
+                del pending_ids[entry[5]]
+        else:
+            if obj_key == PERSON_KEY:
+                old_data = self.get_raw_data(obj_key, obj.handle)
+                in_db = old_data is not None
+            elif self.dbapi.has_upsert():
+                in_db = None
+            else:
+                in_db = self.has_handle(obj_key, obj.handle)
+            self._pending_count += 1
+
+        fields, values = self._get_secondary_values(obj)
+        refs = set(obj.get_referenced_handles_recursively())
+        gramps_id = obj.gramps_id if obj_key != TAG_KEY else None
+        pending[obj.handle] = (in_db, self.serializer.encode(obj.serialize()),
+                               fields, values, refs, gramps_id)
+        if gramps_id is not None:
+            pending_ids[gramps_id] = obj.handle
+
+        if self._pending_count >= BATCH_SIZE:
+            self._flush_batch()
         return old_data
 
+    def _flush_batch(self):
+        """
+        Write the objects buffered by a batch transaction to the database.
+
+        Rows are written with executemany, storing the blob and secondary
+        columns in one statement, and the reference rows of the written
+        objects are rebuilt in bulk.
+        """
+        if not self._pending_count:
+            return
+        del_refs = []
+        new_refs = []
+        for obj_key, pending in self._pending.items():
+            if not pending:
+                continue
+            table = KEY_TO_NAME_MAP[obj_key]
+            obj_class = KEY_TO_CLASS_MAP[obj_key]
+            statements = {}
+            for handle, entry in pending.items():
+                in_db, blob, fields, values, refs = entry[:5]
+                fields = tuple(fields)
+                if in_db is None:
+                    sql = self._sql_upsert(table, fields)
+                    row = [handle, blob] + values
+                elif in_db:
+                    sql = self._sql_update(table, fields)
+                    row = [blob] + values + [handle]
+                else:
+                    sql = self._sql_insert(table, fields)
+                    row = [handle, blob] + values
+                statements.setdefault(sql, []).append(row)
+                self._set_cached(obj_key, handle, blob)
+                if in_db is not False:
+                    del_refs.append([handle])
+                new_refs.extend([handle, obj_class, ref_handle, ref_class]
+                                for (ref_class, ref_handle) in refs)
+            for sql, rows in statements.items():
+                self.dbapi.executemany(sql, rows)
+            pending.clear()
+        if del_refs:
+            self.dbapi.executemany("DELETE FROM reference "
+                                   "WHERE obj_handle = ?", del_refs)
+        if new_refs:
+            self.dbapi.executemany("INSERT INTO reference "
+                                   "(obj_handle, obj_class, "
+                                   "ref_handle, ref_class) "
+                                   "VALUES (?, ?, ?, ?)", new_refs)
+        self._pending_ids.clear()
+        self._pending_count = 0
+
     def _update_backlinks(self, obj, transaction):
 
         # Find existing references
         sql = ("SELECT ref_class, ref_handle " +
                "FROM reference WHERE obj_handle = ?")
         self.dbapi.execute(sql, [obj.handle])
-        existing_references = set(self.dbapi.fetchall())
+        existing_references = set(tuple(row) for row in self.dbapi.fetchall())
 
         # Once we have the list of rows that already have a reference
         # we need to compare it with the list of objects that are
@@ -689,17 +1020,21 @@ class DBAPI(DbGeneric):
                                                             current_references)
         new_references = current_references.difference(existing_references)
 
-        # Delete the existing references
-        self.dbapi.execute("DELETE FROM reference WHERE obj_handle = ?",
-                           [obj.handle])
-
-        # Now, add the current ones
-        for (ref_class_name, ref_handle) in current_references:
-            sql = ("INSERT INTO reference " +
-                   "(obj_handle, obj_class, ref_handle, ref_class)" +
-                   "VALUES(?, ?, ?, ?)")
-            self.dbapi.execute(sql, [obj.handle, obj.__class__.__name__,
-                                     ref_handle, ref_class_name])
+        # Only touch the rows that changed
+        if no_longer_required_references:
+            self.dbapi.executemany(
+                "DELETE FROM reference "
+                "WHERE obj_handle = ? AND ref_handle = ?",
+                [[obj.handle, ref_handle] for (ref_class_name, ref_handle)
+                 in no_longer_required_references])
+        if new_references:
+            self.dbapi.executemany(
+                "INSERT INTO reference "
+                "(obj_handle, obj_class, ref_handle, ref_class) "
+                "VALUES (?, ?, ?, ?)",
+                [[obj.handle, obj.__class__.__name__, ref_handle,
+                  ref_class_name] for (ref_class_name, ref_handle)
+                 in new_references])
 
         if not transaction.batch:
             # Add new references to the transaction
@@ -722,11 +1057,37 @@ class DBAPI(DbGeneric):
         if self.has_handle(obj_key, handle):
             data = self.get_raw_data(obj_key, handle)
             table = KEY_TO_NAME_MAP[obj_key]
+            self._record_change(obj_key, handle)
+            if transaction.batch:
+                self._remove_pending(obj_key, handle)
+            else:
+                self.dbapi.execute("SELECT obj_class, ref_handle, ref_class "
+                                   "FROM reference WHERE obj_handle = ?",
+                                   [handle])
+                for (obj_class, ref_handle, ref_class) in \
+                        self.dbapi.fetchall():
+                    transaction.add(REFERENCE_KEY, TXNDEL, (handle, ref_handle),
+                                    (handle, obj_class, ref_handle, ref_class),
+                                    None)
+            self.dbapi.execute("DELETE FROM reference "
+                               "WHERE obj_handle = ?", [handle])
             sql = "DELETE FROM %s WHERE handle = ?" % table
             self.dbapi.execute(sql, [handle])
             if not transaction.batch:
                 transaction.add(obj_key, TXNDEL, handle, data, None)
 
+    def _remove_pending(self, obj_key, handle):
+        """
+        Drop an object removed in a batch transaction from the write buffer.
+        """
+        pending = self._pending.get(obj_key)
+        if pending and handle in pending:
+            gramps_id = pending.pop(handle)[5]
+            self._pending_count -= 1
+            pending_ids = self._pending_ids[obj_key]
+            if pending_ids.get(gramps_id) == handle:
+                del pending_ids[gramps_id]
+
     def find_backlink_handles(self, handle, include_classes=None):
         """
         Find all objects that hold a reference to the object handle.
@@ -744,11 +1105,14 @@ class DBAPI(DbGeneric):
 
             result_list = list(find_backlink_handles(handle))
         """
-        self.dbapi.execute("SELECT obj_class, obj_handle "
-                           "FROM reference "
-                           "WHERE ref_handle = ?",
-                           [handle])
-        rows = self.dbapi.fetchall()
+        dbapi = self._get_reader()
+        if dbapi is self.dbapi:
+            self._flush_batch()
+        dbapi.execute("SELECT obj_class, obj_handle "
+                      "FROM reference "
+                      "WHERE ref_handle = ?",
+                      [handle])
+        rows = dbapi.fetchall()
         for row in rows:
             if (include_classes is None) or (row[0] in include_classes):
                 yield (row[0], row[1])
@@ -757,6 +1121,7 @@ class DBAPI(DbGeneric):
         """
         Returns first person in the database
         """
+        self._flush_batch()
         handle = self.get_default_handle()
         person = None
         if handle:
@@ -772,6 +1137,7 @@ class DBAPI(DbGeneric):
         """
         Return an iterator over handles in the database
         """
+        self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT handle FROM %s" % table
         self.dbapi.execute(sql)
@@ -779,24 +1145,41 @@ class DBAPI(DbGeneric):
         for row in rows:
             yield row[0]
 
-    def _iter_raw_data(self, obj_key):
+    def _iter_raw_data(self, obj_key, condition=None, args=None):
         """
         Return an iterator over raw data in the database.
+
+        If a SQL condition is given, only the rows for which it holds are
+        returned.
         """
+        dbapi = self._get_reader()
+        if dbapi is self.dbapi:
+            self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT handle, blob_data FROM %s" % table
-        with self.dbapi.cursor() as cursor:
-            cursor.execute(sql)
+        if condition is not None:
+            sql += " WHERE %s" % condition
+        with dbapi.cursor() as cursor:
+            cursor.execute(sql, args or [])
             rows = cursor.fetchmany()
             while rows:
                 for row in rows:
-                    yield (row[0], pickle.loads(row[1]))
+                    yield (row[0], decode(row[1]))
                 rows = cursor.fetchmany()
 
+    def get_filtered_cursor(self, class_name, condition, args):
+        """
+        Return a reference to a cursor over the objects of the given class for
+        which a SQL condition holds.
+        """
+        obj_key = CLASS_TO_KEY_MAP[class_name]
+        return Cursor(lambda: self._iter_raw_data(obj_key, condition, args))
+
     def _iter_raw_place_tree_data(self):
         """
         Return an iterator over raw data in the place hierarchy.
         """
+        self._flush_batch()
         to_do = ['']
         sql = 'SELECT handle, blob_data FROM place WHERE enclosed_by = ?'
         while to_do:
@@ -805,14 +1188,20 @@ class DBAPI(DbGeneric):
             rows = self.dbapi.fetchall()
             for row in rows:
                 to_do.append(row[0])
-                yield (row[0], pickle.loads(row[1]))
+                yield (row[0], decode(row[1]))
 
     def reindex_reference_map(self, callback):
         """
         Reindex all primary records in the database.
+
+        The indexes of the reference table are created again, which adds the
+        unique (obj_handle, ref_handle) index to older databases.
         """
         callback(4)
+        self._txn_begin()
         self.dbapi.execute("DELETE FROM reference")
+        # Rebuilding the indexes once is faster than updating them per row
+        self._drop_reference_indexes()
         primary_table = (
             (self.get_person_cursor, Person),
             (self.get_family_cursor, Family),
@@ -829,22 +1218,70 @@ class DBAPI(DbGeneric):
         # to loop through each of the primary object tables.
         for cursor_func, class_func in primary_table:
             logging.info("Rebuilding %s reference map", class_func.__name__)
+            class_name = class_func.__name__
+            rows = []
             with cursor_func() as cursor:
                 for found_handle, val in cursor:
                     obj = class_func.create(val)
                     references = set(obj.get_referenced_handles_recursively())
-                    # handle addition of new references
-                    for (ref_class_name, ref_handle) in references:
-                        self.dbapi.execute(
-                            "INSERT INTO reference "
-                            "(obj_handle, obj_class, ref_handle, ref_class) "
-                            "VALUES (?, ?, ?, ?)",
-                            [obj.handle,
-                             obj.__class__.__name__,
-                             ref_handle,
-                             ref_class_name])
+                    rows.extend([found_handle, class_name, ref_handle,
+                                 ref_class_name]
+                                for (ref_class_name, ref_handle) in references)
+                    if len(rows) >= BATCH_SIZE:
+                        self.__insert_references(rows)
+                        rows = []
+            self.__insert_references(rows)
+        self._create_reference_indexes()
+        self._txn_commit()
         callback(5)
 
+    def __insert_references(self, rows):
+        """
+        Insert rows into the reference table with a single statement.
+        """
+        if rows:
+            self.dbapi.executemany("INSERT INTO reference "
+                                   "(obj_handle, obj_class, "
+                                   "ref_handle, ref_class) "
+                                   "VALUES (?, ?, ?, ?)", rows)
+
+    def rewrite_blobs(self, callback=None):
+        """
+        Rewrite all stored objects with the current serializer.
+
+        Blobs are read in handle order, ARRAYSIZE rows at a time, and the
+        ones written by another serializer are updated in bulk.
+
+        :param callback: called with the number of rows processed so far.
+        :type callback: function
+        """
+        LOG.info("Rewriting blobs with the '%s' serializer",
+                 self.serializer.name)
+        header = self.serializer.header
+        count = 0
+        self._txn_begin()
+        for table in KEY_TO_NAME_MAP.values():
+            sql = ("SELECT handle, blob_data FROM %s WHERE handle > ? "
+                   "ORDER BY handle LIMIT %s" % (table, ARRAYSIZE))
+            last_handle = ''
+            while True:
+                self.dbapi.execute(sql, [last_handle])
+                rows = self.dbapi.fetchall()
+                if not rows:
+                    break
+                updates = [[self.serializer.encode(decode(blob)), handle]
+                           for handle, blob in rows if blob[0] != header]
+                if updates:
+                    self.dbapi.executemany("UPDATE %s SET blob_data = ? "
+                                           "WHERE handle = ?" % table,
+                                           updates)
+                last_handle = rows[-1][0]
+                count += len(rows)
+                if callback:
+                    callback(count)
+        self._txn_commit()
+        self._set_metadata('serializer', self.serializer.name)
+
     def rebuild_secondary(self, update):
         """
         Rebuild secondary indices
@@ -856,6 +1293,8 @@ class DBAPI(DbGeneric):
         self.genderStats = GenderStats(gstats)
 
     def has_handle(self, obj_key, handle):
+        if handle in self._pending.get(obj_key, ()):
+            return True
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT 1 FROM %s WHERE handle = ?" % table
         self.dbapi.execute(sql, [handle])
@@ -863,32 +1302,200 @@ class DBAPI(DbGeneric):
 
     def has_gramps_id(self, obj_key, gramps_id):
         table = KEY_TO_NAME_MAP[obj_key]
+        if self._pending_count:
+            if gramps_id in self._pending_ids.get(obj_key, ()):
+                return True
+            pending = self._pending.get(obj_key, ())
+            sql = "SELECT handle FROM %s WHERE gramps_id = ?" % table
+            self.dbapi.execute(sql, [gramps_id])
+            return any(row[0] not in pending for row in self.dbapi.fetchall())
         sql = "SELECT 1 FROM %s WHERE gramps_id = ?" % table
         self.dbapi.execute(sql, [gramps_id])
         return self.dbapi.fetchone() != None
 
     def get_gramps_ids(self, obj_key):
+        self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT gramps_id FROM %s" % table
         self.dbapi.execute(sql)
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
 
+    def get_gramps_id_handles(self, obj_key):
+        self._flush_batch()
+        table = KEY_TO_NAME_MAP[obj_key]
+        sql = "SELECT gramps_id, handle FROM %s" % table
+        self.dbapi.execute(sql)
+        return sorted((row[0], row[1]) for row in self.dbapi.fetchall())
+
     def get_raw_data(self, obj_key, handle):
+        dbapi = self._get_reader()
+        if self._pending_count and dbapi is self.dbapi:
+            entry = self._pending.get(obj_key, {}).get(handle)
+            if entry:
+                return decode(entry[1])
+        # Other threads do not see the changes of the current transaction,
+        # so they do not use the object cache.
+        cached = dbapi is self.dbapi
+        if cached:
+            blob = self._get_cached(obj_key, handle)
+            if blob is not None:
+                return decode(blob)
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT blob_data FROM %s WHERE handle = ?" % table
-        self.dbapi.execute(sql, [handle])
+        dbapi.execute(sql, [handle])
+        row = dbapi.fetchone()
+        if row:
+            if cached:
+                self._set_cached(obj_key, handle, row[0])
+            return decode(row[0])
+
+    def get_raw_data_many(self, obj_key, handles):
+        """
+        Return a dictionary of raw objects of the given type, keyed by handle.
+        Handles that are not found are left out.
+        """
+        dbapi = self._get_reader()
+        result = {}
+        if self._pending_count and dbapi is self.dbapi:
+            pending = self._pending.get(obj_key, {})
+            for handle in handles:
+                entry = pending.get(handle)
+                if entry:
+                    result[handle] = decode(entry[1])
+        cached = dbapi is self.dbapi
+        todo = set()
+        for handle in handles:
+            if handle in result:
+                continue
+            blob = self._get_cached(obj_key, handle) if cached else None
+            if blob is None:
+                todo.add(handle)
+            else:
+                result[handle] = decode(blob)
+        todo = list(todo)
+        table = KEY_TO_NAME_MAP[obj_key]
+        for start in range(0, len(todo), IN_SIZE):
+            chunk = todo[start:start + IN_SIZE]
+            sql = ("SELECT handle, blob_data FROM %s WHERE handle IN (%s)" %
+                   (table, ', '.join(['?'] * len(chunk))))
+            dbapi.execute(sql, chunk)
+            for row in dbapi.fetchall():
+                if cached:
+                    self._set_cached(obj_key, row[0], row[1])
+                result[row[0]] = decode(row[1])
+        return result
+
+    def __sort_keys_writable(self):
+        """
+        Return True if sort keys can be written: the database is writable and
+        no transaction is open, or its changes are committed and its signals
+        are being emitted.
+        """
+        return not self.readonly and (self.transaction is None or
+                                      self._txn_committed)
+
+    def get_sort_index(self, obj_key, name, signature):
+        if not self._has_sort_index() or not self._has_sort_key_triggers():
+            return None
+        self._flush_batch()
+        writable = self.__sort_keys_writable()
+        table = KEY_TO_NAME_MAP[obj_key]
+        signatures = self._get_metadata('sort_index', {})
+        if signatures.get(name) != signature:
+            if not writable:
+                return None
+            self._txn_begin()
+            self.dbapi.execute("DELETE FROM sort_key WHERE name = ?", [name])
+            self._txn_commit()
+            signatures[name] = signature
+            self._set_metadata('sort_index', signatures)
+        elif writable:
+            # Drop the keys of removed objects
+            self._txn_begin()
+            self.dbapi.execute("DELETE FROM sort_key "
+                               "WHERE name = ? AND stale = 1 AND handle "
+                               "NOT IN (SELECT handle FROM %s)" % table,
+                               [name])
+            self._txn_commit()
+        self.dbapi.execute("SELECT obj.handle FROM %s AS obj "
+                           "LEFT JOIN sort_key "
+                           "ON sort_key.name = ? "
+                           "AND sort_key.handle = obj.handle "
+                           "AND sort_key.stale = 0 "
+                           "WHERE sort_key.handle IS NULL" % table, [name])
+        return [row[0] for row in self.dbapi.fetchall()]
+
+    def get_sort_keys(self, name, start=None, offset=0, limit=None):
+        sql = "SELECT sort_key, handle FROM sort_key WHERE name = ?"
+        args = [name]
+        if start is not None:
+            key = start[0].encode('utf-8', 'surrogatepass')
+            sql += (" AND (sort_key > ? OR (sort_key = ? AND handle > ?))")
+            args += [key, key, start[1]]
+        sql += " ORDER BY sort_key, handle"
+        if limit is not None:
+            sql += " LIMIT %d OFFSET %d" % (limit, offset)
+        self.dbapi.execute(sql, args)
+        return [(bytes(row[0]).decode('utf-8', 'surrogatepass'), row[1])
+                for row in self.dbapi.fetchall()]
+
+    def get_sort_key(self, name, handle):
+        self.dbapi.execute("SELECT sort_key FROM sort_key "
+                           "WHERE name = ? AND handle = ?", [name, handle])
         row = self.dbapi.fetchone()
         if row:
-            return pickle.loads(row[0])
+            return bytes(row[0]).decode('utf-8', 'surrogatepass')
+        return None
+
+    def count_sort_keys(self, name, end=None):
+        sql = "SELECT COUNT(*) FROM sort_key WHERE name = ?"
+        args = [name]
+        if end is not None:
+            key = end[0].encode('utf-8', 'surrogatepass')
+            sql += (" AND (sort_key < ? OR (sort_key = ? AND handle < ?))")
+            args += [key, key, end[1]]
+        self.dbapi.execute(sql, args)
+        return self.dbapi.fetchone()[0]
+
+    def set_sort_keys(self, name, keys):
+        if not keys or not self.__sort_keys_writable():
+            return
+        self._txn_begin()
+        self.dbapi.executemany("DELETE FROM sort_key "
+                               "WHERE name = ? AND handle = ?",
+                               [[name, handle] for key, handle in keys])
+        self.dbapi.executemany("INSERT INTO sort_key "
+                               "(name, handle, sort_key, stale) "
+                               "VALUES (?, ?, ?, 0)",
+                               [[name, handle,
+                                 key.encode('utf-8', 'surrogatepass')]
+                                for key, handle in keys])
+        self._txn_commit()
+
+    def remove_sort_keys(self, name, handles):
+        if not handles or not self.__sort_keys_writable():
+            return
+        self._txn_begin()
+        self.dbapi.executemany("DELETE FROM sort_key "
+                               "WHERE name = ? AND handle = ?",
+                               [[name, handle] for handle in handles])
+        self._txn_commit()
 
     def _get_raw_from_id_data(self, obj_key, gramps_id):
+        pending = None
+        if self._pending_count:
+            handle = self._pending_ids.get(obj_key, {}).get(gramps_id)
+            if handle:
+                return self.get_raw_data(obj_key, handle)
+            pending = self._pending.get(obj_key)
         table = KEY_TO_NAME_MAP[obj_key]
-        sql = "SELECT blob_data FROM %s WHERE gramps_id = ?" % table
+        sql = "SELECT handle, blob_data FROM %s WHERE gramps_id = ?" % table
         self.dbapi.execute(sql, [gramps_id])
-        row = self.dbapi.fetchone()
-        if row:
-            return pickle.loads(row[0])
+        for row in self.dbapi.fetchall():
+            # Rows of buffered objects are stale; their IDs were checked above
+            if not pending or row[0] not in pending:
+                return decode(row[1])
 
     def get_gender_stats(self):
         """
@@ -917,6 +1524,7 @@ class DBAPI(DbGeneric):
         """
         Return the list of locale-sorted surnames contained in the database.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT DISTINCT surname "
                            "FROM person "
                            "ORDER BY surname")
@@ -962,32 +1570,60 @@ class DBAPI(DbGeneric):
         in the database.
         Does not commit.
         """
+        fields, values = self._get_secondary_values(obj)
+        if len(values) > 0:
+            table_name = obj.__class__.__name__.lower()
+            sets = ["%s = ?" % field for field in fields]
+            self.dbapi.execute("UPDATE %s SET %s where handle = ?"
+                               % (table_name, ", ".join(sets)),
+                               values + [obj.handle])
+
+    def _get_secondary_values(self, obj):
+        """
+        Given a primary object return the names of its secondary columns,
+        including the derived ones, and their values.
+        """
         table = obj.__class__.__name__
-        fields = [field[0] for field in obj.get_secondary_fields()]
-        sets = []
-        values = []
-        for field in fields:
-            sets.append("%s = ?" % field)
-            values.append(getattr(obj, field))
+        fields = [field[0] for field in obj.get_secondary_fields()
+                  if field[0] != 'handle']
+        values = [getattr(obj, field) for field in fields]
 
         # Derived fields
         if table == 'Person':
             given_name, surname = self._get_person_data(obj)
-            sets.append("given_name = ?")
-            values.append(given_name)
-            sets.append("surname = ?")
-            values.append(surname)
+            fields += ['given_name', 'surname']
+            values += [given_name, surname]
         if table == 'Place':
-            handle = self._get_place_data(obj)
-            sets.append("enclosed_by = ?")
-            values.append(handle)
+            fields.append('enclosed_by')
+            values.append(self._get_place_data(obj))
 
-        if len(values) > 0:
-            table_name = table.lower()
-            self.dbapi.execute("UPDATE %s SET %s where handle = ?"
-                               % (table_name, ", ".join(sets)),
-                               self._sql_cast_list(values)
-                               + [obj.handle])
+        return fields, self._sql_cast_list(values)
+
+    def _sql_insert(self, table, fields):
+        """
+        Return an INSERT statement for the blob and secondary columns.
+        """
+        return ("INSERT INTO %s (handle, blob_data%s) VALUES (?, ?%s)"
+                % (table, "".join(", %s" % field for field in fields),
+                   ", ?" * len(fields)))
+
+    def _sql_upsert(self, table, fields):
+        """
+        Return an INSERT statement for the blob and secondary columns that
+        updates the existing row if the handle is already stored.
+        """
+        return (self._sql_insert(table, fields) +
+                " ON CONFLICT (handle) DO UPDATE SET "
+                "blob_data = excluded.blob_data%s"
+                % "".join(", %s = excluded.%s" % (field, field)
+                          for field in fields))
+
+    def _sql_update(self, table, fields):
+        """
+        Return an UPDATE statement for the blob and secondary columns.
+        """
+        return ("UPDATE %s SET blob_data = ?%s WHERE handle = ?"
+                % (table, "".join(", %s = ?" % field for field in fields)))
 
     def _sql_cast_list(self, values):
         """
@@ -0,0 +1,86 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017      Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Pool of read-only connections for the DB-API backends.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import threading
+import weakref
+import logging
+
+LOG = logging.getLogger(".dbapi")
+
+#-------------------------------------------------------------------------
+#
+# ReaderPool class
+#
+#-------------------------------------------------------------------------
+class ReaderPool:
+    """
+    Hand out one read-only connection per thread.
+
+    A connection is opened the first time a thread asks for one and is closed
+    when the thread ends or when the pool is closed.
+    """
+
+    def __init__(self, factory):
+        """
+        :param factory: function that returns a new read-only connection, or
+                        None if the database does not support them.
+        :type factory: callable
+        """
+        self.__factory = factory
+        self.__local = threading.local()
+        self.__readers = weakref.WeakSet()
+        self.__lock = threading.Lock()
+
+    def get(self):
+        """
+        Return the read-only connection of the current thread, or None if the
+        database does not support read-only connections.
+        """
+        try:
+            return self.__local.reader
+        except AttributeError:
+            pass
+        reader = self.__factory()
+        if reader is not None:
+            LOG.debug("Opened read-only connection for thread %s",
+                      threading.current_thread().name)
+            with self.__lock:
+                self.__readers.add(reader)
+        self.__local.reader = reader
+        return reader
+
+    def close(self):
+        """
+        Close the read-only connections of all threads.
+        """
+        with self.__lock:
+            readers = list(self.__readers)
+            self.__readers.clear()
+        for reader in readers:
+            reader.close()
@@ -24,6 +24,8 @@
 # Standard python modules
 #
 #-------------------------------------------------------------------------
+import copy
+import itertools
 import psycopg2
 import re
 
@@ -37,6 +39,9 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 
 psycopg2.paramstyle = 'format'
 
+# Numbers for the names of server-side cursors
+_CURSOR_NUMBERS = itertools.count()
+
 class Postgresql:
     @classmethod
     def get_summary(cls):
@@ -54,10 +59,26 @@ class Postgresql:
         return summary
 
     def __init__(self, *args, **kwargs):
-        self.__connection = psycopg2.connect(*args, **kwargs)
+        self.__args = args
+        self.__kwargs = kwargs
+        self.__connect()
+        self.check_collation(glocale)
+
+    def __connect(self, readonly=False):
+        self.__connection = psycopg2.connect(*self.__args, **self.__kwargs)
+        if readonly:
+            self.__connection.set_session(readonly=True)
         self.__connection.autocommit = True
         self.__cursor = self.__connection.cursor()
-        self.check_collation(glocale)
+
+    def open_reader(self):
+        """
+        Return a new read-only session on the same database, which may be
+        used by another thread.
+        """
+        reader = copy.copy(self)
+        reader.__connect(readonly=True)
+        return reader
 
     def check_collation(self, locale):
         """
@@ -109,6 +130,14 @@ class Postgresql:
             self.__cursor.execute("rollback")
             raise
 
+    def executemany(self, sql, seq_of_args):
+        sql = self._hack_query(sql)
+        try:
+            self.__cursor.executemany(sql, seq_of_args)
+        except:
+            self.__cursor.execute("rollback")
+            raise
+
     def fetchone(self):
         try:
             return self.__cursor.fetchone()
@@ -133,19 +162,32 @@ class Postgresql:
                               "WHERE table_name=%s;", [table])
         return self.fetchone()[0] != 0
 
+    def has_upsert(self):
+        # INSERT ... ON CONFLICT was added in PostgreSQL 9.5
+        return self.__connection.server_version >= 90500
+
     def close(self):
         self.__connection.close()
 
     def cursor(self):
-        return Cursor(self.__connection)
+        return Cursor(self.__connection, self._hack_query)
 
 
 class Cursor:
-    def __init__(self, connection):
+    """
+    A server-side cursor, which fetches the rows of a query from the server
+    in chunks of ARRAYSIZE rows.
+
+    The cursor is declared WITH HOLD, so it can be used both inside and
+    outside of a transaction.
+    """
+    def __init__(self, connection, hack_query):
         self.__connection = connection
+        self.__hack_query = hack_query
 
     def __enter__(self):
-        self.__cursor = self.__connection.cursor()
+        name = 'gramps_cursor_%d' % next(_CURSOR_NUMBERS)
+        self.__cursor = self.__connection.cursor(name, withhold=True)
         self.__cursor.arraysize = ARRAYSIZE
         return self
 
@@ -161,7 +203,8 @@ class Cursor:
         :param kwargs: arguments to be passed to the sqlite3 execute statement
         :type kwargs: list
         """
-        self.__cursor.execute(*args, **kwargs)
+        sql = self.__hack_query(args[0])
+        self.__cursor.execute(sql, *args[1:], **kwargs)
 
     def fetchmany(self):
         """
@@ -0,0 +1,144 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017      Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Serializers for the blob_data column of the DB-API tables.
+
+Every blob starts with a header byte that identifies the serializer that
+wrote it, so a database may contain blobs written by different serializers
+and the serializer used for new writes can be changed at any time. The header
+of the pickle serializer is the PROTO opcode that starts every pickle, which
+keeps blobs written before serializers were introduced readable.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import pickle
+import marshal
+import logging
+
+LOG = logging.getLogger(".dbapi")
+
+#-------------------------------------------------------------------------
+#
+# Serializer classes
+#
+#-------------------------------------------------------------------------
+class Serializer:
+    """
+    Base class of the blob serializers.
+
+    A serializer converts the tuple returned by the serialize method of a
+    primary object into bytes and back. The first byte written by encode must
+    be the header of the serializer.
+    """
+    name = None
+    header = None
+
+    def encode(self, data):
+        """
+        Return the blob for the serialized object data.
+        """
+        raise NotImplementedError
+
+    def decode(self, blob):
+        """
+        Return the serialized object data stored in a blob.
+        """
+        raise NotImplementedError
+
+
+class PickleSerializer(Serializer):
+    """
+    Store blobs as pickles. This is the default.
+    """
+    name = 'pickle'
+    header = 0x80
+
+    def encode(self, data):
+        return pickle.dumps(data)
+
+    def decode(self, blob):
+        return pickle.loads(blob)
+
+
+class MarshalSerializer(Serializer):
+    """
+    Store blobs in the marshal format.
+
+    The marshal format only supports the built-in types used by the
+    serialized data. It may change between Python versions, but newer
+    versions can still read data written by older ones.
+    """
+    name = 'marshal'
+    header = 0x01
+
+    def encode(self, data):
+        return b'\x01' + marshal.dumps(data)
+
+    def decode(self, blob):
+        return marshal.loads(blob[1:])
+
+#-------------------------------------------------------------------------
+#
+# Registry
+#
+#-------------------------------------------------------------------------
+_SERIALIZERS = {}
+_DECODERS = {}
+
+def register_serializer(serializer):
+    """
+    Make a serializer available for encoding and decoding blobs.
+
+    :param serializer: the serializer to register.
+    :type serializer: Serializer
+    """
+    _SERIALIZERS[serializer.name] = serializer
+    _DECODERS[serializer.header] = serializer.decode
+
+def get_serializer(name):
+    """
+    Return the serializer with the given name.
+
+    The pickle serializer is returned if the name is unknown.
+
+    :param name: name of the serializer.
+    :type name: str
+    :returns: the serializer.
+    :rtype: Serializer
+    """
+    if name not in _SERIALIZERS:
+        LOG.warning("Unknown serializer '%s', using pickle", name)
+        name = PickleSerializer.name
+    return _SERIALIZERS[name]
+
+def decode(blob):
+    """
+    Return the serialized object data stored in a blob written by any
+    registered serializer.
+    """
+    return _DECODERS[blob[0]](blob)
+
+register_serializer(PickleSerializer())
+register_serializer(MarshalSerializer())
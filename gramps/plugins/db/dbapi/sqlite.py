@@ -28,9 +28,11 @@ Backend for sqlite database.
 # standard python modules
 #
 #-------------------------------------------------------------------------
+import os
 import sqlite3
 import logging
 import re
+from urllib.request import pathname2url
 
 #-------------------------------------------------------------------------
 #
@@ -81,12 +83,50 @@ class Sqlite:
         :type kwargs: list
         """
         self.log = logging.getLogger(".sqlite")
+        self.__args = args
+        self.__kwargs = kwargs
         self.__connection = sqlite3.connect(*args, **kwargs)
         self.__cursor = self.__connection.cursor()
         self.__connection.create_function("regexp", 2, regexp)
         self.__collations = []
         self.check_collation(glocale)
 
+    def open_reader(self):
+        """
+        Return a new read-only connection to the same database, which may be
+        used by another thread, or None for an in-memory database.
+        """
+        if self.__args:
+            database = self.__args[0]
+        else:
+            database = self.__kwargs.get('database', ':memory:')
+        if self.__kwargs.get('uri') or database in ('', ':memory:'):
+            return None
+        kwargs = dict(self.__kwargs, uri=True, check_same_thread=False)
+        kwargs.pop('database', None)
+        uri = 'file:%s?mode=ro' % pathname2url(os.path.abspath(database))
+        return Sqlite(uri, *self.__args[1:], **kwargs)
+
+    def set_pragmas(self, pragmas):
+        """
+        Set PRAGMAs of the connection.
+
+        Invalid values are logged and ignored. A PRAGMA can not be changed
+        inside a transaction.
+
+        :param pragmas: (name, value) pairs, set in the given order.
+        :type pragmas: list
+        """
+        for name, value in pragmas:
+            if not re.match(r'^-?\w+$', str(value)):
+                self.log.warning("Invalid value for PRAGMA %s: %r",
+                                 name, value)
+                continue
+            sql = "PRAGMA %s = %s" % (name, value)
+            self.log.debug(sql)
+            self.__cursor.execute(sql)
+            self.__cursor.fetchall()
+
     def check_collation(self, locale):
         """
         Checks that a collation exists and if not creates it.
@@ -110,6 +150,20 @@ class Sqlite:
         self.log.debug(args)
         self.__cursor.execute(*args, **kwargs)
 
+    def executemany(self, *args, **kwargs):
+        """
+        Executes an SQL statement against all parameter sequences.
+
+        :param args: arguments to be passed to the sqlite3 executemany
+                     statement
+        :type args: list
+        :param kwargs: arguments to be passed to the sqlite3 executemany
+                       statement
+        :type kwargs: list
+        """
+        self.log.debug(args[0])
+        self.__cursor.executemany(*args, **kwargs)
+
     def fetchone(self):
         """
         Fetches the next row of a query result set, returning a single sequence,
@@ -128,7 +182,12 @@ class Sqlite:
         """
         Start a transaction manually. This transactions usually persist until
         the next COMMIT or ROLLBACK command.
+
+        The sqlite3 module opens a transaction implicitly before statements
+        that change the database, which is committed first.
         """
+        if self.__connection.in_transaction:
+            self.commit()
         self.log.debug("BEGIN TRANSACTION;")
         self.execute("BEGIN TRANSACTION;")
 
@@ -160,6 +219,16 @@ class Sqlite:
                      "WHERE type='table' AND name='%s';" % table)
         return self.fetchone()[0] != 0
 
+    def has_upsert(self):
+        """
+        Test whether the INSERT ... ON CONFLICT DO UPDATE statement is
+        supported. It was added in SQLite 3.24.0.
+
+        :returns: True if upserts are supported, false otherwise.
+        :rtype: bool
+        """
+        return sqlite3.sqlite_version_info >= (3, 24, 0)
+
     def close(self):
         """
         Close the current database.
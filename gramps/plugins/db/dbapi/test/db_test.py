@@ -24,16 +24,23 @@
 #
 #-------------------------------------------------------------------------
 import unittest
+import os
+import threading
 
 #-------------------------------------------------------------------------
 #
 # Gramps modules
 #
 #-------------------------------------------------------------------------
-from gramps.gen.db import DbTxn
+from gramps.gen.db import (DbTxn, PERSON_KEY, FAMILY_KEY, EVENT_KEY,
+                           DBMODE_R)
 from gramps.gen.db.utils import make_database
+from gramps.gen.utils.file import get_empty_tempdir
 from gramps.gen.lib import (Person, Family, Event, Place, Repository, Source,
-                            Citation, Media, Note, Tag, Researcher, Surname)
+                            Citation, Media, Note, Tag, Researcher, Surname,
+                            EventRef, Name)
+from ..dbapi import BATCH_SIZE, IN_SIZE
+from ..serializer import get_serializer
 
 #-------------------------------------------------------------------------
 #
@@ -302,6 +309,13 @@ class DbRandomTest(unittest.TestCase):
                              self.db.get_note_gramps_ids,
                              self.db.get_number_of_notes)
 
+    def test_get_gramps_id_handles(self):
+        for obj_key, obj_type in ((PERSON_KEY, 'Person'),
+                                  (FAMILY_KEY, 'Family')):
+            pairs = zip(self.gids[obj_type], self.handles[obj_type])
+            self.assertEqual(self.db.get_gramps_id_handles(obj_key),
+                             sorted(pairs))
+
     ################################################################
     #
     # Test get_*_from_handle methods
@@ -562,6 +576,45 @@ class DbRandomTest(unittest.TestCase):
         self.__get_cursor_test(self.db.get_tag_cursor,
                                self.db.get_raw_tag_data)
 
+    def test_get_filtered_cursor(self):
+        gramps_id = self.gids['Person'][3]
+        cursor = self.db.get_filtered_cursor('Person', 'gramps_id = ?',
+                                             [gramps_id])
+        with cursor:
+            handles = [handle for handle, data in cursor]
+        self.assertEqual(handles, [self.handles['Person'][3]])
+
+    def test_get_filtered_cursor_subquery(self):
+        sql = 'handle IN (SELECT obj_handle FROM reference)'
+        with self.db.get_filtered_cursor('Event', sql, []) as cursor:
+            self.assertEqual(list(cursor), [])
+
+    ################################################################
+    #
+    # Test get_*_from_handles methods
+    #
+    ################################################################
+
+    def test_get_raw_data_many(self):
+        handles = self.handles['Person'][:3] + ['missing']
+        result = self.db.get_raw_data_many(PERSON_KEY, handles)
+        self.assertEqual(sorted(result), sorted(handles[:3]))
+        for handle in handles[:3]:
+            self.assertEqual(result[handle],
+                             self.db.get_raw_person_data(handle))
+
+    def test_get_people_from_handles(self):
+        handles = list(reversed(self.handles['Person']))
+        handles.insert(1, 'missing')
+        people = self.db.get_people_from_handles(handles)
+        self.assertEqual([person.handle for person in people],
+                         [handle for handle in handles if handle != 'missing'])
+
+    def test_get_events_from_handles(self):
+        handles = self.handles['Event'][:2]
+        events = self.db.get_events_from_handles(handles + handles)
+        self.assertEqual([event.handle for event in events], handles + handles)
+
     ################################################################
     #
     # Test iter_*_handles methods
@@ -865,6 +918,691 @@ class DbPersonTest(unittest.TestCase):
         self.assertEqual(saved['John'], (3, 1, 1))
         self.assertEqual(saved['Mary'], (1, 4, 0))
 
+    ################################################################
+    #
+    # Test undo and redo
+    #
+    ################################################################
+
+    def test_undo_redo(self):
+        handle = self.db.get_person_handles()[0]
+        person = self.db.get_person_from_handle(handle)
+        old_id = person.gramps_id
+        person.gramps_id = 'X0001'
+        with DbTxn('Change ID', self.db) as trans:
+            self.db.commit_person(person, trans)
+        self.assertTrue(self.db.has_person_gramps_id('X0001'))
+        self.db.undo()
+        self.assertFalse(self.db.has_person_gramps_id('X0001'))
+        self.assertTrue(self.db.has_person_gramps_id(old_id))
+        self.db.redo()
+        self.assertTrue(self.db.has_person_gramps_id('X0001'))
+        self.assertFalse(self.db.has_person_gramps_id(old_id))
+
+#-------------------------------------------------------------------------
+#
+# DbReferenceTest class
+#
+#-------------------------------------------------------------------------
+class DbReferenceTest(unittest.TestCase):
+    '''
+    Tests of the reference table.
+    '''
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        self.notes = []
+        with DbTxn('Add test objects', self.db) as trans:
+            for index in range(3):
+                note = Note()
+                self.db.add_note(note, trans)
+                self.notes.append(note.handle)
+            self.person = Person()
+            self.person.set_note_list(self.notes[:2])
+            self.db.add_person(self.person, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __references(self):
+        self.db.dbapi.execute("SELECT obj_handle, ref_handle FROM reference")
+        return sorted(tuple(row) for row in self.db.dbapi.fetchall())
+
+    def __expected(self, notes):
+        return sorted((self.person.handle, handle) for handle in notes)
+
+    def test_update(self):
+        self.person.set_note_list(self.notes[1:])
+        with DbTxn('Change notes', self.db) as trans:
+            self.db.commit_person(self.person, trans)
+        self.assertEqual(self.__references(), self.__expected(self.notes[1:]))
+        self.db.undo()
+        self.assertEqual(self.__references(), self.__expected(self.notes[:2]))
+        self.db.redo()
+        self.assertEqual(self.__references(), self.__expected(self.notes[1:]))
+
+    def test_remove(self):
+        with DbTxn('Remove person', self.db) as trans:
+            self.db.remove_person(self.person.handle, trans)
+        self.assertEqual(self.__references(), [])
+        self.db.undo()
+        self.assertEqual(self.__references(), self.__expected(self.notes[:2]))
+
+    def test_unique(self):
+        self.assertRaises(Exception, self.db.dbapi.execute,
+                          "INSERT INTO reference (obj_handle, ref_handle) "
+                          "VALUES (?, ?)", [self.person.handle, self.notes[0]])
+
+    def test_reindex_reference_map(self):
+        self.db.dbapi.execute("DELETE FROM reference")
+        progress = []
+        self.db.reindex_reference_map(progress.append)
+        self.assertEqual(progress, [4, 5])
+        self.assertEqual(self.__references(), self.__expected(self.notes[:2]))
+        self.test_unique()
+
+    def test_older_database(self):
+        db = make_database("dbapi")
+        path = get_empty_tempdir("dbapi_reference_test")
+        db.write_version(path)
+        db.load(path)
+        with DbTxn('Add test person', db) as trans:
+            db.add_person(self.person, trans)
+        # Reference table of a database created before the unique index
+        db._drop_reference_indexes()
+        db.dbapi.execute("CREATE INDEX reference_obj_handle "
+                         "ON reference(obj_handle)")
+        db.dbapi.execute("INSERT INTO reference "
+                         "SELECT * FROM reference")
+        db.dbapi.commit()
+        db.close()
+        # The table is left as it is when the database is opened
+        db.load(path)
+        db.dbapi.execute("SELECT COUNT(*) FROM reference")
+        self.assertEqual(db.dbapi.fetchone()[0], 4)
+        db.reindex_reference_map(lambda percent: None)
+        db.dbapi.execute("SELECT COUNT(*) FROM reference")
+        self.assertEqual(db.dbapi.fetchone()[0], 2)
+        db.dbapi.execute("SELECT name FROM sqlite_master "
+                         "WHERE type = 'index' AND tbl_name = 'reference'")
+        self.assertEqual(sorted(row[0] for row in db.dbapi.fetchall()),
+                         ['reference_obj_ref', 'reference_ref_handle'])
+        db.close()
+
+#-------------------------------------------------------------------------
+#
+# DbBatchTest class
+#
+#-------------------------------------------------------------------------
+class DbBatchTest(unittest.TestCase):
+    '''
+    Tests of the buffered writes made by batch transactions.
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = make_database("inmemorydb")
+        cls.db.load(None)
+
+    def tearDown(self):
+        with DbTxn('Remove test objects', self.db) as trans:
+            for handle in self.db.get_person_handles():
+                self.db.remove_person(handle, trans)
+            for handle in self.db.get_event_handles():
+                self.db.remove_event(handle, trans)
+
+    def __add_person(self, surname, trans):
+        event = Event()
+        self.db.add_event(event, trans)
+        person = Person()
+        surname1 = Surname()
+        surname1.surname = surname
+        person.primary_name.set_surname_list([surname1])
+        event_ref = EventRef()
+        event_ref.ref = event.handle
+        person.add_event_ref(event_ref)
+        self.db.add_person(person, trans)
+        return person, event
+
+    def test_read_pending(self):
+        with DbTxn('Batch', self.db, batch=True) as trans:
+            person, event = self.__add_person('Allen', trans)
+            self.assertTrue(self.db.has_person_handle(person.handle))
+            self.assertTrue(self.db.has_person_gramps_id(person.gramps_id))
+            person2 = self.db.get_person_from_handle(person.handle)
+            self.assertEqual(person.serialize(), person2.serialize())
+            person2 = self.db.get_person_from_gramps_id(person.gramps_id)
+            self.assertEqual(person.serialize(), person2.serialize())
+            self.assertEqual(self.db.get_number_of_people(), 1)
+
+    def test_recommit_pending(self):
+        with DbTxn('Batch', self.db, batch=True) as trans:
+            person, event = self.__add_person('Allen', trans)
+            old_id = person.gramps_id
+            person.gramps_id = 'X0001'
+            self.db.commit_person(person, trans)
+            self.assertFalse(self.db.has_person_gramps_id(old_id))
+            self.assertTrue(self.db.has_person_gramps_id('X0001'))
+            self.db.remove_event(event.handle, trans)
+            self.assertFalse(self.db.has_event_handle(event.handle))
+        person2 = self.db.get_person_from_gramps_id('X0001')
+        self.assertEqual(person.serialize(), person2.serialize())
+        self.assertEqual(self.db.get_number_of_people(), 1)
+        self.assertEqual(self.db.get_number_of_events(), 0)
+
+    def test_bulk_write(self):
+        count = BATCH_SIZE + 10
+        with DbTxn('Batch', self.db, batch=True) as trans:
+            for index in range(count):
+                self.__add_person('Surname%04d' % index, trans)
+        self.assertEqual(self.db.get_number_of_people(), count)
+        self.assertEqual(len(set(self.db.get_person_gramps_ids())), count)
+        handles = self.db.get_person_handles(sort_handles=True)
+        surnames = [self.db.get_person_from_handle(handle).primary_name
+                    .get_surname() for handle in handles]
+        self.assertEqual(surnames, sorted(surnames))
+        for person in self.db.iter_people():
+            event_handle = person.get_event_ref_list()[0].ref
+            backlinks = list(self.db.find_backlink_handles(event_handle))
+            self.assertEqual(backlinks, [('Person', person.handle)])
+
+    def test_get_from_handles(self):
+        count = IN_SIZE + 10
+        with DbTxn('Batch', self.db, batch=True) as trans:
+            people = [self.__add_person('Surname%04d' % index, trans)[0]
+                      for index in range(count)]
+            pending = people[-1].handle
+            self.assertEqual(
+                [person.handle for person in
+                 self.db.get_people_from_handles([pending])], [pending])
+        handles = [person.handle for person in people]
+        self.assertEqual([person.handle for person in
+                          self.db.get_people_from_handles(handles)], handles)
+
+    def test_abort(self):
+        try:
+            with DbTxn('Batch', self.db, batch=True) as trans:
+                self.__add_person('Allen', trans)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.db.get_number_of_people(), 0)
+
+#-------------------------------------------------------------------------
+#
+# DbSerializerTest class
+#
+#-------------------------------------------------------------------------
+class DbSerializerTest(unittest.TestCase):
+    '''
+    Tests of the blob serializers.
+    '''
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        self.handles = []
+        with DbTxn('Add test objects', self.db) as trans:
+            for index in range(10):
+                person = Person()
+                person.primary_name.first_name = 'Name%s' % index
+                self.handles.append(self.db.add_person(person, trans))
+
+    def tearDown(self):
+        self.db.close()
+
+    def __blob_headers(self):
+        self.db.dbapi.execute("SELECT blob_data FROM person")
+        return set(row[0][0] for row in self.db.dbapi.fetchall())
+
+    def test_serializers(self):
+        data = Person().serialize()
+        for name in ('pickle', 'marshal'):
+            serializer = get_serializer(name)
+            blob = serializer.encode(data)
+            self.assertEqual(blob[0], serializer.header)
+            self.assertEqual(serializer.decode(blob), data)
+
+    def test_rewrite_blobs(self):
+        people = [self.db.get_person_from_handle(handle).serialize()
+                  for handle in self.handles]
+        self.assertEqual(self.__blob_headers(),
+                         {get_serializer('pickle').header})
+        self.db.serializer = get_serializer('marshal')
+        self.db.rewrite_blobs()
+        self.assertEqual(self.__blob_headers(),
+                         {get_serializer('marshal').header})
+        self.assertEqual(self.db._get_metadata('serializer'), 'marshal')
+        for handle, data in zip(self.handles, people):
+            person = self.db.get_person_from_handle(handle)
+            self.assertEqual(person.serialize(), data)
+
+    def test_mixed_blobs(self):
+        self.db.serializer = get_serializer('marshal')
+        with DbTxn('Add test objects', self.db) as trans:
+            self.handles.append(self.db.add_person(Person(), trans))
+        self.assertEqual(self.__blob_headers(),
+                         {get_serializer('pickle').header,
+                          get_serializer('marshal').header})
+        self.assertEqual(len(list(self.db.iter_people())), 11)
+
+
+#-------------------------------------------------------------------------
+#
+# DbSqliteSettingsTest class
+#
+#-------------------------------------------------------------------------
+class DbSqliteSettingsTest(unittest.TestCase):
+    '''
+    Tests of the SQLite settings in settings.ini.
+    '''
+
+    def setUp(self):
+        self.db = make_database("dbapi")
+        path = get_empty_tempdir("dbapi_sqlite_settings_test")
+        self.db.write_version(path)
+        settings_ini = os.path.join(path, 'settings.ini')
+        with open(settings_ini) as ini_file:
+            settings = ini_file.read()
+        settings = settings.replace(";;synchronous='NORMAL'",
+                                    "synchronous='FULL'")
+        settings = settings.replace(";;mmap_size=0", "mmap_size='large'")
+        with open(settings_ini, 'w') as ini_file:
+            ini_file.write(settings)
+        self.db.load(path)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __pragma(self, name):
+        self.db.dbapi.execute("PRAGMA %s" % name)
+        return self.db.dbapi.fetchone()[0]
+
+    def test_pragmas(self):
+        self.assertEqual(self.__pragma('journal_mode'), 'wal')
+        self.assertEqual(self.__pragma('synchronous'), 2)
+        self.assertEqual(self.__pragma('cache_size'), -20000)
+        self.assertEqual(self.__pragma('mmap_size'), 0)
+
+    def test_batch_pragmas(self):
+        with DbTxn('Add test objects', self.db, batch=True) as trans:
+            self.assertEqual(self.__pragma('synchronous'), 1)
+            self.db.add_person(Person(), trans)
+        self.assertEqual(self.__pragma('synchronous'), 2)
+        self.assertEqual(self.db.get_number_of_people(), 1)
+
+    def test_batch_synchronous_off(self):
+        path = self.db.get_save_path()
+        self.db.close()
+        settings_ini = os.path.join(path, 'settings.ini')
+        with open(settings_ini) as ini_file:
+            settings = ini_file.read()
+        settings = settings.replace(";;batch_synchronous='NORMAL'",
+                                    "batch_synchronous='OFF'")
+        with open(settings_ini, 'w') as ini_file:
+            ini_file.write(settings)
+        self.db.load(path)
+        with DbTxn('Add test objects', self.db, batch=True) as trans:
+            self.assertEqual(self.__pragma('synchronous'), 0)
+            self.db.add_person(Person(), trans)
+        self.assertEqual(self.__pragma('synchronous'), 2)
+
+
+#-------------------------------------------------------------------------
+#
+# DbReaderTest class
+#
+#-------------------------------------------------------------------------
+class DbReaderTest(unittest.TestCase):
+    '''
+    Tests of the read-only connections of other threads.
+    '''
+
+    def setUp(self):
+        self.db = make_database("dbapi")
+        path = get_empty_tempdir("dbapi_reader_test")
+        self.db.write_version(path)
+        self.db.load(path)
+        with DbTxn('Add test objects', self.db) as trans:
+            person = Person()
+            self.handle = self.db.add_person(person, trans)
+            event = Event()
+            self.db.add_event(event, trans)
+            person.add_event_ref(EventRef())
+            person.get_event_ref_list()[0].ref = event.handle
+            self.db.commit_person(person, trans)
+            self.event_handle = event.handle
+
+    def tearDown(self):
+        self.db.close()
+
+    def __in_thread(self, func):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(func()))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_reads(self):
+        data = self.__in_thread(
+            lambda: self.db.get_raw_person_data(self.handle))
+        self.assertEqual(data, self.db.get_raw_person_data(self.handle))
+        handles = self.__in_thread(
+            lambda: [handle for handle, data in self.db.get_person_cursor()])
+        self.assertEqual(handles, [self.handle])
+        refs = self.__in_thread(
+            lambda: list(self.db.find_backlink_handles(self.event_handle)))
+        self.assertEqual(refs, [('Person', self.handle)])
+
+    def test_uncommitted(self):
+        with DbTxn('Add test objects', self.db) as trans:
+            handle = self.db.add_person(Person(), trans)
+            self.assertIsNotNone(self.db.get_raw_person_data(handle))
+            self.assertIsNone(self.__in_thread(
+                lambda: self.db.get_raw_person_data(handle)))
+        self.assertIsNotNone(self.__in_thread(
+            lambda: self.db.get_raw_person_data(handle)))
+
+    def test_readonly(self):
+        reader = self.__in_thread(self.db._get_reader)
+        self.assertIsNot(reader, self.db.dbapi)
+        self.assertIs(self.db._get_reader(), self.db.dbapi)
+        self.assertRaises(Exception, reader.execute,
+                          "DELETE FROM person")
+
+#-------------------------------------------------------------------------
+#
+# DbChangeLogTest class
+#
+#-------------------------------------------------------------------------
+class DbChangeLogTest(unittest.TestCase):
+    '''
+    Tests of the log of changed objects.
+    '''
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_changes(self):
+        count = self.db.get_change_count()
+        self.assertEqual(self.db.get_changed_handles(count, PERSON_KEY), set())
+        with DbTxn('Add test objects', self.db) as trans:
+            person = Person()
+            handle1 = self.db.add_person(person, trans)
+            handle2 = self.db.add_person(Person(), trans)
+            self.db.add_family(Family(), trans)
+        self.assertEqual(self.db.get_changed_handles(count, PERSON_KEY),
+                         {handle1, handle2})
+        self.assertEqual(len(self.db.get_changed_handles(count, FAMILY_KEY)),
+                         1)
+        count = self.db.get_change_count()
+        with DbTxn('Remove test object', self.db) as trans:
+            self.db.remove_person(handle2, trans)
+        self.assertEqual(self.db.get_changed_handles(count, PERSON_KEY),
+                         {handle2})
+        self.db.undo()
+        self.assertEqual(self.db.get_changed_handles(count, PERSON_KEY),
+                         {handle2})
+
+    def test_close(self):
+        count = self.db.get_change_count()
+        self.db.close()
+        self.db.load(None)
+        self.assertIsNone(self.db.get_changed_handles(count, PERSON_KEY))
+        self.assertIsNone(self.db.get_changed_handles(count + 10, PERSON_KEY))
+
+#-------------------------------------------------------------------------
+#
+# DbSortIndexTest class
+#
+#-------------------------------------------------------------------------
+class DbSortIndexTest(unittest.TestCase):
+    '''
+    Tests of the stored sort keys.
+    '''
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        with DbTxn('Add test objects', self.db) as trans:
+            self.event = Event()
+            self.db.add_event(self.event, trans)
+            self.handles = []
+            for index in range(3):
+                person = Person()
+                if index == 0:
+                    event_ref = EventRef()
+                    event_ref.ref = self.event.handle
+                    person.add_event_ref(event_ref)
+                self.handles.append(self.db.add_person(person, trans))
+
+    def tearDown(self):
+        self.db.close()
+
+    def __set_keys(self, keys):
+        self.db.get_sort_index(PERSON_KEY, 'test', 'sig')
+        self.db.set_sort_keys('test', list(zip(keys, self.handles)))
+
+    def test_keys(self):
+        missing = self.db.get_sort_index(PERSON_KEY, 'test', 'sig')
+        self.assertEqual(set(missing), set(self.handles))
+        self.__set_keys(['c', '\u00e9', 'a'])
+        self.assertEqual(self.db.get_sort_index(PERSON_KEY, 'test', 'sig'),
+                         [])
+        keys = sorted(zip(['c', '\u00e9', 'a'], self.handles))
+        self.assertEqual(self.db.get_sort_keys('test'), keys)
+        self.assertEqual(self.db.get_sort_key('test', self.handles[1]),
+                         '\u00e9')
+        self.assertEqual(self.db.count_sort_keys('test'), 3)
+        self.assertEqual(self.db.count_sort_keys('test', keys[2]), 2)
+
+    def test_pages(self):
+        self.__set_keys(['c', 'b', 'a'])
+        keys = self.db.get_sort_keys('test')
+        self.assertEqual(self.db.get_sort_keys('test', limit=2), keys[:2])
+        self.assertEqual(self.db.get_sort_keys('test', offset=1, limit=1),
+                         keys[1:2])
+        self.assertEqual(self.db.get_sort_keys('test', start=keys[0]),
+                         keys[1:])
+        self.db.remove_sort_keys('test', [keys[1][1]])
+        self.assertEqual(self.db.get_sort_keys('test'), [keys[0], keys[2]])
+
+    def test_changes(self):
+        self.__set_keys(['c', 'b', 'a'])
+        with DbTxn('Edit test objects', self.db) as trans:
+            self.db.commit_person(self.db.get_person_from_handle(
+                self.handles[1]), trans)
+        self.assertEqual(self.db.get_sort_index(PERSON_KEY, 'test', 'sig'),
+                         [self.handles[1]])
+        # Stale keys keep their place until they are replaced
+        self.assertEqual(self.db.get_sort_key('test', self.handles[1]), 'b')
+        self.assertEqual(self.db.count_sort_keys('test'), 3)
+        with DbTxn('Edit test objects', self.db) as trans:
+            self.db.commit_event(self.event, trans)
+            self.db.remove_person(self.handles[2], trans)
+        missing = self.db.get_sort_index(PERSON_KEY, 'test', 'sig')
+        self.assertEqual(set(missing), set(self.handles[:2]))
+        self.assertEqual(self.db.count_sort_keys('test'), 2)
+        self.__set_keys(['d', 'e'])
+        self.assertEqual(self.db.get_sort_keys('test'),
+                         list(zip(['d', 'e'], self.handles)))
+
+    def test_signature(self):
+        self.__set_keys(['c', 'b', 'a'])
+        self.assertEqual(self.db.get_sort_index(PERSON_KEY, 'test', 'sig'),
+                         [])
+        missing = self.db.get_sort_index(PERSON_KEY, 'test', 'other')
+        self.assertEqual(len(missing), 3)
+        self.assertEqual(self.db.get_sort_keys('test'), [])
+        self.assertEqual(len(self.db.get_sort_index(EVENT_KEY, 'events',
+                                                    'sig')), 1)
+
+    def test_signal_handlers(self):
+        # Views store the keys of changed objects from the signal handlers,
+        # after the changes are committed
+        self.__set_keys(['c', 'b', 'a'])
+        person = Person()
+        self.db.connect('person-add', lambda handles: self.db.set_sort_keys(
+            'test', [('d', handle) for handle in handles]))
+        self.db.connect('person-delete', lambda handles:
+                        self.db.remove_sort_keys('test', handles))
+        with DbTxn('Add test person', self.db) as trans:
+            self.db.add_person(person, trans)
+        self.assertEqual(self.db.count_sort_keys('test'), 4)
+        self.assertEqual(self.db.get_sort_key('test', person.handle), 'd')
+        with DbTxn('Remove test person', self.db) as trans:
+            self.db.remove_person(self.handles[0], trans)
+        self.assertEqual(self.db.count_sort_keys('test'), 3)
+        self.assertIsNone(self.db.get_sort_key('test', self.handles[0]))
+        # Keys are not written while a transaction is open
+        with DbTxn('Add test person', self.db) as trans:
+            self.db.set_sort_keys('test', [('e', self.handles[1])])
+        self.assertEqual(self.db.get_sort_key('test', self.handles[1]), 'b')
+
+    def test_other_version(self):
+        # Writes that bypass the database layer, as another version of
+        # Gramps would make, also mark the keys as stale
+        self.__set_keys(['c', 'b', 'a'])
+        self.db.dbapi.execute("UPDATE event SET blob_data = blob_data "
+                              "WHERE handle = ?", [self.event.handle])
+        self.db.dbapi.execute("DELETE FROM person WHERE handle = ?",
+                              [self.handles[2]])
+        self.db.dbapi.commit()
+        self.assertEqual(self.db.get_sort_index(PERSON_KEY, 'test', 'sig'),
+                         [self.handles[0]])
+        self.assertEqual(self.db.get_sort_keys('test'),
+                         [('b', self.handles[1]), ('c', self.handles[0])])
+
+    def test_no_triggers(self):
+        db = make_database("dbapi")
+        path = get_empty_tempdir("dbapi_sort_index_test")
+        db.write_version(path)
+        db.load(path)
+        db.get_sort_index(PERSON_KEY, 'test', 'sig')
+        with DbTxn('Add test person', db) as trans:
+            handle = db.add_person(Person(), trans)
+        db.set_sort_keys('test', [('a', handle)])
+        db.dbapi.execute("SELECT name FROM sqlite_master "
+                         "WHERE type = 'trigger'")
+        for row in db.dbapi.fetchall():
+            db.dbapi.execute("DROP TRIGGER %s" % row[0])
+        db.dbapi.commit()
+        db.close()
+        # Keys stored without the triggers are not used
+        db.load(path)
+        self.assertEqual(db.get_sort_index(PERSON_KEY, 'test', 'sig'),
+                         [handle])
+        self.assertEqual(db.get_sort_keys('test'), [])
+        db.close()
+
+    def test_read_only(self):
+        db = make_database("dbapi")
+        path = get_empty_tempdir("dbapi_sort_index_test")
+        db.write_version(path)
+        db.load(path)
+        with DbTxn('Add test person', db) as trans:
+            db.add_person(Person(), trans)
+        # A database created before the sort keys were stored
+        db.dbapi.execute("SELECT name FROM sqlite_master "
+                         "WHERE type = 'trigger'")
+        for row in db.dbapi.fetchall():
+            db.dbapi.execute("DROP TRIGGER %s" % row[0])
+        db.dbapi.execute("DROP TABLE sort_key")
+        db.dbapi.commit()
+        db.close()
+        # A read-only database is opened without writing the migrations
+        db.load(path, mode=DBMODE_R)
+        self.assertFalse(db.dbapi.table_exists("sort_key"))
+        self.assertIsNone(db.get_sort_index(PERSON_KEY, 'test', 'sig'))
+        db.close()
+        db.load(path)
+        self.assertTrue(db.dbapi.table_exists("sort_key"))
+        self.assertEqual(len(db.get_sort_index(PERSON_KEY, 'test', 'sig')), 1)
+        db.close()
+
+#-------------------------------------------------------------------------
+#
+# DbObjectCacheTest class
+#
+#-------------------------------------------------------------------------
+class DbObjectCacheTest(unittest.TestCase):
+    '''
+    Tests of the object cache.
+    '''
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        self.cache = self.db._object_cache[PERSON_KEY]
+        with DbTxn('Add test person', self.db) as trans:
+            self.handle = self.db.add_person(self.__person('Allen'), trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __person(self, first_name):
+        person = Person()
+        name = Name()
+        name.set_first_name(first_name)
+        person.set_primary_name(name)
+        return person
+
+    def __set_name(self, first_name, trans):
+        person = self.db.get_person_from_handle(self.handle)
+        person.get_primary_name().set_first_name(first_name)
+        self.db.commit_person(person, trans)
+
+    def __get_name(self):
+        person = self.db.get_person_from_handle(self.handle)
+        return person.get_primary_name().get_first_name()
+
+    def test_read(self):
+        self.assertIn(self.handle, self.cache)
+        hits = self.cache.hits
+        person = self.db.get_person_from_handle(self.handle)
+        person.add_family_handle('F0001')
+        person = self.db.get_person_from_handle(self.handle)
+        self.assertEqual(person.get_family_handle_list(), [])
+        self.assertEqual(self.cache.hits, hits + 2)
+        self.assertEqual(list(self.db.get_raw_data_many(PERSON_KEY,
+                                                        [self.handle])),
+                         [self.handle])
+        self.assertEqual(self.cache.hits, hits + 3)
+
+    def test_commit(self):
+        with DbTxn('Edit test person', self.db) as trans:
+            self.__set_name('Bob', trans)
+        self.assertEqual(self.__get_name(), 'Bob')
+        self.db.undo()
+        self.assertEqual(self.__get_name(), 'Allen')
+        self.db.redo()
+        self.assertEqual(self.__get_name(), 'Bob')
+        with DbTxn('Remove test person', self.db) as trans:
+            self.db.remove_person(self.handle, trans)
+        self.assertNotIn(self.handle, self.cache)
+        self.assertIsNone(self.db.get_raw_data(PERSON_KEY, self.handle))
+
+    def test_abort(self):
+        try:
+            with DbTxn('Edit test person', self.db) as trans:
+                self.__set_name('Bob', trans)
+                self.assertEqual(self.__get_name(), 'Bob')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.__get_name(), 'Allen')
+
+    def test_batch(self):
+        with DbTxn('Edit test person', self.db, batch=True) as trans:
+            self.__set_name('Bob', trans)
+            self.assertEqual(self.__get_name(), 'Bob')
+        self.assertEqual(self.__get_name(), 'Bob')
+
 
 if __name__ == "__main__":
     unittest.main()
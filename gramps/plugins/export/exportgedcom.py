@@ -49,6 +49,8 @@ from gramps.gen.lib import (AttributeType, ChildRefType, Citation, Date,
 from gramps.version import VERSION
 import gramps.plugins.lib.libgedcom as libgedcom
 from gramps.gen.errors import DatabaseError
+from gramps.gen.db.dbconst import (PERSON_KEY, FAMILY_KEY, SOURCE_KEY,
+                                   NOTE_KEY, REPOSITORY_KEY)
 from gramps.gui.plug.export import WriterOptionBox
 from gramps.gen.updatecallback import UpdateCallback
 from gramps.gen.utils.file import media_path_full
@@ -130,28 +132,12 @@ PEDIGREE_TYPES = {
     }
 
 NOTES_PER_PERSON = 104  # fudge factor to make progress meter a bit smoother
-#-------------------------------------------------------------------------
-#
-# sort_handles_by_id
-#
-#-------------------------------------------------------------------------
-def sort_handles_by_id(handle_list, handle_to_object):
-    """
-    Sort a list of handles by the Gramps ID.
 
-    The function that returns the object from the handle needs to be supplied
-    so that we get the right object.
-
-    """
-    sorted_list = []
-    for handle in handle_list:
-        obj = handle_to_object(handle)
-        if obj:
-            data = (obj.get_gramps_id(), handle)
-            sorted_list.append (data)
-    sorted_list.sort()
-    return sorted_list
+# Number of objects read from the database at a time.
+BATCH_SIZE = 1000
 
+# Size of the write buffer of the output file.
+BUFFER_SIZE = 1024 * 1024
 #-------------------------------------------------------------------------
 #
 # breakup
@@ -240,7 +226,8 @@ class GedcomWriter(UpdateCallback):
         """
 
         self.dirname = os.path.dirname (filename)
-        with open(filename, "w", encoding='utf-8') as self.gedcom_file:
+        with open(filename, "w", encoding='utf-8',
+                  buffering=BUFFER_SIZE) as self.gedcom_file:
             person_len = self.dbase.get_number_of_people()
             family_len = self.dbase.get_number_of_families()
             source_len = self.dbase.get_number_of_sources()
@@ -294,6 +281,20 @@ class GedcomWriter(UpdateCallback):
         else:
             self.gedcom_file.write("%d %s\n" % (level, token))
 
+    def _sorted_objects(self, obj_key, get_objects):
+        """
+        Return an iterator over the objects of a type, sorted by Gramps ID.
+
+        The Gramps IDs are read from the database without reading the
+        objects, which are then read a batch at a time with the get_objects
+        method, eg get_people_from_handles.
+        """
+        sorted_list = self.dbase.get_gramps_id_handles(obj_key)
+        for start in range(0, len(sorted_list), BATCH_SIZE):
+            handles = [handle for dummy_id, handle
+                       in sorted_list[start:start + BATCH_SIZE]]
+            yield from get_objects(handles)
+
     def _header(self, filename):
         """
         Write the GEDCOM header.
@@ -397,19 +398,10 @@ class GedcomWriter(UpdateCallback):
 
         """
         self.set_text(_("Writing individuals"))
-        phandles = self.dbase.iter_person_handles()
-
-        sorted_list = []
-        for handle in phandles:
-            person = self.dbase.get_person_from_handle(handle)
-            if person:
-                data = (person.get_gramps_id(), handle)
-                sorted_list.append(data)
-        sorted_list.sort()
-
-        for data in sorted_list:
+        for person in self._sorted_objects(PERSON_KEY,
+                                           self.dbase.get_people_from_handles):
             self.update()
-            self._person(self.dbase.get_person_from_handle(data[1]))
+            self._person(person)
 
     def _person(self, person):
         """
@@ -802,17 +794,10 @@ class GedcomWriter(UpdateCallback):
         Write out the list of families, sorting by Gramps ID.
         """
         self.set_text(_("Writing families"))
-        # generate a list of (GRAMPS_ID, HANDLE) pairs. This list
-        # can then be sorted by the sort routine, which will use the
-        # first value of the tuple as the sort key.
-        sorted_list = sort_handles_by_id(self.dbase.get_family_handles(),
-                                         self.dbase.get_family_from_handle)
-
-        # loop through the sorted list, pulling of the handle. This list
-        # has already been sorted by GRAMPS_ID
-        for family_handle in [hndl[1] for hndl in sorted_list]:
+        for family in self._sorted_objects(
+                FAMILY_KEY, self.dbase.get_families_from_handles):
             self.update()
-            self._family(self.dbase.get_family_from_handle(family_handle))
+            self._family(family)
 
     def _family(self, family):
         """
@@ -967,14 +952,10 @@ class GedcomWriter(UpdateCallback):
         Write out the list of sources, sorting by Gramps ID.
         """
         self.set_text(_("Writing sources"))
-        sorted_list = sort_handles_by_id(self.dbase.get_source_handles(),
-                                         self.dbase.get_source_from_handle)
-
-        for (source_id, handle) in sorted_list:
+        for source in self._sorted_objects(
+                SOURCE_KEY, self.dbase.get_sources_from_handles):
             self.update()
-            source = self.dbase.get_source_from_handle(handle)
-            if source is None: continue
-            self._writeln(0, '@%s@' % source_id, 'SOUR')
+            self._writeln(0, '@%s@' % source.get_gramps_id(), 'SOUR')
             if source.get_title():
                 self._writeln(1, 'TITL', source.get_title())
 
@@ -1002,16 +983,12 @@ class GedcomWriter(UpdateCallback):
         """
         self.set_text(_("Writing notes"))
         note_cnt = 0
-        sorted_list = sort_handles_by_id(self.dbase.get_note_handles(),
-                                         self.dbase.get_note_from_handle)
-
-        for note_handle in [hndl[1] for hndl in sorted_list]:
+        for note in self._sorted_objects(NOTE_KEY,
+                                         self.dbase.get_notes_from_handles):
             # the following makes the progress bar a bit smoother
             if not note_cnt % NOTES_PER_PERSON:
                 self.update()
             note_cnt += 1
-            note = self.dbase.get_note_from_handle(note_handle)
-            if note is None: continue
             self._note_record(note)
 
     def _note_record(self, note):
@@ -1042,16 +1019,12 @@ class GedcomWriter(UpdateCallback):
         +1 <<CHANGE_DATE>> {0:1}
         """
         self.set_text(_("Writing repositories"))
-        sorted_list = sort_handles_by_id(self.dbase.get_repository_handles(),
-                                         self.dbase.get_repository_from_handle)
-
         # GEDCOM only allows for a single repository per source
 
-        for (repo_id, handle) in sorted_list:
+        for repo in self._sorted_objects(
+                REPOSITORY_KEY, self.dbase.get_repositories_from_handles):
             self.update()
-            repo = self.dbase.get_repository_from_handle(handle)
-            if repo is None: continue
-            self._writeln(0, '@%s@' % repo_id, 'REPO' )
+            self._writeln(0, '@%s@' % repo.get_gramps_id(), 'REPO' )
             if repo.get_name():
                 self._writeln(1, 'NAME', repo.get_name())
             for addr in repo.get_address_list():
@@ -143,6 +143,8 @@ class CSVParser:
         self.pref  = {} # person ref, internal to this sheet
         self.fref  = {} # family ref, internal to this sheet
         self.placeref = {}
+        self.place_index = None # display name to place, built when needed
+        self.source_index = None # title to source, built when needed
         self.place_types = {}
         # Build reverse dictionary, name to type number
         for items in PlaceType().get_map().items(): # (0, 'Custom')
@@ -368,6 +370,8 @@ class CSVParser:
         self.pref  = {} # person ref, internal to this sheet
         self.fref  = {} # family ref, internal to this sheet
         self.placeref = {}
+        self.place_index = None
+        self.source_index = None
         header = None
         line_number = 0
         for row in data:
@@ -808,6 +812,9 @@ class CSVParser:
                 place.placeref_list.append(placeref)
         #########################################################
         self.db.commit_place(place, self.trans)
+        # the displayed names of this place and the places it encloses may
+        # have changed
+        self.place_index = None
 
     def get_place_type(self, place_type_str):
         if place_type_str in self.place_types:
@@ -921,31 +928,38 @@ class CSVParser:
     def get_or_create_place(self, place_name):
         "Return the requested place object tuple-packed with a new indicator."
         LOG.debug("get_or_create_place: looking for: %s", place_name)
-        for place_handle in self.db.iter_place_handles():
-            place = self.db.get_place_from_handle(place_handle)
-            place_title = place_displayer.display(self.db, place)
-            if place_title == place_name:
-                return (0, place)
+        if self.place_index is None:
+            self.place_index = {}
+            for place in self.db.iter_places():
+                place_title = place_displayer.display(self.db, place)
+                self.place_index.setdefault(place_title, place)
+        place = self.place_index.get(place_name)
+        if place is not None:
+            return (0, place)
         place = Place()
         place.set_title(place_name)
         place.name = PlaceName(value=place_name)
         self.db.add_place(place, self.trans)
+        self.place_index.setdefault(place_displayer.display(self.db, place),
+                                    place)
         return (1, place)
 
     def get_or_create_source(self, source_text):
         "Return the requested source object tuple-packed with a new indicator."
-        source_list = self.db.get_source_handles(sort_handles=False)
-        LOG.debug("get_or_create_source: list: %s", source_list)
         LOG.debug("get_or_create_source: looking for: %s", source_text)
-        for source_handle in source_list:
-            source = self.db.get_source_from_handle(source_handle)
-            if source.get_title() == source_text:
-                LOG.debug("   returning existing source")
-                return (0, source)
+        if self.source_index is None:
+            self.source_index = {}
+            for source in self.db.iter_sources():
+                self.source_index.setdefault(source.get_title(), source)
+        source = self.source_index.get(source_text)
+        if source is not None:
+            LOG.debug("   returning existing source")
+            return (0, source)
         LOG.debug("   creating source")
         source = Source()
         source.set_title(source_text)
         self.db.add_source(source, self.trans)
+        self.source_index[source_text] = source
         return (1, source)
 
     def find_and_set_citation(self, obj, source):
@@ -956,11 +970,7 @@ class CSVParser:
             citation = self.db.get_citation_from_handle(citation_handle)
             LOG.debug("find_and_set_citation: existing citation: %s",
                       citation.get_gramps_id())
-            poss_source = self.db.get_source_from_handle(
-                                    citation.get_reference_handle())
-            LOG.debug("   compare source %s == %s", source.get_gramps_id(),
-                      poss_source.get_gramps_id())
-            if poss_source.get_handle() == source.get_handle():
+            if citation.get_reference_handle() == source.get_handle():
                 # The source is already cited
                 LOG.debug("   source already cited")
                 return
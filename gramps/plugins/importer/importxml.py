@@ -31,6 +31,7 @@
 import os
 import sys
 import time
+import struct
 from xml.parsers.expat import ExpatError, ParserCreate
 from xml.sax.saxutils import escape
 from gramps.gen.const import URL_WIKISTRING
@@ -88,7 +89,12 @@ try:
 except:
     GZIP_OK = False
 
-PERSON_RE = re.compile(r"\s*\<person\s(.*)$")
+# Number of bytes of the file given to the XML parser at a time.
+CHUNK_SIZE = 256 * 1024
+
+# Average size of the XML of a person, with their events, families, places
+# etc., used to estimate the number of people in a file.
+PERSON_SIZE = 1300
 
 CHILD_REL_MAP = {
     "Birth"     : ChildRefType(ChildRefType.BIRTH),
@@ -119,10 +125,11 @@ def importData(database, filename, user):
     database.smap = {}
     database.pmap = {}
     database.fmap = {}
-    line_cnt = 1
+    size = 0
     person_cnt = 0
 
-    with ImportOpenFileContextManager(filename, user) as xml_file:
+    opener = ImportOpenFileContextManager(filename, user)
+    with opener as xml_file:
         if xml_file is None:
             return
 
@@ -138,15 +145,14 @@ def importData(database, filename, user):
                                    config.get('preferences.tag-on-import') else None))
 
         if filename != '-':
-            linecounter = LineParser(filename)
-            line_cnt = linecounter.get_count()
-            person_cnt = linecounter.get_person_count()
+            size = os.path.getsize(filename)
+            person_cnt = opener.get_data_size() // PERSON_SIZE
 
         read_only = database.readonly
         database.readonly = False
 
         try:
-            info = parser.parse(xml_file, line_cnt, person_cnt)
+            info = parser.parse(xml_file, size, person_cnt, opener.rawfile)
         except GrampsImportError as err: # version error
             user.notify_error(*err.messages())
             return
@@ -330,59 +336,6 @@ class ImportInfo:
 
         return txt
 
-class LineParser:
-    def __init__(self, filename):
-
-        self.count = 0
-        self.person_count = 0
-
-        if GZIP_OK:
-            use_gzip = 1
-            try:
-                with gzip.open(filename, "r") as f:
-                    f.read(1)
-            except IOError as msg:
-                use_gzip = 0
-            except ValueError as msg:
-                use_gzip = 1
-        else:
-            use_gzip = 0
-
-        try:
-            if use_gzip:
-                import io
-                # Bug 6255. TextIOWrapper is required for python3 to
-                #           present file contents as text, otherwise they
-                #           are read as binary. However due to a missing
-                #           method (read1) in early python3 versions this
-                #           try block will fail.
-                #           Gramps will still import XML files using python
-                #           versions < 3.3.0 but the file progress meter
-                #           will not work properly, going immediately to
-                #           100%.
-                #           It should work correctly from version 3.3.
-                ofile = io.TextIOWrapper(gzip.open(filename, "rb"),
-                                         encoding='utf8', errors='replace')
-            else:
-                ofile = open(filename, "r", encoding='utf8', errors='replace')
-
-            for line in ofile:
-                self.count += 1
-                if PERSON_RE.match(line):
-                    self.person_count += 1
-        except:
-            self.count = 0
-            self.person_count = 0
-        finally:
-            # Ensure the file handle is always closed
-            ofile.close()
-
-    def get_count(self):
-        return self.count
-
-    def get_person_count(self):
-        return self.person_count
-
 #-------------------------------------------------------------------------
 #
 # ImportOpenFileContextManager
@@ -395,7 +348,9 @@ class ImportOpenFileContextManager:
     def __init__(self, filename, user):
         self.filename = filename
         self.filehandle = None
+        self.rawfile = None
         self.user = user
+        self.use_gzip = False
 
     def __enter__(self):
         if self.filename == '-':
@@ -411,8 +366,28 @@ class ImportOpenFileContextManager:
         if self.filename != '-':
             if self.filehandle:
                 self.filehandle.close()
+            if self.rawfile:
+                self.rawfile.close()
         return False
 
+    def get_data_size(self):
+        """
+        Return the size of the uncompressed data of the opened file.
+
+        The size of a gzip file is read from its trailer, which stores it
+        modulo 2**32. A size below the size of the compressed file has
+        wrapped around, in which case the file is at least 4 GiB.
+        """
+        size = os.path.getsize(self.filename)
+        if not self.use_gzip:
+            return size
+        with open(self.filename, "rb") as ofile:
+            ofile.seek(-4, os.SEEK_END)
+            data_size = struct.unpack("<I", ofile.read(4))[0]
+        if data_size < size:
+            data_size += 2 ** 32
+        return data_size
+
     def open_file(self, filename):
         """
         Open the xml file.
@@ -432,10 +407,14 @@ class ImportOpenFileContextManager:
             use_gzip = False
 
         try:
+            # The progress of the import is the position in the file read
+            # from disk.
+            self.rawfile = open(filename, "rb")
             if use_gzip:
-                xml_file = gzip.open(filename, "rb")
+                xml_file = gzip.GzipFile(fileobj=self.rawfile, mode="rb")
             else:
-                xml_file = open(filename, "rb")
+                xml_file = self.rawfile
+            self.use_gzip = use_gzip
         except IOError as msg:
             self.user.notify_error(_("%s could not be opened") % filename, str(msg))
             xml_file = None
@@ -900,11 +879,16 @@ class GrampsParser(UpdateCallback):
                 gramps_ids[id_] = gramps_id
         return gramps_ids[id_]
 
-    def parse(self, ifile, linecount=1, personcount=0):
+    def parse(self, ifile, size=0, personcount=0, rawfile=None):
         """
         Parse the xml file
         :param ifile: must be a file handle that is already open, with position
                       at the start of the file
+        :param size: the size of rawfile
+        :param personcount: the estimated number of people in the file
+        :param rawfile: the file from which ifile reads, which is the
+                        compressed file for a gzip file. The progress is
+                        the position in it.
         """
         if personcount < 1000:
             no_magic = True
@@ -912,7 +896,8 @@ class GrampsParser(UpdateCallback):
             no_magic = False
         with DbTxn(_("Gramps XML import"), self.db, batch=True,
                    no_magic=no_magic) as self.trans:
-            self.set_total(linecount)
+            self.rawfile = rawfile
+            self.set_total(size if rawfile else 1)
 
             self.db.disable_signals()
 
@@ -923,7 +908,7 @@ class GrampsParser(UpdateCallback):
             self.p.StartElementHandler = self.startElement
             self.p.EndElementHandler = self.endElement
             self.p.CharacterDataHandler = self.characters
-            self.p.ParseFile(ifile)
+            self.__parse_file(ifile)
 
             if len(self.name_formats) > 0:
                 # add new name formats to the existing table
@@ -960,11 +945,37 @@ class GrampsParser(UpdateCallback):
             del self.func_map
             del self.func_list
             del self.p
+            del self.rawfile
             del self.update
         self.db.enable_signals()
         self.db.request_rebuild()
         return self.info
 
+    def __parse_file(self, ifile):
+        """
+        Feed the file to the XML parser in large chunks, read into a buffer
+        that is reused.
+        """
+        if not hasattr(ifile, 'readinto'):
+            self.p.ParseFile(ifile)
+            return
+        buffer = bytearray(CHUNK_SIZE)
+        with memoryview(buffer) as view:
+            while True:
+                length = ifile.readinto(buffer)
+                if not length:
+                    break
+                self.p.Parse(view[:length], False)
+        self.p.Parse(b'', True)
+
+    def __get_position(self):
+        """
+        Return the progress of the parsing.
+        """
+        if self.rawfile is None:
+            return self.p.CurrentLineNumber
+        return self.rawfile.tell()
+
     def start_database(self, attrs):
         """
         Get the xml version of the file.
@@ -1138,7 +1149,7 @@ class GrampsParser(UpdateCallback):
         # Gramps LEGACY: title in the placeobj tag
         self.placeobj.title = attrs.get('title', '')
         self.locations = 0
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__get_position())
         return self.placeobj
 
     def start_location(self, attrs):
@@ -1245,7 +1256,7 @@ class GrampsParser(UpdateCallback):
             self.info.add('new-object', EVENT_KEY, self.event)
         else:
             # This is new event, with ID and handle already existing
-            self.update(self.p.CurrentLineNumber)
+            self.update(self.__get_position())
             self.event = Event()
             if 'handle' in attrs:
                 orig_handle = attrs['handle'].replace('_', '')
@@ -1442,7 +1453,7 @@ class GrampsParser(UpdateCallback):
         Add a person to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__get_position())
         self.person = Person()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -1576,7 +1587,7 @@ class GrampsParser(UpdateCallback):
         Add a family object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__get_position())
         self.family = Family()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -1856,7 +1867,7 @@ class GrampsParser(UpdateCallback):
         self.in_note = 0
         if 'handle' in attrs:
             # This is new note, with ID and handle already existing
-            self.update(self.p.CurrentLineNumber)
+            self.update(self.__get_position())
             self.note = Note()
             if 'handle' in attrs:
                 orig_handle = attrs['handle'].replace('_', '')
@@ -2054,7 +2065,7 @@ class GrampsParser(UpdateCallback):
         Add a citation object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__get_position())
         self.citation = Citation()
         orig_handle = attrs['handle'].replace('_', '')
         is_merge_candidate = (self.replace_import_handle and
@@ -2107,7 +2118,7 @@ class GrampsParser(UpdateCallback):
         Add a source object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__get_position())
         self.source = Source()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -2249,7 +2260,7 @@ class GrampsParser(UpdateCallback):
         pass
 
     def stop_database(self, *tag):
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.__get_position())
 
     def stop_media(self, *tag):
         self.db.commit_media(self.object, self.trans,
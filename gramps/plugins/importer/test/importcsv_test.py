@@ -0,0 +1,74 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unit test of the CSVParser
+"""
+import io
+import unittest
+from ..importcsv import CSVParser
+from ....gen.db import DbTxn
+from ....gen.db.utils import make_database
+from ....gen.lib import Place, PlaceName, Source
+from ....gen.user import User
+
+DATA = """\
+Place,Title,Name,Type,Enclosed_by
+[P1],,Springfield,City,
+[P2],,Greene,County,
+[P1],,,,[P2]
+
+Person,Surname,Given,Birth place,Birth source,Death place,Death source
+[I1],Smith,John,"Springfield, Greene",Parish book,Oldtown,Census
+[I2],Smith,Mary,"Springfield, Greene",Census,Oldtown,Parish book
+"""
+
+class CSVParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        with DbTxn('Add existing objects', self.db) as trans:
+            place = Place()
+            place.set_name(PlaceName(value='Oldtown'))
+            self.db.add_place(place, trans)
+            source = Source()
+            source.set_title('Census')
+            self.db.add_source(source, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_places_and_sources(self):
+        CSVParser(self.db, User()).parse(io.StringIO(DATA))
+        places = {place.get_name().get_value(): place
+                  for place in self.db.iter_places()}
+        self.assertEqual(set(places), {'Springfield', 'Greene', 'Oldtown'})
+        self.assertEqual(sorted(source.get_title()
+                                for source in self.db.iter_sources()),
+                         ['Census', 'Parish book'])
+        for person in self.db.iter_people():
+            birth = self.db.get_event_from_handle(
+                person.get_birth_ref().ref)
+            self.assertEqual(birth.get_place_handle(),
+                             places['Springfield'].handle)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -90,12 +90,19 @@ all lines until the next level 2 token is found (in this case, skipping the
 #-------------------------------------------------------------------------
 import os
 import re
+import sys
 import time
+import queue
 import codecs
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from xml.parsers.expat import ParserCreate
-from collections import defaultdict, OrderedDict
+from collections import defaultdict, OrderedDict, deque
+from bisect import insort
 import string
-from io import StringIO, TextIOWrapper
+from io import BytesIO, StringIO, TextIOWrapper
 from urllib.parse import urlparse
 
 #------------------------------------------------------------------------
@@ -115,6 +122,7 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 from gramps.gen.errors import GedcomError
 from gramps.gen.const import DATA_DIR
+from gramps.gen.config import config
 from gramps.gen.lib import (Address, Attribute, AttributeType, ChildRef,
         ChildRefType, Citation, Date, Event, EventRef, EventRoleType,
         EventType, Family, FamilyRelType, LdsOrd, Location, Media,
@@ -124,6 +132,7 @@ from gramps.gen.lib import (Address, Attribute, AttributeType, ChildRef,
         Surname, Tag, Url, UrlType, PlaceType, PlaceRef, PlaceName)
 from gramps.gen.db import DbTxn
 from gramps.gen.updatecallback import UpdateCallback
+from gramps.gen.user import User
 from gramps.gen.mime import get_type
 from gramps.gen.utils.id import create_id
 from gramps.gen.utils.lds import TEMPLES
@@ -760,14 +769,23 @@ class Lexer:
         self.__add_msg = __add_msg
 
     def readline(self):
-        if len(self.current_list) <= 1 and not self.eof:
-            self.__readahead()
         try:
-            return GedLine(self.current_list.pop())
+            return GedLine(self.read_data())
         except:
             LOG.debug('Error in reading Gedcom line', exc_info=True)
             return None
 
+    def read_data(self):
+        """
+        Return the next line as a (level, token, value, tag, index) tuple
+        without building a GedLine, or None at the end of the file.
+        """
+        if len(self.current_list) <= 1 and not self.eof:
+            self.__readahead()
+        if self.current_list:
+            return self.current_list.pop()
+        return None
+
     def __fix_token_cont(self, data):
         line = self.current_list[0]
         new_value = line[2] + '\n' + data[2]
@@ -1445,6 +1463,21 @@ class AnselReader(BaseReader):
                                 errors='surrogateescape')
         return self.__ansel_to_unicode(linebytes)
 
+def _make_reader(ifile, enc, add_msg):
+    """
+    Return the reader of a GEDCOM file for the encoding found by
+    GedcomStageOne.
+    """
+    if enc == "ANSEL":
+        return AnselReader(ifile, add_msg)
+    elif enc in ("UTF-8", "UTF8", "UTF_8_SIG"):
+        return UTF8Reader(ifile, add_msg, enc)
+    elif enc in ("UTF-16LE", "UTF-16BE",  "UTF16", "UNICODE"):
+        return UTF16Reader(ifile, add_msg)
+    elif enc in ("CP1252", "WINDOWS-1252"):
+        return CP1252Reader(ifile, add_msg)
+    return AnsiReader(ifile, add_msg)
+
 #-------------------------------------------------------------------------
 #
 # CurrentState
@@ -1500,17 +1533,19 @@ class CurrentState:
         """
         return self.__dict__.get(name)
 
-    def __setattr__(self, name, value):
-        """
-        Set the value associated with the specified attribute.
-        """
-        self.__dict__[name] = value
-
 #-------------------------------------------------------------------------
 #
 # PlaceParser
 #
 #-------------------------------------------------------------------------
+def _ignore_place_field(location, text):
+    """
+    Parse function of the place fields that have no Location value. It is a
+    module function, rather than a lambda, so that a PlaceParser can be
+    pickled.
+    """
+    pass
+
 class PlaceParser:
     """
     Provide the ability to parse GEDCOM FORM statements for places, and
@@ -1557,7 +1592,7 @@ class PlaceParser:
         """
         for item in line.data.split(','):
             item = item.lower().strip()
-            fcn = self.__field_map.get(item, lambda x, y: None)
+            fcn = self.__field_map.get(item, _ignore_place_field)
             self.parse_function.append(fcn)
 
     def load_place(self, place_import, place, text):
@@ -1647,13 +1682,15 @@ class IdMapper:
         self.find_next = find_next
         self.id2user_format = id2user_format
         self.swap = {}
+        # The values of swap, to look them up quickly
+        self.used = set()
 
     def __getitem__(self, gid):
         if gid == "":
             # We need to find the next gramps ID provided it is not already
             # the target of a swap
             new_val = self.find_next()
-            while new_val in list(self.swap.values()):
+            while new_val in self.used:
                 new_val = self.find_next()
         else:
             # remove any @ signs
@@ -1669,15 +1706,16 @@ class IdMapper:
                 # now looking for I1, it wouldn't be in self.swap, and we now
                 # find that I0001 is in use, so we have to create a new id.
                 if self.has_gid(formatted_gid) or \
-                        (formatted_gid in list(self.swap.values())):
+                        (formatted_gid in self.used):
                     new_val = self.find_next()
-                    while new_val in list(self.swap.values()):
+                    while new_val in self.used:
                         new_val = self.find_next()
                 else:
                     new_val = formatted_gid
             # we need to distinguish between I1 and I0001, so we record the map
             # from the original format
             self.swap[gid] = new_val
+            self.used.add(new_val)
         return new_val
 
     def clean(self, gid):
@@ -1689,6 +1727,463 @@ class IdMapper:
     def map(self):
         return self.swap
 
+#-------------------------------------------------------------------------
+#
+# Parallel import
+#
+#-------------------------------------------------------------------------
+# Smallest number of lines of a file for which the records are parsed in
+# worker processes.
+MIN_LINES = 50000
+
+# Number of lines of the records sent to a worker at a time.
+CHUNK_LINES = 2000
+
+# Number of chunks of records read ahead by the reader process.
+READ_AHEAD = 16
+
+# The initializer and mp_context of ProcessPoolExecutor need Python 3.7.
+MIN_PYTHON_VERSION = (3, 7)
+
+# Records which may be parsed in worker processes.
+_PARALLEL_RECORDS = ("FAM", "FAMILY", "INDI", "INDIVIDUAL", "OBJE", "OBJECT",
+                     "REPO", "REPOSITORY", "SOUR", "SOURCE")
+
+# Tables from Gramps IDs to handles.
+_HANDLE_TABLES = ('gid2id', 'oid2id', 'sid2id', 'lid2id', 'fid2id', 'rid2id',
+                  'nid2id')
+
+_CLASSES = {'person': Person, 'family': Family, 'event': Event,
+            'place': Place, 'source': Source, 'citation': Citation,
+            'repository': Repository, 'media': Media, 'note': Note,
+            'tag': Tag}
+
+# Fields of the families and sources which are only referenced by the
+# records before them.
+_STUB_FIELDS = {'family': ('handle', 'gramps_id', 'child_ref_list', 'change'),
+                'source': ('handle', 'gramps_id', 'title', 'change')}
+
+# Placeholder of a Gramps ID in a record parsed by a worker. The readers
+# remove the control characters from the file.
+_TOKEN = '\x01%d\x02'
+_TOKEN_RE = re.compile('\x01[0-9]+\x02')
+
+# State of a worker process.
+_WORKER = {}
+
+class _SerialRecord(Exception):
+    """
+    Raised when a record parsed in a worker process needs the database.
+    """
+    pass
+
+class _Pickler(pickle.Pickler):
+    """
+    Pickler that stores the placeholders and the provisional handles by
+    reference, to be replaced when the data is loaded by the writer.
+    """
+    def __init__(self, file, provisional):
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self.provisional = provisional
+
+    def persistent_id(self, obj):
+        if obj.__class__ is str and \
+                ('\x01' in obj or obj in self.provisional):
+            return obj
+        return None
+
+class _Unpickler(pickle.Unpickler):
+    """
+    Unpickler that replaces the placeholders and the provisional handles.
+    """
+    def __init__(self, file, subst):
+        pickle.Unpickler.__init__(self, file)
+        self.subst = subst
+
+    def persistent_load(self, pid):
+        return _substitute(pid, self.subst)
+
+class _RecordLog:
+    """
+    Changes of a record parsed in a worker process, which are made by the
+    writer in the main process.
+
+    The changes are tuples:
+
+    ('id', token, mapper, xref)   -- a Gramps ID, replaced by token
+    ('map', table, key, value)    -- an item set in a table of the parser
+    ('call', name, data, handle)  -- a call of GedcomParser.__shared
+    ('chil', data)                -- a child of the family of the record
+    ('write', method, handle, data, args) -- an object added or committed
+
+    The arguments, the child and the object are pickled in data.
+    """
+    def __init__(self):
+        self.ops = []
+        self.serial = False
+        self.fresh = set()
+        self.handles = {}
+        self.provisional = set()
+        self.own = None
+
+    def add(self, *operation):
+        """
+        Record a change.
+        """
+        self.ops.append(operation)
+
+    def dumps(self, value):
+        """
+        Return the pickled value.
+        """
+        stream = BytesIO()
+        _Pickler(stream, self.provisional).dump(value)
+        return stream.getvalue()
+
+    def new_id(self, name, xref):
+        """
+        Record a Gramps ID and return its placeholder.
+        """
+        token = _TOKEN % len(self.ops)
+        if not xref:
+            self.fresh.add(token)
+        self.add('id', token, name, xref)
+        return token
+
+    def map(self, name, key, value):
+        """
+        Record an item set in a table.
+        """
+        if name in _HANDLE_TABLES:
+            # The first handle is the one of the object of the record
+            if self.own is None:
+                self.own = value
+            self.handles[value] = key in self.fresh
+            self.provisional.add(value)
+        self.add('map', name, key, value)
+
+    def call(self, name, args):
+        """
+        Record a call and return a provisional handle for its result.
+        """
+        handle = create_id()
+        self.provisional.add(handle)
+        self.add('call', name, self.dumps(args), handle)
+        return handle
+
+    def write(self, method, obj, args):
+        """
+        Record an object added or committed. Only new objects and the object
+        of the record itself are known to the worker.
+        """
+        handle = obj.get_handle()
+        if handle in self.handles and handle != self.own and \
+                not self.handles[handle]:
+            raise self.stop()
+        self.add('write', method, handle, self.dumps(obj), args)
+
+    def stop(self):
+        """
+        Mark the record to be parsed by the writer and return the exception
+        to raise. The mark is kept if the exception is caught by the parser.
+        """
+        self.serial = True
+        return _SerialRecord()
+
+class _RecordIds(IdMapper):
+    """
+    IdMapper of a record parsed in a worker process, returning placeholders.
+    """
+    def __init__(self, log, name):
+        self.log = log
+        self.name = name
+        self.swap = {}
+
+    def __getitem__(self, gid):
+        if gid == "":
+            return self.log.new_id(self.name, gid)
+        key = self.clean(gid)
+        if key not in self.swap:
+            self.swap[key] = self.log.new_id(self.name, gid)
+        return self.swap[key]
+
+    def find_next(self):
+        return self.log.new_id(self.name, None)
+
+    def map(self):
+        raise self.log.stop()
+
+class _RecordMap(dict):
+    """
+    Table of the parser in a worker process, recording the items set.
+    """
+    def __init__(self, log, name):
+        dict.__init__(self)
+        self.log = log
+        self.name = name
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.log.map(self.name, key, value)
+
+class _RecordDb:
+    """
+    Database of the parser in a worker process. It records the objects added
+    and committed, and only knows about these.
+    """
+    event_prefix = "E%04d"
+
+    def __init__(self, log=None):
+        self.log = log
+        self.objects = {}
+
+    def get_total(self):
+        return 0
+
+    def get_gramps_ids(self, obj_key):
+        return []
+
+    def get_place_cursor(self):
+        yield None
+
+    def find_next_note_gramps_id(self):
+        return self.log.new_id('dbase', None)
+
+    def __getattr__(self, name):
+        if name.startswith(('add_', 'commit_')):
+            return lambda obj, trans, *args: self.__write(name, obj, args)
+        if name.startswith('has_') and name.endswith('_handle'):
+            return self.objects.__contains__
+        if name.startswith('get_raw_') and name.endswith('_data'):
+            return self.objects.get
+        return self.__serial
+
+    def __write(self, method, obj, args):
+        if not obj.get_handle():
+            obj.set_handle(create_id())
+        change = args[0] if method.startswith('commit_') and args else None
+        obj.change = int(change or time.time())
+        self.log.write(method, obj, args)
+        self.objects[obj.get_handle()] = obj.serialize()
+
+    def __serial(self, *args, **kwargs):
+        raise self.log.stop()
+
+class _RecordStage:
+    """
+    Replaces GedcomStageOne for the parser of a worker process.
+    """
+    def get_line_count(self):
+        return 1
+
+    def get_person_count(self):
+        return 0
+
+    def get_famc_map(self):
+        return {}
+
+    def get_fams_map(self):
+        return {}
+
+    def get_encoding(self):
+        return "UTF-8"
+
+class _RecordLines:
+    """
+    Replaces the Lexer to read the lines of a record read by the reader
+    process. The lines are followed by the first line of the next record.
+    """
+    def __init__(self, record, add_msg):
+        self.lines, self.end, self.msgs = record
+        self.add_msg = add_msg
+        self.index = 0
+
+    def readline(self):
+        index = self.index
+        self.index += 1
+        # The messages of the reader are reported at the same time as in
+        # a parse by a single process
+        for message in self.msgs.get(index, ()):
+            self.add_msg(message)
+        if index < len(self.lines):
+            data = self.lines[index]
+        elif index == len(self.lines):
+            data = self.end
+        else:
+            data = None
+        try:
+            return GedLine(data)
+        except:
+            LOG.debug('Error in reading Gedcom line', exc_info=True)
+            return None
+
+    def at_end(self):
+        """
+        Return True if the first line of the next record has been read.
+        """
+        return self.index > len(self.lines)
+
+    def clean_up(self):
+        pass
+
+class _RecordReader:
+    """
+    Process reading and decoding the records of a GEDCOM file.
+    """
+    def __init__(self, filename, encoding):
+        context = multiprocessing.get_context('spawn')
+        self.queue = context.Queue(READ_AHEAD)
+        self.process = context.Process(target=_read_records,
+                                       args=(filename, encoding, self.queue,
+                                             CHUNK_LINES),
+                                       daemon=True)
+        self.process.start()
+        self.trailer = []
+        self.done = False
+
+    def __get(self):
+        while True:
+            try:
+                return self.queue.get(timeout=1)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    break
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            raise OSError("The GEDCOM reader process ended unexpectedly")
+
+    def __read(self):
+        """
+        Return the next item of the reader process, or None at the end.
+        """
+        if self.done:
+            return None
+        kind, value = self.__get()
+        if kind == 'error':
+            self.done = True
+            raise value
+        if kind == 'end':
+            self.done = True
+            self.trailer = value
+            return None
+        return value
+
+    def read_header(self):
+        """
+        Return the header record.
+        """
+        record = self.__read()
+        if record is None:
+            return ([], None, {})
+        return record
+
+    def read_batch(self):
+        """
+        Return the next list of records, or None after the last record.
+        """
+        return self.__read()
+
+    def close(self):
+        """
+        Stop the reader process.
+        """
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+
+def _read_records(filename, encoding, records, chunk_lines):
+    """
+    Read the records of a GEDCOM file in the reader process.
+
+    A record is a tuple of its lines as (level, token, value, tag, index)
+    tuples, the first line of the next record (or None at the end of the
+    file), and the messages of the lexer by the index of the line read when
+    they were reported. The header is sent first, then lists of records, and
+    finally the trailer. Each list but the last holds at least chunk_lines
+    lines.
+    """
+    messages = []
+    try:
+        with open(filename, "rb") as ifile:
+            reader = _make_reader(ifile, encoding, messages.append)
+            lexer = Lexer(reader, messages.append)
+            lines, msgs = [], {}
+            kind = 'header'
+            batch, size = [], 0
+            while True:
+                data = lexer.read_data()
+                if messages:
+                    msgs[len(lines)] = messages[:]
+                    del messages[:]
+                if data is not None and (not lines or data[0] >= 1):
+                    lines.append(data)
+                    continue
+                if lines:
+                    if kind == 'header':
+                        records.put((kind, (lines, data, msgs)))
+                        kind = 'records'
+                    else:
+                        batch.append((lines, data, msgs))
+                        size += len(lines)
+                lines, msgs = [data], {}
+                if size >= chunk_lines:
+                    records.put((kind, batch))
+                    batch, size = [], 0
+                if data is None or data[1] == TOKEN_TRLR:
+                    break
+            if batch:
+                records.put((kind, batch))
+            records.put(('end', [data] if data is not None else []))
+    except Exception as err:
+        records.put(('error', err))
+
+def _init_worker(filename, default_source, settings):
+    """
+    Create the parser of a worker process, with the settings of the header.
+    """
+    parser = GedcomParser(_RecordDb(), BytesIO(), filename, User(),
+                          _RecordStage(), default_source)
+    parser.update = parser.update_empty
+    for name, value in settings.items():
+        setattr(parser, name, value)
+    _WORKER['parser'] = parser
+
+def _parse_batch(records):
+    """
+    Parse a list of records in a worker process.
+    """
+    parser = _WORKER['parser']
+    return [parser.parse_record_log(record) for record in records]
+
+def _substitute(text, subst):
+    """
+    Replace the placeholders and the provisional handle in a string of a
+    record parsed in a worker process.
+    """
+    if '\x01' in text:
+        return _TOKEN_RE.sub(lambda match: subst[match.group()], text)
+    return subst.get(text, text)
+
+def _load(data, subst):
+    """
+    Return a value pickled in a worker process, with the placeholders and
+    the provisional handles replaced.
+    """
+    return _Unpickler(BytesIO(data), subst).load()
+
+def _is_stub(obj_type, obj):
+    """
+    Return True if an object was only created by references to it.
+    """
+    fields = _STUB_FIELDS.get(obj_type)
+    if fields is None:
+        return False
+    stub = obj.__class__()
+    for field in fields:
+        setattr(stub, field, getattr(obj, field))
+    return stub.serialize() == obj.serialize()
+
 #-------------------------------------------------------------------------
 #
 # GedcomParser
@@ -2569,32 +3064,32 @@ class GedcomParser(UpdateCallback):
             }
         self.func_list.append(self.note_parse_tbl)
 
-        # look for existing place titles, build a map
-        self.place_names = defaultdict(list)
+        # index the existing places by title and location
+        self.place_index = {}
+        self.place_keys = {}
         cursor = dbase.get_place_cursor()
         data = next(cursor)
         while data:
             (handle, val) = data
-            self.place_names[val[2]].append(handle)
+            self.__index_place(Place.create(val))
             data = next(cursor)
         cursor.close()
 
-        enc = stage_one.get_encoding()
-
-        if enc == "ANSEL":
-            rdr = AnselReader(ifile, self.__add_msg)
-        elif enc in ("UTF-8", "UTF8", "UTF_8_SIG"):
-            rdr = UTF8Reader(ifile, self.__add_msg, enc)
-        elif enc in ("UTF-16LE", "UTF-16BE",  "UTF16", "UNICODE"):
-            rdr = UTF16Reader(ifile, self.__add_msg)
-        elif enc in ("CP1252", "WINDOWS-1252"):
-            rdr = CP1252Reader(ifile, self.__add_msg)
-        else:
-            rdr = AnsiReader(ifile, self.__add_msg)
-
+        self.encoding = stage_one.get_encoding()
+        self.line_count = stage_one.get_line_count()
+        rdr = _make_reader(ifile, self.encoding, self.__add_msg)
         self.lexer = Lexer(rdr, self.__add_msg)
         self.filename = filename
         self.backoff = False
+        # Changes of the record parsed in a worker process, or None
+        self.__log = None
+        # Functions called with __shared, by name
+        self.__shared_funcs = dict((func.__name__, func) for func in (
+            self.__store_place, self.__store_enclosing_place,
+            self.__store_lds_place, self.__add_family_child,
+            self.__store_media, self.__store_inline_source,
+            self.__store_cited_source, self.__store_named_repository,
+            self.__add_msgs_note))
 
         fullpath = os.path.normpath(os.path.abspath(filename))
         self.geddir = os.path.dirname(fullpath)
@@ -2618,28 +3113,39 @@ class GedcomParser(UpdateCallback):
 
         """
         no_magic = self.maxpeople < 1000
-        with DbTxn(_("GEDCOM import"), self.dbase, not use_trans,
-                   no_magic=no_magic) as self.trans:
-
-            self.dbase.disable_signals()
-            self.__parse_header_head()
-            self.want_parse_warnings = False
-            self.__parse_header()
-            self.want_parse_warnings = True
-            if self.use_def_src:
-                self.dbase.add_source(self.def_src, self.trans)
-            if self.default_tag and self.default_tag.handle is None:
-                self.dbase.add_tag(self.default_tag, self.trans)
-            self.__parse_record()
-            self.__parse_trailer()
-            for title, handle in self.inline_srcs.items():
-                src = Source()
-                src.set_handle(handle)
-                src.set_title(title)
-                self.dbase.add_source(src, self.trans)
-            self.__clean_up()
-
-            self.place_import.generate_hierarchy(self.trans)
+        reader = self.__start_reader()
+        try:
+            with DbTxn(_("GEDCOM import"), self.dbase, not use_trans,
+                       no_magic=no_magic) as self.trans:
+
+                self.dbase.disable_signals()
+                if reader:
+                    self.__set_lines(reader.read_header())
+                self.__parse_header_head()
+                self.want_parse_warnings = False
+                self.__parse_header()
+                self.want_parse_warnings = True
+                if self.use_def_src:
+                    self.dbase.add_source(self.def_src, self.trans)
+                if self.default_tag and self.default_tag.handle is None:
+                    self.dbase.add_tag(self.default_tag, self.trans)
+                if reader:
+                    self.__parse_records_parallel(reader)
+                    self.__set_lines((reader.trailer, None, {}))
+                else:
+                    self.__parse_record()
+                self.__parse_trailer()
+                for title, handle in self.inline_srcs.items():
+                    src = Source()
+                    src.set_handle(handle)
+                    src.set_title(title)
+                    self.dbase.add_source(src, self.trans)
+                self.__clean_up()
+
+                self.place_import.generate_hierarchy(self.trans)
+        finally:
+            if reader:
+                reader.close()
 
         if not self.dbase.get_feature("skip-check-xref"):
             self.__check_xref()
@@ -2657,6 +3163,262 @@ class GedcomParser(UpdateCallback):
         self.user.info(message, "".join(self.errors),
                        parent=parent_window, monospaced=True)
 
+    def __start_reader(self):
+        """
+        Start the process reading the records of the file, if the records are
+        to be parsed in worker processes, and return it. Return None if the
+        file is to be parsed in this process only.
+        """
+        if config.get('database.import-workers') < 2:
+            return None
+        if sys.version_info < MIN_PYTHON_VERSION:
+            return None
+        if self.line_count < MIN_LINES or not os.path.isfile(self.filename):
+            return None
+        try:
+            return _RecordReader(self.filename, self.encoding)
+        except OSError as msg:
+            LOG.warning("Parallel GEDCOM import failed, importing in one "
+                        "process: %s", msg)
+            return None
+
+    def __set_lines(self, record):
+        """
+        Read the lines of a record read by the reader process from now on.
+        """
+        self.lexer = _RecordLines(record, self.__add_msg)
+        self.backoff = False
+
+    def __parse_records_parallel(self, reader):
+        """
+        Parse the level 0 records read by the reader process in worker
+        processes, and make their changes in the order of the file.
+
+        The records which can not be parsed by a worker are parsed here, as
+        are all remaining records if the worker processes fail.
+        """
+        workers = config.get('database.import-workers')
+        settings = {'def_src': getattr(self, 'def_src', None),
+                    'default_tag': self.default_tag,
+                    'is_ftw': self.is_ftw,
+                    'addr_is_detail': self.addr_is_detail,
+                    'place_parser': self.place_parser}
+        context = multiprocessing.get_context('spawn')
+        try:
+            executor = ProcessPoolExecutor(
+                workers, mp_context=context, initializer=_init_worker,
+                initargs=(self.filename, self.use_def_src, settings))
+        except OSError as msg:
+            LOG.warning("Parallel GEDCOM import failed, parsing the records "
+                        "in one process: %s", msg)
+            executor = None
+        pending = deque()
+        try:
+            batch = reader.read_batch()
+            while batch is not None or pending:
+                # Keep the workers busy while the results are replayed
+                limit = 2 * workers if executor else 1
+                while batch is not None and len(pending) < limit:
+                    future = None
+                    if executor:
+                        try:
+                            future = executor.submit(_parse_batch, batch)
+                        except BrokenProcessPool as msg:
+                            executor = self.__stop_workers(executor, msg)
+                    pending.append((batch, future))
+                    batch = reader.read_batch()
+                records, future = pending.popleft()
+                results = None
+                if future and executor:
+                    try:
+                        results = future.result()
+                    except (BrokenProcessPool, OSError) as msg:
+                        executor = self.__stop_workers(executor, msg)
+                    except (pickle.PicklingError, TypeError,
+                            AttributeError) as msg:
+                        LOG.debug("GEDCOM records parsed in one process: %s",
+                                  msg)
+                if results is None:
+                    results = [None] * len(records)
+                for record, result in zip(records, results):
+                    self.__import_record(record, result)
+        finally:
+            if executor:
+                executor.shutdown()
+
+    @staticmethod
+    def __stop_workers(executor, msg):
+        """
+        Stop the worker processes after they failed, and return None.
+        """
+        LOG.warning("Parallel GEDCOM import failed, parsing the remaining "
+                    "records in one process: %s", msg)
+        executor.shutdown()
+        return None
+
+    def __import_record(self, record, result):
+        """
+        Make the changes of a record parsed by a worker process, or parse the
+        record here if the worker could not parse it.
+        """
+        lines = record[0]
+        self.count = lines[0][4] - 1
+        if result is not None and self.__replay_record(*result):
+            self.update(lines[-1][4])
+            return
+        self.__set_lines(record)
+        line = self.__get_next_line()
+        # The lines left by the parse of a record are parsed as records too
+        while not self.lexer.at_end():
+            self.__parse_top_record(line)
+            line = self.__get_next_line()
+        self.backoff = False
+
+    def parse_record_log(self, record):
+        """
+        Parse a level 0 record read by the reader process in a worker process.
+
+        The changes to the database and to the state shared by the records
+        are recorded, with placeholders for the Gramps IDs and the handles
+        which are only known when the records before it have been imported.
+        Return the changes, the messages and the number of errors, or None if
+        the record has to be parsed by the writer.
+        """
+        log = _RecordLog()
+        self.__log = log
+        self.dbase = _RecordDb(log)
+        for name in ('pid_map', 'fid_map', 'sid_map', 'oid_map', 'rid_map',
+                     'nid_map', 'emapper'):
+            setattr(self, name, _RecordIds(log, name))
+        for name in _HANDLE_TABLES + ('note_type_map',):
+            setattr(self, name, _RecordMap(log, name))
+        self.errors = []
+        self.number_of_errors = 0
+        self.__set_lines(record)
+        try:
+            line = self.__get_next_line()
+            if line.token in (TOKEN_TRLR, TOKEN_UNKNOWN) or \
+                    line.data not in _PARALLEL_RECORDS:
+                return None
+            self.__parse_top_record(line)
+            self.__get_next_line()
+        except Exception:
+            LOG.debug("GEDCOM record not parsed in a worker", exc_info=True)
+            return None
+        if log.serial or not self.lexer.at_end():
+            return None
+        return (log.ops, self.errors, self.number_of_errors)
+
+    def __replay_record(self, ops, errors, number_of_errors):
+        """
+        Make the changes of a record parsed in a worker process, replacing the
+        placeholders in the order of the file. Return False, without any
+        change, if the record changes an object which already exists in a way
+        the worker could not know about.
+        """
+        merges = self.__check_record(ops)
+        if merges is None:
+            return False
+        subst = {}
+        children = []
+        for index, operation in enumerate(ops):
+            kind = operation[0]
+            if kind == 'id':
+                token, name, xref = operation[1:]
+                if name == 'dbase':
+                    subst[token] = self.dbase.find_next_note_gramps_id()
+                elif xref is None:
+                    subst[token] = getattr(self, name).find_next()
+                else:
+                    subst[token] = getattr(self, name)[xref]
+            elif kind == 'map':
+                name, key, value = operation[1:]
+                key = _substitute(key, subst)
+                table = getattr(self, name)
+                if name == 'note_type_map':
+                    table[key] = value
+                elif key in table:
+                    subst[value] = table[key]
+                else:
+                    table[key] = value
+            elif kind == 'call':
+                name, data, handle = operation[1:]
+                args = _load(data, subst)
+                subst[handle] = self.__shared_funcs[name](*args)
+            elif kind == 'chil':
+                children.append(_load(operation[1], subst))
+            else:
+                method, handle, data, args = operation[1:]
+                obj = _load(data, subst)
+                existing = merges.get(index)
+                if existing:
+                    if isinstance(obj, Family):
+                        # Order the children of the FAMC lines already read
+                        # like the serial parse does
+                        obj.child_ref_list = existing.child_ref_list
+                        obj.child_ref_count = 0
+                        for child, frel, mrel in children:
+                            self.__add_child_ref(obj, child, frel, mrel)
+                    if args and not args[0]:
+                        args = (existing.change,)
+                getattr(self.dbase, method)(obj, self.trans, *args)
+        self.errors.extend(_substitute(error, subst) for error in errors)
+        self.number_of_errors += number_of_errors
+        return True
+
+    def __check_record(self, ops):
+        """
+        Return the existing objects a record parsed in a worker process is
+        merged into, by the index of the change, or None if the record has to
+        be parsed by the writer.
+
+        A worker only knows the objects of its own record. The only existing
+        objects the record may change are its own family or source, when
+        they were only created by references from the records before it.
+        """
+        tokens = {}
+        handles = {}
+        own = None
+        merges = {}
+        for index, operation in enumerate(ops):
+            if operation[0] == 'id':
+                tokens[operation[1]] = operation[2:]
+            elif operation[0] == 'map' and operation[1] in _HANDLE_TABLES:
+                handles[operation[3]] = operation[1:3]
+                if own is None:
+                    own = operation[3]
+            elif operation[0] == 'write' and operation[2] in handles:
+                obj_type = operation[1].split('_', 1)[1]
+                existing = self.__find_existing(obj_type, tokens,
+                                                *handles[operation[2]])
+                if existing is None:
+                    continue
+                if operation[2] != own or not _is_stub(obj_type, existing):
+                    return None
+                merges[index] = existing
+        return merges
+
+    def __find_existing(self, obj_type, tokens, table, gid):
+        """
+        Return the object a placeholder Gramps ID of a record parsed in a
+        worker process refers to, if it is already in the database.
+        """
+        if gid in tokens:
+            name, xref = tokens[gid]
+            if not xref:
+                # A new Gramps ID
+                return None
+            mapper = getattr(self, name)
+            gid = mapper.swap.get(mapper.clean(xref))
+            if gid is None:
+                return None
+        handle = getattr(self, table).get(gid)
+        if handle is None or \
+                not getattr(self.dbase, 'has_%s_handle' % obj_type)(handle):
+            return None
+        data = getattr(self.dbase, 'get_raw_%s_data' % obj_type)(handle)
+        return _CLASSES[obj_type]().unserialize(data)
+
     def __clean_up(self):
         """
         Break circular references to parsing methods stored in dictionaries
@@ -2667,6 +3429,7 @@ class GedcomParser(UpdateCallback):
                 del func_map[key]
             del func_map
         del self.func_list
+        del self.__shared_funcs
         del self.update
         self.lexer.clean_up()
 
@@ -2823,6 +3586,39 @@ class GedcomParser(UpdateCallback):
             return True
         return False
 
+    def __place_key(self, title, location, placeref_list):
+        """
+        Return the key of a place in the place index, or None if the place
+        can not be matched.
+
+        Place references are not compared by value, so only places that are
+        not enclosed by other places can match.
+        """
+        if placeref_list is None or placeref_list:
+            return None
+        if self.__loc_is_empty(location):
+            return (title, None)
+        return (title, location.serialize())
+
+    def __index_place(self, place):
+        """
+        Add a place to the place index, or move it to its new key after it
+        has been changed. The places with the same key are kept in the order
+        in which they were first added.
+        """
+        handle = place.get_handle()
+        if handle in self.place_keys:
+            key, seq = self.place_keys[handle]
+            if key is not None:
+                self.place_index[key].remove((seq, handle))
+        else:
+            seq = len(self.place_keys)
+        key = self.__place_key(place.get_title(), self.__get_first_loc(place),
+                               place.get_placeref_list())
+        self.place_keys[handle] = (key, seq)
+        if key is not None:
+            insort(self.place_index.setdefault(key, []), (seq, handle))
+
     def __find_place(self, title, location, placeref_list):
         """
         Finds an existing place based on the title and primary location.
@@ -2833,18 +3629,12 @@ class GedcomParser(UpdateCallback):
         @type location: gen.lib.Location
         @return gen.lib.Place
         """
-        for place_handle in self.place_names[title]:
-            place = self.dbase.get_place_from_handle(place_handle)
-            if place.get_title() == title:
-                if self.__loc_is_empty(location) and \
-                   self.__loc_is_empty(self.__get_first_loc(place)) and \
-                   place.get_placeref_list() == placeref_list:
-                    return place
-                elif (not self.__loc_is_empty(location) and \
-                      not self.__loc_is_empty(self.__get_first_loc(place)) and
-                      self.__get_first_loc(place).is_equivalent(location) == IDENTICAL) and \
-                      place.get_placeref_list() == placeref_list:
-                    return place
+        key = self.__place_key(title, location, placeref_list)
+        if key is None:
+            return None
+        places = self.place_index.get(key)
+        if places:
+            return self.dbase.get_place_from_handle(places[0][1])
         return None
 
     def __add_place(self, event, sub_state):
@@ -2859,28 +3649,62 @@ class GedcomParser(UpdateCallback):
         @type sub_state: CurrentState
         """
         if sub_state.place:
-            # see whether this place already exists
-            place = self.__find_place(sub_state.place.get_title(),
-                                      self.__get_first_loc(sub_state.place),
-                                      sub_state.place.get_placeref_list())
-            if place is None:
-                place = sub_state.place
-                place_title = _pd.display(self.dbase, place)
-                location = sub_state.pf.load_place(self.place_import, place, place_title)
-                self.dbase.add_place(place, self.trans)
-                # if 'location was created, then store it, now that we have a handle.
-                if location:
-                    self.place_import.store_location(location, place.handle)
-                self.place_names[place.get_title()].append(place.get_handle())
-                event.set_place_handle(place.get_handle())
-            else:
-                place.merge(sub_state.place)
-                place_title = _pd.display(self.dbase, place)
-                location = sub_state.pf.load_place(self.place_import, place, place_title)
-                self.dbase.commit_place(place, self.trans)
-                if location:
-                    self.place_import.store_location(location, place.handle)
-                event.set_place_handle(place.get_handle())
+            handle = self.__shared(self.__store_place, sub_state.place,
+                                   sub_state.pf)
+            event.set_place_handle(handle)
+
+    def __store_place(self, new_place, place_parser):
+        """
+        Add a place if not already present, or merge it into the existing
+        place, and return the handle of the place.
+
+        @param new_place: The place parsed from PLAC or ADDR elements
+        @type new_place: gen.lib.Place
+        @param place_parser: The parser of the place fields
+        @type place_parser: PlaceParser
+        """
+        # see whether this place already exists
+        place = self.__find_place(new_place.get_title(),
+                                  self.__get_first_loc(new_place),
+                                  new_place.get_placeref_list())
+        if place is None:
+            place = new_place
+            place_title = _pd.display(self.dbase, place)
+            location = place_parser.load_place(self.place_import, place, place_title)
+            self.dbase.add_place(place, self.trans)
+            # if 'location was created, then store it, now that we have a handle.
+            if location:
+                self.place_import.store_location(location, place.handle)
+            self.__index_place(place)
+        else:
+            place.merge(new_place)
+            place_title = _pd.display(self.dbase, place)
+            location = place_parser.load_place(self.place_import, place, place_title)
+            self.dbase.commit_place(place, self.trans)
+            self.__index_place(place)
+            if location:
+                self.place_import.store_location(location, place.handle)
+        return place.get_handle()
+
+    def __store_enclosing_place(self, new_place, place_parser):
+        """
+        Add the place enclosing the place details of an address if not
+        already present, or merge it into the existing place, and return the
+        handle of the place.
+        """
+        place = self.__find_place(new_place.get_title(), None,
+                                  new_place.get_placeref_list())
+        if place is None:
+            place = new_place
+            self.dbase.add_place(place, self.trans)
+            self.__index_place(place)
+        else:
+            place.merge(new_place)
+            self.dbase.commit_place(place, self.trans)
+            self.__index_place(place)
+        place_title = _pd.display(self.dbase, place)
+        place_parser.load_place(self.place_import, place, place_title)
+        return place.get_handle()
 
     def __find_file(self, fullname, altpath):
         # try to find the media file
@@ -3059,6 +3883,15 @@ class GedcomParser(UpdateCallback):
             return
         message = _("Records not imported into ") + record_name + ":\n\n" + \
                     state.msg
+        handle = self.__shared(self.__add_msgs_note, message)
+        # If possible, attach the note to the relevant object
+        if obj:
+            obj.add_note(handle)
+
+    def __add_msgs_note(self, message):
+        """
+        Add a note with the messages of a record, and return its handle.
+        """
         new_note = Note()
         tag = StyledTextTag(StyledTextTagType.FONTFACE, 'Monospace',
                             [(0, len(message))])
@@ -3071,9 +3904,7 @@ class GedcomParser(UpdateCallback):
         note_type.set((NoteType.CUSTOM, _("GEDCOM import")))
         new_note.set_type(note_type)
         self.dbase.add_note(new_note, self.trans)
-        # If possible, attach the note to the relevant object
-        if obj:
-            obj.add_note(new_note.get_handle())
+        return new_note.get_handle()
 
     def _backup(self):
         """
@@ -3082,6 +3913,18 @@ class GedcomParser(UpdateCallback):
         """
         self.backoff = True
 
+    def __shared(self, func, *args):
+        """
+        Call a function that uses the state shared by all records, like the
+        index of the places, and return its result (a handle).
+
+        In a worker process, the call is recorded to be made by the writer,
+        and a provisional handle is returned instead.
+        """
+        if self.__log is None:
+            return func(*args)
+        return self.__log.call(func.__name__, args)
+
     def __check_xref(self):
 
         def __check(map, has_gid_func, class_func, commit_func,
@@ -3412,54 +4255,60 @@ class GedcomParser(UpdateCallback):
         """
         while True:
             line = self.__get_next_line()
-            key = line.data
             if not line or line.token == TOKEN_TRLR:
                 self._backup()
                 break
-            if line.token == TOKEN_UNKNOWN:
-                state = CurrentState()
-                self.__add_msg(_("Unknown tag"), line, state)
-                self.__skip_subordinate_levels(1, state)
-                self.__check_msgs(_("Top Level"), state, None)
-            elif key in ("FAM", "FAMILY"):
-                self.__parse_fam(line)
-            elif key in ("INDI", "INDIVIDUAL"):
-                self.__parse_indi(line)
-            elif key in ("OBJE", "OBJECT"):
-                self.__parse_obje(line)
-            elif key in ("REPO", "REPOSITORY"):
-                self.__parse_repo(line)
-            elif key in ("SUBM", "SUBMITTER"):
-                self.__parse_submitter(line)
-            elif key in ("SUBN"):
-                state = CurrentState(level=1)
-                self.__parse_submission(line, state)
-                self.__check_msgs(_("Top Level"), state, None)
-            elif line.token in (TOKEN_SUBM, TOKEN_SUBN, TOKEN_IGNORE):
-                state = CurrentState()
-                self.__skip_subordinate_levels(1, state)
-                self.__check_msgs(_("Top Level"), state, None)
-            elif key in ("SOUR", "SOURCE"):
-                self.__parse_source(line.token_text, 1)
-            elif (line.data.startswith("SOUR ") or
-                  line.data.startswith("SOURCE ")):
-                # A source formatted in a single line, for example:
-                # 0 @S62@ SOUR This is the title of the source
-                source = self.__find_or_create_source(self.sid_map[line.data])
-                source.set_title(line.data[5:])
-                self.dbase.commit_source(source, self.trans)
-            elif key[0:4] == "NOTE":
-                try:
-                    line.data = line.data[5:]
-                except:
-                    # don't think this path is ever taken, but if it is..
-                    # ensure a message is emitted & subordinates skipped
-                    line.data = None
-                self.__parse_inline_note(line, 1)
-            else:
-                state = CurrentState()
-                self.__not_recognized(line, state)
-                self.__check_msgs(_("Top Level"), state, None)
+            self.__parse_top_record(line)
+
+    def __parse_top_record(self, line):
+        """
+        Parse a single level 0 record, starting with the given line.
+        """
+        key = line.data
+        if line.token == TOKEN_UNKNOWN:
+            state = CurrentState()
+            self.__add_msg(_("Unknown tag"), line, state)
+            self.__skip_subordinate_levels(1, state)
+            self.__check_msgs(_("Top Level"), state, None)
+        elif key in ("FAM", "FAMILY"):
+            self.__parse_fam(line)
+        elif key in ("INDI", "INDIVIDUAL"):
+            self.__parse_indi(line)
+        elif key in ("OBJE", "OBJECT"):
+            self.__parse_obje(line)
+        elif key in ("REPO", "REPOSITORY"):
+            self.__parse_repo(line)
+        elif key in ("SUBM", "SUBMITTER"):
+            self.__parse_submitter(line)
+        elif key in ("SUBN"):
+            state = CurrentState(level=1)
+            self.__parse_submission(line, state)
+            self.__check_msgs(_("Top Level"), state, None)
+        elif line.token in (TOKEN_SUBM, TOKEN_SUBN, TOKEN_IGNORE):
+            state = CurrentState()
+            self.__skip_subordinate_levels(1, state)
+            self.__check_msgs(_("Top Level"), state, None)
+        elif key in ("SOUR", "SOURCE"):
+            self.__parse_source(line.token_text, 1)
+        elif (line.data.startswith("SOUR ") or
+              line.data.startswith("SOURCE ")):
+            # A source formatted in a single line, for example:
+            # 0 @S62@ SOUR This is the title of the source
+            source = self.__find_or_create_source(self.sid_map[line.data])
+            source.set_title(line.data[5:])
+            self.dbase.commit_source(source, self.trans)
+        elif key[0:4] == "NOTE":
+            try:
+                line.data = line.data[5:]
+            except:
+                # don't think this path is ever taken, but if it is..
+                # ensure a message is emitted & subordinates skipped
+                line.data = None
+            self.__parse_inline_note(line, 1)
+        else:
+            state = CurrentState()
+            self.__not_recognized(line, state)
+            self.__check_msgs(_("Top Level"), state, None)
 
     def __parse_level(self, state, __map, default):
         """
@@ -4500,20 +5349,25 @@ class GedcomParser(UpdateCallback):
         @type state: CurrentState
         """
         try:
-            title = line.data
-            place = self.__find_place(title, None, None)
-            if place is None:
-                place = Place()
-                place.set_title(title)
-                place.name.set_value(title)
-                self.dbase.add_place(place, self.trans)
-                self.place_names[place.get_title()].append(place.get_handle())
-            else:
-                pass
-            state.lds_ord.set_place_handle(place.handle)
+            handle = self.__shared(self.__store_lds_place, line.data)
+            state.lds_ord.set_place_handle(handle)
         except NameError:
             return
 
+    def __store_lds_place(self, title):
+        """
+        Find the place of an LdsOrd by its title, or add it, and return the
+        handle of the place.
+        """
+        place = self.__find_place(title, None, None)
+        if place is None:
+            place = Place()
+            place.set_title(title)
+            place.name.set_value(title)
+            self.dbase.add_place(place, self.trans)
+            self.__index_place(place)
+        return place.handle
+
     def __lds_sour(self, line, state):
         """
         Parses the SOUR tag attached to the LdsOrd.
@@ -4591,24 +5445,32 @@ class GedcomParser(UpdateCallback):
                     state.person.set_main_parent_family_handle(None)
                 state.person.add_parent_family_handle(handle)
 
-            # search childrefs
-            family, new = self.dbase.find_family_from_handle(handle, self.trans)
-            family.set_gramps_id(gid)
+            self.__shared(self.__add_family_child, handle, gid,
+                          state.person.handle, sub_state.ftype)
 
-            for ref in family.get_child_ref_list():
-                if ref.ref == state.person.handle:
-                    if sub_state.ftype:
-                        ref.set_mother_relation(sub_state.ftype)
-                        ref.set_father_relation(sub_state.ftype)
-                    break
-            else:
-                ref = ChildRef()
-                ref.ref = state.person.handle
-                if sub_state.ftype:
-                    ref.set_mother_relation(sub_state.ftype)
-                    ref.set_father_relation(sub_state.ftype)
-                family.add_child_ref(ref)
-            self.dbase.commit_family(family, self.trans)
+    def __add_family_child(self, handle, gid, person_handle, ftype):
+        """
+        Add a child to the family of a FAMC line, creating the family if it
+        does not exist yet.
+        """
+        # search childrefs
+        family, new = self.dbase.find_family_from_handle(handle, self.trans)
+        family.set_gramps_id(gid)
+
+        for ref in family.get_child_ref_list():
+            if ref.ref == person_handle:
+                if ftype:
+                    ref.set_mother_relation(ftype)
+                    ref.set_father_relation(ftype)
+                break
+        else:
+            ref = ChildRef()
+            ref.ref = person_handle
+            if ftype:
+                ref.set_mother_relation(ftype)
+                ref.set_father_relation(ftype)
+            family.add_child_ref(ref)
+        self.dbase.commit_family(family, self.trans)
 
     def __person_famc_pedi(self, line, state):
         """
@@ -4964,26 +5826,36 @@ class GedcomParser(UpdateCallback):
         state.msg += sub_state.msg
 
         child = self.__find_or_create_person(self.pid_map[line.data])
+        if self.__log:
+            self.__log.add('chil', self.__log.dumps(
+                (child.handle, sub_state.frel, sub_state.mrel)))
+        self.__add_child_ref(state.family, child.handle, sub_state.frel,
+                             sub_state.mrel)
 
-        reflist = [ref for ref in state.family.get_child_ref_list()
-                    if ref.ref == child.handle]
+    def __add_child_ref(self, family, child_handle, frel, mrel):
+        """
+        Add a child to a family, or set the order of the child if the family
+        already has a reference to the child.
+        """
+        reflist = [ref for ref in family.get_child_ref_list()
+                    if ref.ref == child_handle]
 
         if reflist: # The child has been referenced already
             ref = reflist[0]
-            if sub_state.frel:
-                ref.set_father_relation(sub_state.frel)
-            if sub_state.mrel:
-                ref.set_mother_relation(sub_state.mrel)
+            if frel:
+                ref.set_father_relation(frel)
+            if mrel:
+                ref.set_mother_relation(mrel)
             # then we will set the order now:
-            self.set_child_ref_order(state.family, ref)
+            self.set_child_ref_order(family, ref)
         else:
             ref = ChildRef()
-            ref.ref = child.handle
-            if sub_state.frel:
-                ref.set_father_relation(sub_state.frel)
-            if sub_state.mrel:
-                ref.set_mother_relation(sub_state.mrel)
-            state.family.add_child_ref(ref)
+            ref.ref = child_handle
+            if frel:
+                ref.set_father_relation(frel)
+            if mrel:
+                ref.set_mother_relation(mrel)
+            family.add_child_ref(ref)
 
     def set_child_ref_order(self, family, child_ref):
         """
@@ -5210,36 +6082,45 @@ class GedcomParser(UpdateCallback):
                                    sub_state.filename, line, state)
             else:
                 path = sub_state.filename
-            # Multiple references to the same media silently drops the later
-            # ones, even if title, notes etc.  are different
-            photo_handle = self.media_map.get(path)
-            if photo_handle is None:
-                photo = Media()
-                photo.set_path(path)
-                if sub_state.title:
-                    photo.set_description(sub_state.title)
-                else:
-                    photo.set_description(path)
-                full_path = os.path.abspath(path)
-                if os.path.isfile(full_path):
-                    photo.set_mime_type(get_type(full_path))
-                else:
-                    photo.set_mime_type(MIME_MAP.get(sub_state.form,
-                                                     'unknown'))
-                if sub_state.note:
-                    photo.add_note(sub_state.note)
-                if sub_state.attr:
-                    photo.attribute_list.append(sub_state.attr)
-                self.dbase.add_media(photo, self.trans)
-                self.media_map[path] = photo.handle
-            else:
-                photo = self.dbase.get_media_from_handle(photo_handle)
+            photo_handle = self.__shared(self.__store_media, path,
+                                         sub_state.title, sub_state.form,
+                                         sub_state.note, sub_state.attr)
             if sub_state.prim == "Y":
-                state.photo = photo.handle
+                state.photo = photo_handle
             oref = MediaRef()
-            oref.set_reference_handle(photo.handle)
+            oref.set_reference_handle(photo_handle)
             pri_obj.add_media_reference(oref)
 
+    def __store_media(self, path, title, form, note, attr):
+        """
+        Add a media object for a file if not already present, and return the
+        handle of the media object.
+        """
+        # Multiple references to the same media silently drops the later
+        # ones, even if title, notes etc.  are different
+        photo_handle = self.media_map.get(path)
+        if photo_handle is None:
+            photo = Media()
+            photo.set_path(path)
+            if title:
+                photo.set_description(title)
+            else:
+                photo.set_description(path)
+            full_path = os.path.abspath(path)
+            if os.path.isfile(full_path):
+                photo.set_mime_type(get_type(full_path))
+            else:
+                photo.set_mime_type(MIME_MAP.get(form, 'unknown'))
+            if note:
+                photo.add_note(note)
+            if attr:
+                photo.attribute_list.append(attr)
+            self.dbase.add_media(photo, self.trans)
+            self.media_map[path] = photo.handle
+        else:
+            photo = self.dbase.get_media_from_handle(photo_handle)
+        return photo.handle
+
     def __media_ref_form(self, line, state):
         """
           +1 FORM <MULTIMEDIA_FORMAT> {1:1}
@@ -5563,17 +6444,8 @@ class GedcomParser(UpdateCallback):
 
         if self.addr_is_detail and state.place:
             # Commit the enclosing place
-            place = self.__find_place(state.place.get_title(), None,
-                                      state.place.get_placeref_list())
-            if place is None:
-                place = state.place
-                self.dbase.add_place(place, self.trans)
-                self.place_names[place.get_title()].append(place.get_handle())
-            else:
-                place.merge(state.place)
-                self.dbase.commit_place(place, self.trans)
-            place_title = _pd.display(self.dbase, place)
-            state.pf.load_place(self.place_import, place, place_title)
+            handle = self.__shared(self.__store_enclosing_place, state.place,
+                                   state.pf)
 
             # Create the Place Details (it is committed with the event)
             place_detail = Place()
@@ -5582,7 +6454,7 @@ class GedcomParser(UpdateCallback):
             # For RootsMagic etc. Place Details e.g. address, hospital, cemetary
             place_detail.set_type((PlaceType.CUSTOM, _("Detail")))
             placeref = PlaceRef()
-            placeref.ref = place.get_handle()
+            placeref.ref = handle
             place_detail.set_placeref_list([placeref])
             state.place = place_detail
         else:
@@ -6344,7 +7216,7 @@ class GedcomParser(UpdateCallback):
             #     +1 CALN <SOURCE_CALL_NUMBER>       {0:M}
             #        +2 MEDI <SOURCE_MEDIA_TYPE>     {0:1}
             gid = self.rid_map[line.data]
-            repo = self.__find_or_create_repository(gid)
+            handle = self.__find_or_create_repository(gid).handle
         elif line.data == '':
             # This deals with the non-standard GEDCOM format found in Family
             # Tree Maker for Windows, Broderbund Software, Banner Blue
@@ -6361,6 +7233,7 @@ class GedcomParser(UpdateCallback):
             gid = self.rid_map[""]
             repo = self.__find_or_create_repository(gid)
             self.dbase.commit_repository(repo, self.trans)
+            handle = repo.handle
         else:
             # This deals with the non-standard GEDCOM
             # SOURCE_REPOSITORY_CITATION: =
@@ -6370,16 +7243,10 @@ class GedcomParser(UpdateCallback):
             #        +2 MEDI <SOURCE_MEDIA_TYPE>     {0:1}
             # This seems to be used by Heredis 8 PC. Heredis is notorious for
             # non-standard GEDCOM.
-            gid = self.repo2id.get(line.data)
-            if gid is None:
-                gid = self.rid_map[""]
-            repo = self.__find_or_create_repository(gid)
-            self.repo2id[line.data] = repo.get_gramps_id()
-            repo.set_name(line.data)
-            self.dbase.commit_repository(repo, self.trans)
+            handle = self.__shared(self.__store_named_repository, line.data)
 
         repo_ref = RepoRef()
-        repo_ref.set_reference_handle(repo.handle)
+        repo_ref.set_reference_handle(handle)
 
         sub_state = CurrentState()
         sub_state.repo_ref = repo_ref
@@ -6390,6 +7257,20 @@ class GedcomParser(UpdateCallback):
 
         state.source.add_repo_reference(repo_ref)
 
+    def __store_named_repository(self, name):
+        """
+        Commit a repository given by its name, and return the handle of the
+        repository.
+        """
+        gid = self.repo2id.get(name)
+        if gid is None:
+            gid = self.rid_map[""]
+        repo = self.__find_or_create_repository(gid)
+        self.repo2id[name] = repo.get_gramps_id()
+        repo.set_name(name)
+        self.dbase.commit_repository(repo, self.trans)
+        return repo.handle
+
     def __repo_ref_call(self, line, state):
         """
         @param line: The current line in GedLine format
@@ -7545,27 +8426,44 @@ class GedcomParser(UpdateCallback):
         """
         citation = Citation()
         if line.data and line.data[0] != "@":
-            title = line.data
-            handle = self.inline_srcs.get(title, create_id())
-            src = Source()
-            src.handle = handle
-            src.gramps_id = self.sid_map[""]
-            self.inline_srcs[title] = handle
+            handle = self.__shared(self.__store_inline_source, line.data)
         else:
-            src = self.__find_or_create_source(self.sid_map[line.data])
-            # We need to set the title to the cross reference identifier of the
-            # SOURce record, just in case we never find the source record. If we
-            # din't find the source record, then the source object would have
-            # got deleted by Chack and repair because the record is empty. If we
-            # find the source record, the title is overwritten in
-            # __source_title.
-            src.set_title(line.data)
-        self.dbase.commit_source(src, self.trans)
-        self.__parse_source_reference(citation, level, src.handle, state)
-        citation.set_reference_handle(src.handle)
+            handle = self.__shared(self.__store_cited_source,
+                                   self.sid_map[line.data], line.data)
+        self.__parse_source_reference(citation, level, handle, state)
+        citation.set_reference_handle(handle)
         self.dbase.add_citation(citation, self.trans)
         return citation.handle
 
+    def __store_inline_source(self, title):
+        """
+        Commit the source of a citation given by its title, and return the
+        handle of the source.
+        """
+        handle = self.inline_srcs.get(title, create_id())
+        src = Source()
+        src.handle = handle
+        src.gramps_id = self.sid_map[""]
+        self.inline_srcs[title] = handle
+        self.dbase.commit_source(src, self.trans)
+        return handle
+
+    def __store_cited_source(self, gramps_id, xref):
+        """
+        Commit the source of a citation given by a cross reference, and return
+        the handle of the source.
+        """
+        src = self.__find_or_create_source(gramps_id)
+        # We need to set the title to the cross reference identifier of the
+        # SOURce record, just in case we never find the source record. If we
+        # din't find the source record, then the source object would have
+        # got deleted by Chack and repair because the record is empty. If we
+        # find the source record, the title is overwritten in
+        # __source_title.
+        src.set_title(xref)
+        self.dbase.commit_source(src, self.trans)
+        return src.handle
+
     def __parse_change(self, line, obj, level, state):
         """
         CHANGE_DATE:=
@@ -136,7 +136,7 @@ class BasePersonView(ListView):
             'person-add'     : self.row_add,
             'person-update'  : self.row_update,
             'person-delete'  : self.row_delete,
-            'person-rebuild' : self.object_build,
+            'person-rebuild' : self.batch_build,
             'person-groupname-rebuild' : self.object_build,
             'no-database': self.no_database,
             'family-update'  : self.object_build,
@@ -112,7 +112,7 @@ class PlaceBaseView(ListView):
             'place-add'     : self.row_add,
             'place-update'  : self.row_update,
             'place-delete'  : self.row_delete,
-            'place-rebuild' : self.object_build,
+            'place-rebuild' : self.batch_build,
             }
 
         self.mapservice = config.get('interface.mapservice')
@@ -0,0 +1,112 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2017  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for GEDCOM records parsed in worker processes """
+
+import os
+import re
+import sys
+import unittest
+
+from gramps.gen.config import config
+from gramps.gen.const import DATA_DIR
+from gramps.gen.db.utils import make_database
+from gramps.gen.user import User
+from gramps.plugins.importer.importgedcom import importData
+from gramps.plugins.lib import libgedcom
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+
+OBJECT_TYPES = ('person', 'family', 'event', 'place', 'source', 'citation',
+                'repository', 'media', 'note', 'tag')
+
+class ImportUser(User):
+    """ User keeping the text of the import report """
+    text = None
+
+    def info(self, msg1, infotext, parent=None, **kwargs):
+        self.text = msg1 + infotext
+
+class ParallelImportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.min_lines = libgedcom.MIN_LINES
+        self.chunk_lines = libgedcom.CHUNK_LINES
+        libgedcom.MIN_LINES = 0
+        libgedcom.CHUNK_LINES = 40
+
+    def tearDown(self):
+        libgedcom.MIN_LINES = self.min_lines
+        libgedcom.CHUNK_LINES = self.chunk_lines
+        config.set('database.import-workers', 0)
+
+    def __import(self, filename, workers):
+        """
+        Import a file, and return its objects by (type, Gramps ID) with
+        handles replaced alike, and the text of the import report.
+        """
+        config.set('database.import-workers', workers)
+        db = make_database("inmemorydb")
+        db.load(None)
+        user = ImportUser()
+        importData(db, os.path.join(TEST_DIR, filename), user)
+        items = []
+        for obj_type in OBJECT_TYPES:
+            for handle in getattr(db, 'get_%s_handles' % obj_type)():
+                obj = getattr(db, 'get_%s_from_handle' % obj_type)(handle)
+                obj.change = 0
+                items.append((obj_type, obj))
+        keys = {obj.handle: (obj_type, getattr(obj, 'gramps_id', None)
+                                     or obj.get_name())
+                for obj_type, obj in items}
+
+        def replace(value):
+            if isinstance(value, str):
+                # Links to other objects in notes hold their handles, and
+                # notes of missing objects the time of the import
+                value = re.sub('handle/[0-9a-f]+', 'handle', value)
+                value = re.sub('imported on .*', 'imported on', value)
+                return keys.get(value, value)
+            if isinstance(value, (list, tuple)):
+                return [replace(item) for item in value]
+            return value
+
+        objects = {keys[obj.handle]: replace(obj.serialize())
+                   for obj_type, obj in items}
+        db.close()
+        return objects, user.text
+
+    def __check(self, filename):
+        objects, text = self.__import(filename, 0)
+        self.assertTrue(objects)
+        self.assertEqual(self.__import(filename, 2), (objects, text))
+
+    @unittest.skipIf(sys.version_info < libgedcom.MIN_PYTHON_VERSION,
+                     "GEDCOM records are not parsed in workers on this Python")
+    def test_sample(self):
+        self.__check("imp_sample.ged")
+
+    @unittest.skipIf(sys.version_info < libgedcom.MIN_PYTHON_VERSION,
+                     "GEDCOM records are not parsed in workers on this Python")
+    def test_media(self):
+        self.__check("imp_MediaTest.ged")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -136,7 +136,7 @@ class CitationListView(ListView):
             'citation-add'     : self.row_add,
             'citation-update'  : self.row_update,
             'citation-delete'  : self.row_delete,
-            'citation-rebuild' : self.object_build,
+            'citation-rebuild' : self.batch_build,
             }
 
         ListView.__init__(
@@ -108,7 +108,7 @@ class EventView(ListView):
             'event-add'     : self.row_add,
             'event-update'  : self.row_update,
             'event-delete'  : self.row_delete,
-            'event-rebuild' : self.object_build,
+            'event-rebuild' : self.batch_build,
             }
 
         ListView.__init__(
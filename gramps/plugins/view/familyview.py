@@ -107,7 +107,7 @@ class FamilyView(ListView):
             'family-add'     : self.row_add,
             'family-update'  : self.row_update,
             'family-delete'  : self.row_delete,
-            'family-rebuild' : self.object_build,
+            'family-rebuild' : self.batch_build,
             }
 
         ListView.__init__(
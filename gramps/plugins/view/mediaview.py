@@ -122,7 +122,7 @@ class MediaView(ListView):
             'media-add'     : self.row_add,
             'media-update'  : self.row_update,
             'media-delete'  : self.row_delete,
-            'media-rebuild' : self.object_build,
+            'media-rebuild' : self.batch_build,
             }
 
         ListView.__init__(
@@ -103,7 +103,7 @@ class NoteView(ListView):
             'note-add'     : self.row_add,
             'note-update'  : self.row_update,
             'note-delete'  : self.row_delete,
-            'note-rebuild' : self.object_build,
+            'note-rebuild' : self.batch_build,
         }
 
         ListView.__init__(
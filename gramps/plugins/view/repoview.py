@@ -122,7 +122,7 @@ class RepositoryView(ListView):
             'repository-add'     : self.row_add,
             'repository-update'  : self.row_update,
             'repository-delete'  : self.row_delete,
-            'repository-rebuild' : self.object_build,
+            'repository-rebuild' : self.batch_build,
             }
 
         ListView.__init__(
@@ -108,7 +108,7 @@ class SourceView(ListView):
             'source-add'     : self.row_add,
             'source-update'  : self.row_update,
             'source-delete'  : self.row_delete,
-            'source-rebuild' : self.object_build,
+            'source-rebuild' : self.batch_build,
             }
 
         ListView.__init__(
@@ -45,5 +45,8 @@ environ['APPDATA'] = join(environ['HOME'], 'Library', 'Application Support')
 environ['PATH'] = join(bundle_contents, 'MacOS') + ':' + environ['PATH']
 
 import gramps.grampsapp as app
-app.main()
+
+# The worker processes of parallel filters import this script again.
+if __name__ == '__main__':
+    app.main()
 